@@ -0,0 +1,106 @@
+from typing import List
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class AdjacencyMatrix(object):
+  '''
+  NumPy配列で保持する隣接行列
+
+  CSR形式は必要になった時に一度だけ作成してキャッシュし，要素が書き換えられたら作り直す
+  copy() で作成した複製は元の配列を共有し，最初に書き換えられた時に配列を複製する（copy-on-write）
+  行や要素の参照は読み取り専用のビューを返すため，書き換えは adj_matrix[i, j] = value の形で行う
+  '''
+
+  def __init__(self, adj_matrix, copy: bool = True) -> None:
+    '''
+    :params adj_matrix: 隣接行列（2次元リスト，NumPy配列，AdjacencyMatrix のいずれか）
+    :params copy bool: Falseを指定した場合，NumPy配列を複製せずに参照する（書き換え時に初めて複製する）
+    '''
+    if isinstance(adj_matrix, AdjacencyMatrix):
+      self._array = adj_matrix._array
+      self._csr = adj_matrix._csr
+      self._borrowed = adj_matrix._borrowed
+      # 配列を共有しているインスタンスの数
+      self._share_count = adj_matrix._share_count
+      self._share_count[0] += 1
+    elif not copy and isinstance(adj_matrix, np.ndarray):
+      self._array = adj_matrix
+      self._csr = None
+      self._borrowed = True
+      self._share_count = [1]
+    else:
+      self._array = np.array(adj_matrix, dtype=int)
+      self._csr = None
+      self._borrowed = False
+      self._share_count = [1]
+
+  def __len__(self) -> int:
+    return len(self._array)
+
+  def __getitem__(self, key):
+    item = self._array[key]
+    if isinstance(item, np.ndarray):
+      item = item.view()
+      item.flags.writeable = False
+    return item
+
+  def __setitem__(self, key, value) -> None:
+    self._prepare_to_write()
+    self._array[key] = value
+    self._csr = None
+
+  def __iter__(self):
+    for row in range(len(self._array)):
+      yield self[row]
+
+  def __array__(self, dtype=None, copy=None) -> np.ndarray:
+    if copy:
+      return np.array(self._array, dtype=dtype)
+    array = self._array.view()
+    array.flags.writeable = False
+    if dtype is not None and array.dtype != dtype:
+      return array.astype(dtype)
+    return array
+
+  def _prepare_to_write(self) -> None:
+    '''
+    配列を他のインスタンスと共有している場合や，外部の配列を参照している場合は，書き換える前に複製する
+    '''
+    if self._share_count[0] > 1 or self._borrowed:
+      self._array = self._array.copy()
+      self._share_count[0] -= 1
+      self._share_count = [1]
+      self._borrowed = False
+
+  @property
+  def array(self) -> np.ndarray:
+    '''
+    読み取り専用の配列
+    '''
+    return self.__array__()
+
+  def copy(self) -> 'AdjacencyMatrix':
+    return AdjacencyMatrix(self)
+
+  def to_csr(self) -> csr_matrix:
+    '''
+    CSR形式の隣接行列（作成済みであればキャッシュを返す）
+    '''
+    if self._csr is None:
+      self._csr = csr_matrix(self._array)
+    return self._csr
+
+  def tolist(self) -> List[List[int]]:
+    return self._array.tolist()
+
+
+def to_csr(adj_matrix) -> csr_matrix:
+  '''
+  隣接行列をCSR形式に変換する
+
+  AdjacencyMatrix の場合はキャッシュしたCSR形式を使い回す
+  '''
+  if isinstance(adj_matrix, AdjacencyMatrix):
+    return adj_matrix.to_csr()
+  return csr_matrix(adj_matrix)
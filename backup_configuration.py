@@ -1,9 +1,11 @@
-import copy
-import queue
+from array import array
+from collections import deque
 from typing import List
-from scipy.sparse.csgraph import dijkstra
+import numpy as np
 
+from adjacency_matrix import AdjacencyMatrix
 from normal_configuration import NormalConfiguration
+from depth_first_search_tree import DepthFirstSearchTree
 
 # 制限リンクの重み
 RESTRICT_WEIGHT = 1000
@@ -11,58 +13,112 @@ RESTRICT_WEIGHT = 1000
 ISOLATE_WEIGHT = 100000
 
 class BackupConfiguration(NormalConfiguration):
-  def __init__(self, adj_matrix) -> None:
+  def __init__(self, adj_matrix, conf_num: int = 0, isolated_configuration: array = None) -> None:
+    '''
+    :params conf_num int: バックアップ構成の番号
+    :params isolated_configuration array: ノードごとに分離したバックアップ構成の番号（分離されていない場合は -1），全てのバックアップ構成で共有する
+    '''
     super().__init__(adj_matrix)
+    self.conf_num = conf_num
+    if isolated_configuration is None:
+      isolated_configuration = array('q', [-1]) * self.node_num
+    self.isolated_configuration = isolated_configuration
     self.isolated_nodes_set = set()
-    self.normal_nodes_matrix = copy.deepcopy(adj_matrix)
+    self.normal_nodes_matrix = AdjacencyMatrix(self.adj_matrix)
     self.normal_nodes_list = []
 
-    self.connected_links_queue = queue.Queue()
-    self.links_queue_for_sorting = queue.Queue()
+    self.connected_links_queue = deque()
+    self.links_queue_for_sorting = deque()
+
+    # 通常ノードのみで構成されたグラフの隣接リストと，その関節点の情報（ノードを分離するたびに更新する）
+    self.normal_nodes_adj_list = self._get_normal_nodes_adj_list()
+    self.normal_nodes_dfs_tree = DepthFirstSearchTree(self.node_num)
+    self.normal_component_num = 0
+    self._update_connectivity_index()
   
 
-  def can_isolate_a_node(self, copied_normal_nodes_matrix: List[int], isolating_node: int) -> bool:
+  def _get_normal_nodes_adj_list(self) -> List[List[int]]:
+    normal_nodes_adj_list = [[] for _ in range(self.node_num)]
+    for i in range(self.node_num):
+      for j in np.flatnonzero(self.normal_nodes_matrix[i]).tolist():
+        if i != j:
+          normal_nodes_adj_list[i].append(j)
+
+    return normal_nodes_adj_list
+
+
+  def _update_connectivity_index(self) -> None:
+    '''
+    通常ノードのみで構成されたグラフに対してDFSを一度だけ行い，連結成分数と関節点を求め直す
+    '''
+    self.normal_nodes_dfs_tree.reset(self.node_num)
+    self.normal_component_num = 0
+    for node in range(self.node_num):
+      if node not in self.isolated_nodes_set and self.normal_nodes_dfs_tree.isVisited[node] == False:
+        self.normal_nodes_dfs_tree.depth_first_search(node, self.normal_nodes_adj_list)
+        self.normal_component_num += 1
+
+
+  def can_isolate_a_node(self, isolating_node: int) -> bool:
     '''
     指定したノードを除いた時に他の全てのノードが接続されているか判別
 
     あるバックアップ構成において，ノードを分離するには，そのノードを除いた全てのノード間が接続している必要がある
+    分離済みのノードは判定の対象外で，通常ノードのグラフの関節点の情報を参照するだけで判定する
     :params isolating_node int: 分離しようとしているノードの番号
     :return connect_flag bool: 接続しているか 
     '''
-    for node_i in range(self.node_num):
-      if node_i == isolating_node or node_i in self.isolated_nodes_set:
-        continue
-      for node_j in range(self.node_num):
-        if node_i == node_j or node_j == isolating_node or node_j in self.isolated_nodes_set:
-          continue
-        elif 0 < dijkstra(copied_normal_nodes_matrix)[node_i][node_j] < 100:
-          connect_flag = True
-        else:
-          connect_flag = False
-          break
-    
-    return connect_flag
+    remaining_node_num = self.node_num - len(self.isolated_nodes_set) - 1
+    if remaining_node_num <= 0:
+      return False
+
+    # 通常ノードのグラフが連結であれば，関節点でないノードは分離できる
+    if self.normal_component_num == 1:
+      return self.normal_nodes_dfs_tree.isArticulation_point[isolating_node] == False
+
+    # 連結成分が2つの場合は，分離しようとしているノード自身が孤立した成分であれば分離できる
+    if self.normal_component_num == 2:
+      return len(self.normal_nodes_adj_list[isolating_node]) == 0
+
+    return False
   
+
+  def isolate_node(self, isolating_node: int) -> None:
+    '''
+    指定したノードを分離ノードとして登録し，通常ノードのグラフから取り除く
+
+    :params isolating_node int: 分離するノードの番号
+    '''
+    self.isolated_nodes_set.add(isolating_node)
+    self.isolated_configuration[isolating_node] = self.conf_num
+
+    # 通常ノードのみで構成するグラフの要素から分離ノードに隣接する要素を削除
+    self.normal_nodes_matrix[isolating_node, :] = 0
+    self.normal_nodes_matrix[:, isolating_node] = 0
+
+    for adj_node in self.normal_nodes_adj_list[isolating_node]:
+      self.normal_nodes_adj_list[adj_node].remove(isolating_node)
+    self.normal_nodes_adj_list[isolating_node] = []
+
+    self._update_connectivity_index()
+
   def can_isolate_a_link(self, isolationg_node: int, connected_node: int) -> bool:
     '''
     指定した２つのノード間のリンクが分離可能か判定
 
     分離ノードは少なくとも一つの制限リンクと接続されていなければならない
     '''
-    for i in range(self.node_num):
-      if i != connected_node \
-        and (self.adj_matrix[isolationg_node][i] == RESTRICT_WEIGHT \
-            or self.adj_matrix[isolationg_node][i] == 1):
+    adj_links = self.adj_matrix[isolationg_node]
+    is_normal_or_restricted = (adj_links == RESTRICT_WEIGHT) | (adj_links == 1)
+    is_normal_or_restricted[connected_node] = False
 
-        return True
-    
-    return False
+    return bool(np.any(is_normal_or_restricted))
 
   
   def set_isolate_weight(self, isolating_node: int, connected_node: int) -> None:
-    self.adj_matrix[isolating_node][connected_node] = ISOLATE_WEIGHT
-    self.adj_matrix[connected_node][isolating_node] = ISOLATE_WEIGHT
+    self.adj_matrix[isolating_node, connected_node] = ISOLATE_WEIGHT
+    self.adj_matrix[connected_node, isolating_node] = ISOLATE_WEIGHT
   
   def set_restrict_weight(self, isolating_node: int, connected_node: int) -> None:
-    self.adj_matrix[isolating_node][connected_node] = RESTRICT_WEIGHT
-    self.adj_matrix[connected_node][isolating_node] = RESTRICT_WEIGHT
\ No newline at end of file
+    self.adj_matrix[isolating_node, connected_node] = RESTRICT_WEIGHT
+    self.adj_matrix[connected_node, isolating_node] = RESTRICT_WEIGHT
\ No newline at end of file
@@ -0,0 +1,239 @@
+from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from constants import BACKUP_CONF_NUM, SLICE_NODE_NUM, BICONNECT_WITH_BLOCK_CUT_TREE, SEARCH_MINIMUM_BACKUP_CONF_NUM, \
+  CONFIRM_MINIMUM_BACKUP_CONF_NUM, PROFILE_SLICES
+import my_module
+import slice_profiler
+import slice_result_store
+from adjacency_matrix import AdjacencyMatrix
+from sparse_backup_configurations import SparseBackupConfigurations
+from slice_budget import SliceBudget, SliceBuildFailed
+from substrate_distance_oracle import SubstrateDistanceOracle
+from topology_manager import TopologyManager
+from topology_changer import TopologyChanger
+
+
+# ワーカープロセスごとに保持する物理ネットワークの隣接行列と最短経路（共有メモリ上の配列）
+_worker_shared_memories = []
+_worker_substrate_adj_matrix = None
+_worker_substrate_distance_oracle = None
+
+
+def draw_slice_nodes_list(substrate_node_num: int, num_of_slices: int) -> List[List[int]]:
+  '''
+  全てのスライスのノードを先にまとめて決める
+
+  乱数を取り出す順番はスライスを一つずつ作成する場合と同じなので，同じシード値から同じスライスが得られる
+  :params substrate_node_num int: 物理ネットワークのノード数
+  :params num_of_slices int: 作成するスライスの数
+  :return slice_nodes_list List[List[int]]: スライスごとの物理ネットワーク上のノード番号
+  '''
+  slice_nodes_list = []
+  for _ in range(num_of_slices):
+    slice_nodes_list.append(my_module.rand_ints_nodup(0, substrate_node_num - 1, SLICE_NODE_NUM))
+
+  return slice_nodes_list
+
+
+def build_slice(substrate_adj_matrix: List[int], slice_nodes: List[int], slice_count: int,
+                topology_manager: TopologyManager, topology_changer: TopologyChanger, mrc_process_num: int = 1,
+                backup_conf_num: int = BACKUP_CONF_NUM, profile: bool = PROFILE_SLICES, budget: SliceBudget = None) -> Dict:
+  '''
+  一つのスライスに対して，オーバーレイネットワークの作成から二重連結化，MRCの実行までを行う
+
+  MRCを実行する前に必要条件を確認し，MRCに失敗した場合はオーバーレイネットワークを広げてやり直す
+  オーバーレイネットワークを広げられない場合や，処理時間かやり直し回数の上限に達した場合は，そのスライスを失敗として理由を返す
+
+  :params substrate_adj_matrix List[int]: 物理ネットワークの隣接行列
+  :params slice_nodes List[int]: スライスに対応した物理ネットワーク上のノード番号
+  :params slice_count int: スライスの番号
+  :params mrc_process_num int: MRCの始点の探索に使うプロセス数
+  :params backup_conf_num int: バックアップ構成数（SEARCH_MINIMUM_BACKUP_CONF_NUMがTrueの場合は上限）
+  :params profile bool: Trueの場合，処理ごとの回数と時間を集計し，スライスのデータの 'profile' に格納する
+  :params budget SliceBudget: 処理時間とやり直し回数の上限（省略した場合は SLICE_TIME_BUDGET_SECONDS と MAX_MRC_RETRY_NUM）
+  :return slice_backup_configuration_data Dict: 保存するスライスのデータ，
+  MRCを実行できなかった場合は slice_nodes と failure_reason（理由）だけを持つ辞書を返す
+  '''
+  if budget is None:
+    budget = SliceBudget()
+
+  if not profile:
+    return _build_slice(substrate_adj_matrix, slice_nodes, slice_count, topology_manager, topology_changer, mrc_process_num, backup_conf_num,
+                        budget)
+
+  with slice_profiler.profile_slice() as profiler:
+    slice_backup_configuration_data = _build_slice(substrate_adj_matrix, slice_nodes, slice_count, topology_manager, topology_changer,
+                                                   mrc_process_num, backup_conf_num, budget)
+  slice_backup_configuration_data['profile'] = profiler.to_dict()
+
+  return slice_backup_configuration_data
+
+
+def _build_slice(substrate_adj_matrix: List[int], slice_nodes: List[int], slice_count: int, topology_manager: TopologyManager,
+                 topology_changer: TopologyChanger, mrc_process_num: int, backup_conf_num: int, budget: SliceBudget) -> Dict:
+  try:
+    return _build_slice_within_budget(substrate_adj_matrix, slice_nodes, slice_count, topology_manager, topology_changer,
+                                      mrc_process_num, backup_conf_num, budget)
+  except SliceBuildFailed as e:
+    print('スライス', slice_count, 'のMRCを実行できませんでした:', e.reason)
+    return {'slice_nodes': slice_nodes, 'failure_reason': e.reason}
+
+
+def _build_slice_within_budget(substrate_adj_matrix: List[int], slice_nodes: List[int], slice_count: int, topology_manager: TopologyManager,
+                               topology_changer: TopologyChanger, mrc_process_num: int, backup_conf_num: int, budget: SliceBudget) -> Dict:
+  with slice_profiler.timed('generate_overlay_network'):
+    overlay_topology = topology_manager.generate_overlay_network(substrate_adj_matrix, slice_nodes)
+  with slice_profiler.timed('connect_overlay_topology'):
+    topology_changer.connect_overlay_topology(overlay_topology, topology_manager)
+
+  with slice_profiler.timed('create_biconnect_graph'):
+    topology_changer.create_biconnect_graph(overlay_topology, topology_manager, BICONNECT_WITH_BLOCK_CUT_TREE, backup_conf_num, budget)
+
+  while True:
+    # 必要条件を満たしていないトポロジーではMRCを実行せず，オーバーレイネットワークを広げる
+    # create_biconnect_graph は関節点がなくなるまで戻らないため，関節点を求めるDFSはやり直さない
+    mrc_precondition_failure = topology_manager.check_mrc_preconditions(overlay_topology, backup_conf_num, check_articulation_points=False)
+    if mrc_precondition_failure is None:
+      with slice_profiler.timed('mrc_search'):
+        if SEARCH_MINIMUM_BACKUP_CONF_NUM:
+          mrc = topology_manager.search_minimum_backup_configurations(overlay_topology.adj_matrix, 'check_mrc/output'+str(slice_count)+'/backup',
+                                                                      max_backup_conf_num=backup_conf_num, budget=budget,
+                                                                      confirm_minimum=CONFIRM_MINIMUM_BACKUP_CONF_NUM, process_num=mrc_process_num)
+        else:
+          mrc = topology_manager.search_mrc_start_point(overlay_topology.adj_matrix, 'check_mrc/output'+str(slice_count)+'/backup', mrc_process_num,
+                                                        backup_conf_num, budget)
+      if mrc:
+        break
+    failure_reason = mrc_precondition_failure or 'MRC failed for every start point'
+
+    if len(overlay_topology.adj_matrix) >= len(substrate_adj_matrix):
+      raise SliceBuildFailed(failure_reason + ' on the whole substrate')
+    budget.consume_retry()
+
+    # あってるかわからない
+    # [TODO] 結果の取り方決めてから実行してみる
+    overlay_node_num = len(overlay_topology.adj_matrix)
+    with slice_profiler.timed('mrc_retry'):
+      with slice_profiler.timed('connect_overlay_topology'):
+        topology_changer.connect_overlay_topology(overlay_topology, topology_manager, reconnect=True)
+      with slice_profiler.timed('create_biconnect_graph'):
+        topology_changer.create_biconnect_graph(overlay_topology, topology_manager, BICONNECT_WITH_BLOCK_CUT_TREE, backup_conf_num, budget)
+    # ノードが増えなければ，同じトポロジーで同じ失敗を繰り返すことになる
+    if len(overlay_topology.adj_matrix) == overlay_node_num:
+      raise SliceBuildFailed(failure_reason + ' and the overlay topology cannot be extended')
+
+  print('スライス', slice_count, 'のMRCが正常に実行されました')
+
+  biconnected_graph_nodes = []
+  for i in overlay_topology.node_list_mapping_to_substrate:
+    biconnected_graph_nodes.append(int(i))
+
+  isolated_nodes_list = []
+  for i in range(len(mrc.backup_conf)):
+    isolated_nodes_list.append(mrc.backup_conf[i].isolated_nodes_set)
+  # バックアップ構成は隣接行列ではなく，リンクのリストと構成ごとのリンクの種類で保存する
+  backup_configurations = SparseBackupConfigurations.from_adj_matrices([conf.adj_matrix for conf in mrc.backup_conf])
+
+  slice_backup_configuration_data = {
+    'slice_nodes': slice_nodes,
+    'biconnected_graph_nodes': biconnected_graph_nodes,
+    'backup_configurations': backup_configurations,
+    'isolated_nodes': isolated_nodes_list
+  }
+
+  return slice_backup_configuration_data
+
+
+def output_slice_result(slice_count: int, slice_backup_configuration_data: Dict) -> None:
+  '''
+  スライスのデータを保存する（MRCを実行できなかったスライスは，失敗した理由を保存する）
+  '''
+  if 'failure_reason' in slice_backup_configuration_data:
+    slice_result_store.save_slice_failure(slice_count, slice_backup_configuration_data)
+  else:
+    slice_result_store.save_slice_result(slice_count, slice_backup_configuration_data)
+
+
+def _to_shared_memory(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, tuple]:
+  '''
+  配列を共有メモリにコピーする
+
+  :return (shared_memory, spec): 共有メモリと，ワーカーで配列を参照するための (名前, 形, 型)
+  '''
+  array = np.asarray(array)
+  array_shared_memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+  np.ndarray(array.shape, dtype=array.dtype, buffer=array_shared_memory.buf)[:] = array
+
+  return array_shared_memory, (array_shared_memory.name, array.shape, array.dtype.str)
+
+
+def _from_shared_memory(spec: tuple) -> np.ndarray:
+  '''
+  _to_shared_memory でコピーした配列を，読み取り専用の配列として参照する（共有メモリはワーカーの終了まで保持する）
+  '''
+  name, shape, dtype = spec
+  array_shared_memory = shared_memory.SharedMemory(name=name)
+  _worker_shared_memories.append(array_shared_memory)
+  array = np.ndarray(shape, dtype=dtype, buffer=array_shared_memory.buf)
+  array.flags.writeable = False
+
+  return array
+
+
+def _init_worker(substrate_spec: tuple, dist_spec: tuple, predecessors_spec: tuple) -> None:
+  '''
+  ワーカープロセスの初期化
+
+  物理ネットワークの隣接行列と最短経路はタスクごとに受け渡さず，共有メモリを読み取り専用の配列として参照する
+  最短経路は親プロセスで一度だけ求めたものを，全てのワーカーの全てのスライスで使い回す
+  '''
+  global _worker_substrate_adj_matrix, _worker_substrate_distance_oracle
+
+  _worker_substrate_adj_matrix = AdjacencyMatrix(_from_shared_memory(substrate_spec), copy=False)
+  _worker_substrate_distance_oracle = SubstrateDistanceOracle(_worker_substrate_adj_matrix, _from_shared_memory(dist_spec),
+                                                              _from_shared_memory(predecessors_spec))
+
+
+def _build_slice_in_worker(slice_count: int, slice_nodes: List[int]) -> Dict:
+  # プロセスプールの入れ子を避けるため，ワーカー内ではMRCの始点を逐次探索する
+  return build_slice(_worker_substrate_adj_matrix, slice_nodes, slice_count,
+                     TopologyManager(_worker_substrate_distance_oracle), TopologyChanger())
+
+
+def run_batch(substrate_adj_matrix: List[int], slice_nodes_list: List[List[int]], process_num: int,
+              substrate_distance_oracle: SubstrateDistanceOracle = None) -> List[Dict]:
+  '''
+  スライスごとの処理をワーカープロセスに分散して実行する
+
+  結果はスライスの番号順に受け取り，その順番で保存するため，出力は逐次実行の場合と同じになる
+  :params substrate_adj_matrix List[int]: 物理ネットワークの隣接行列
+  :params slice_nodes_list List[List[int]]: スライスごとの物理ネットワーク上のノード番号
+  :params process_num int: ワーカープロセス数
+  :params substrate_distance_oracle SubstrateDistanceOracle: 計算済みの物理ネットワークの最短経路（省略した場合はここで一度だけ計算する）
+  :return results List[Dict]: スライスごとのデータ，MRCを実行できなかったスライスは failure_reason を持つ
+  '''
+  if substrate_distance_oracle is None:
+    substrate_distance_oracle = SubstrateDistanceOracle(substrate_adj_matrix)
+
+  shared_memories = []
+  try:
+    specs = []
+    for array in [substrate_adj_matrix, substrate_distance_oracle.dist_matrix, substrate_distance_oracle.predecessors]:
+      array_shared_memory, spec = _to_shared_memory(array)
+      shared_memories.append(array_shared_memory)
+      specs.append(spec)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=process_num, initializer=_init_worker, initargs=tuple(specs)) as executor:
+      for slice_count, slice_backup_configuration_data in enumerate(executor.map(_build_slice_in_worker, range(len(slice_nodes_list)), slice_nodes_list)):
+        output_slice_result(slice_count, slice_backup_configuration_data)
+        results.append(slice_backup_configuration_data)
+  finally:
+    for array_shared_memory in shared_memories:
+      array_shared_memory.close()
+      array_shared_memory.unlink()
+
+  return results
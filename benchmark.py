@@ -0,0 +1,279 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from typing import Dict, List
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from constants import BACKUP_CONF_NUM, SLICE_NODE_NUM
+from adjacency_matrix import AdjacencyMatrix
+from substrate_distance_oracle import SubstrateDistanceOracle
+from topology_manager import TopologyManager
+from topology_changer import TopologyChanger
+from result_calculator import ResultCalculator
+from slice_budget import SliceBudget
+from batch_runner import build_slice, output_slice_result
+import slice_profiler
+
+
+SUBSTRATE_KINDS = ['ring', 'grid', 'waxman', 'ba']
+# 一つのスライスの処理時間の上限（秒）．リングのようにオーバーレイネットワークを広げられないまま処理が終わらないスライスを打ち切る
+SLICE_TIMEOUT_SECONDS = 60
+# 段階ごとの処理時間として集計する，build_slice と結果の計算の処理の名前
+BUILD_SLICE_STAGES = ['generate_overlay_network', 'connect_overlay_topology', 'create_biconnect_graph', 'mrc_search']
+RESULT_STAGES = ['calculate_backup_hops', 'get_backup_path', 'get_normal_path']
+
+
+def ring_substrate(node_num: int, rng: np.random.Generator = None) -> np.ndarray:
+  '''
+  0-1-...-(n-1)-0 のリング
+  '''
+  adj_matrix = np.zeros((node_num, node_num), dtype=int)
+  nodes = np.arange(node_num)
+  adj_matrix[nodes, (nodes + 1) % node_num] = 1
+  adj_matrix[(nodes + 1) % node_num, nodes] = 1
+
+  return adj_matrix
+
+
+def grid_substrate(node_num: int, rng: np.random.Generator = None) -> np.ndarray:
+  '''
+  列数 ceil(n / 行数) の格子（最後の行は途中までになる場合がある）
+  '''
+  row_num = max(1, int(np.sqrt(node_num)))
+  col_num = -(-node_num // row_num)
+  adj_matrix = np.zeros((node_num, node_num), dtype=int)
+  nodes = np.arange(node_num)
+
+  has_right = (nodes % col_num != col_num - 1) & (nodes + 1 < node_num)
+  adj_matrix[nodes[has_right], nodes[has_right] + 1] = 1
+  has_below = nodes + col_num < node_num
+  adj_matrix[nodes[has_below], nodes[has_below] + col_num] = 1
+
+  return adj_matrix | adj_matrix.T
+
+
+def waxman_substrate(node_num: int, rng: np.random.Generator, alpha: float = 0.15, beta: float = 0.4) -> np.ndarray:
+  '''
+  単位正方形にノードを置き，距離 d のノード間に確率 beta * exp(-d / (alpha * L)) でリンクを張るWaxmanモデル（L は最大距離）
+
+  連結にならなかった場合は，連結成分の間にリンクを追加する
+  '''
+  positions = rng.random((node_num, 2))
+  distances = np.linalg.norm(positions[:, None, :] - positions[None, :, :], axis=2)
+  probabilities = beta * np.exp(-distances / (alpha * np.sqrt(2)))
+
+  adj_matrix = np.triu(rng.random((node_num, node_num)) < probabilities, 1).astype(int)
+
+  return _connect_components(adj_matrix | adj_matrix.T, rng)
+
+
+def barabasi_albert_substrate(node_num: int, rng: np.random.Generator, link_num_per_node: int = 2) -> np.ndarray:
+  '''
+  新しいノードを，次数に比例した確率で選んだ既存の link_num_per_node 個のノードに接続するBarabási–Albertモデル
+  '''
+  adj_matrix = np.zeros((node_num, node_num), dtype=int)
+  initial_node_num = min(node_num, link_num_per_node + 1)
+  adj_matrix[:initial_node_num, :initial_node_num] = 1 - np.eye(initial_node_num, dtype=int)
+
+  # 次数の数だけノード番号を並べたリスト（ここから一様に選ぶと次数に比例した確率になる）
+  link_ends = [node for node in range(initial_node_num) for _ in range(initial_node_num - 1)]
+  for node in range(initial_node_num, node_num):
+    targets = set()
+    while len(targets) < link_num_per_node:
+      targets.add(link_ends[rng.integers(len(link_ends))])
+    for target in targets:
+      adj_matrix[node, target] = adj_matrix[target, node] = 1
+      link_ends.extend([node, target])
+
+  return adj_matrix
+
+
+def _connect_components(adj_matrix: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+  component_num, component_labels = connected_components(csr_matrix(adj_matrix), directed=False)
+  for component in range(1, component_num):
+    node_u = rng.choice(np.flatnonzero(component_labels == component))
+    node_v = rng.choice(np.flatnonzero(component_labels < component))
+    adj_matrix[node_u, node_v] = adj_matrix[node_v, node_u] = 1
+
+  return adj_matrix
+
+
+SUBSTRATE_GENERATORS = {
+  'ring': ring_substrate,
+  'grid': grid_substrate,
+  'waxman': waxman_substrate,
+  'ba': barabasi_albert_substrate
+}
+
+
+def generate_substrate(substrate_kind: str, node_num: int, seed: int) -> np.ndarray:
+  '''
+  :params substrate_kind str: 'ring', 'grid', 'waxman', 'ba' のいずれか
+  :return adj_matrix np.ndarray: シード値から決まる物理ネットワークの隣接行列
+  '''
+  if substrate_kind not in SUBSTRATE_GENERATORS:
+    raise ValueError('unknown substrate kind: ' + substrate_kind)
+
+  return SUBSTRATE_GENERATORS[substrate_kind](node_num, np.random.default_rng(seed))
+
+
+def draw_slice_nodes_list(node_num: int, num_of_slices: int, slice_node_num: int, seed: int) -> List[List[int]]:
+  rng = np.random.default_rng(seed)
+  return [sorted(rng.choice(node_num, size=min(slice_node_num, node_num), replace=False).tolist()) for _ in range(num_of_slices)]
+
+
+def benchmark_slice(substrate_adj_matrix: AdjacencyMatrix, slice_nodes: List[int], slice_count: int, topology_manager: TopologyManager,
+                    result_calculator: ResultCalculator, backup_conf_num: int = BACKUP_CONF_NUM, timeout_seconds: float = SLICE_TIMEOUT_SECONDS,
+                    mrc_process_num: int = 1) -> Dict:
+  '''
+  一つのスライスについて，batch_runner.build_slice と結果の計算を実行し，段階ごとの処理時間を計測する
+
+  段階ごとの時間は slice_profiler で集計した build_slice の段階（BUILD_SLICE_STAGES）と結果の計算の時間から求める
+  処理時間とやり直し回数は SliceBudget で制限し，時間の上限は timeout_seconds とする
+  :return slice_result Dict: 段階ごとの処理時間（秒），slice_profiler で集計した処理ごとの回数と時間，MRCの結果の概要
+  '''
+  slice_result = {'slice_nodes': slice_nodes, 'timed_out': False, 'failure_reason': None, 'error': None, 'mrc_succeeded': False}
+  budget = SliceBudget(time_budget_seconds=timeout_seconds)
+
+  profiler = None
+  try:
+    with slice_profiler.profile_slice() as profiler:
+      slice_data = build_slice(substrate_adj_matrix, slice_nodes, slice_count, topology_manager, TopologyChanger(), mrc_process_num,
+                               backup_conf_num, profile=False, budget=budget)
+      output_slice_result(slice_count, slice_data)
+      if 'failure_reason' in slice_data:
+        slice_result['failure_reason'] = slice_data['failure_reason']
+        slice_result['timed_out'] = budget.is_time_exhausted()
+      else:
+        slice_result['mrc_succeeded'] = True
+        slice_result['overlay_node_num'] = len(slice_data['biconnected_graph_nodes'])
+        slice_result['backup_conf_num'] = len(slice_data['backup_configurations'])
+        _calculate_results(slice_data, slice_count, result_calculator)
+  except Exception as e:
+    # 一つのスライスの例外で計測全体を止めないように，例外の内容を記録して次のスライスに進む
+    slice_result['error'] = type(e).__name__ + ': ' + str(e)
+  slice_result['reconnect_num'] = budget.retry_num
+
+  # 打ち切られたスライスも，それまでの最短経路の計算やDFSの回数と時間を残す
+  slice_result['profile'] = profiler.to_dict() if profiler is not None else {}
+  slice_result['mrc_start_point_attempts'] = slice_result['profile'].get('mrc_start_point', {}).get('count', 0)
+  slice_result['stage_seconds'] = {stage: slice_result['profile'][stage]['seconds']
+                                   for stage in BUILD_SLICE_STAGES + RESULT_STAGES if stage in slice_result['profile']}
+
+  return slice_result
+
+
+def _calculate_results(slice_data: Dict, slice_count: int, result_calculator: ResultCalculator) -> None:
+  biconnected_graph_nodes = slice_data['biconnected_graph_nodes']
+  slice_node_index = [i for i, node in enumerate(biconnected_graph_nodes) if node in slice_data['slice_nodes']]
+
+  with slice_profiler.timed('calculate_backup_hops'):
+    result_calculator.calculate_backup_hops(slice_data['backup_configurations'], slice_node_index)
+  with slice_profiler.timed('get_backup_path'):
+    result_calculator.get_backup_path(slice_count)
+  with slice_profiler.timed('get_normal_path'):
+    result_calculator.get_normal_path(slice_count)
+
+
+def run_benchmark(substrate_kind: str, node_num: int, num_of_slices: int = 5, slice_node_num: int = SLICE_NODE_NUM, seed: int = 0,
+                  backup_conf_num: int = BACKUP_CONF_NUM, dijkstra_from_slice_nodes: bool = False, trace_memory: bool = True,
+                  slice_timeout_seconds: float = SLICE_TIMEOUT_SECONDS, mrc_process_num: int = 1) -> Dict:
+  '''
+  一つの物理ネットワークについて，全てのスライスの処理時間とピークメモリを計測する
+
+  ResultCalculator は一時ディレクトリに保存したスライスの結果を読み込む
+  :params dijkstra_from_slice_nodes bool: ResultCalculator でスライスのノードを始点とする最短経路だけを求めるかどうか
+  :params trace_memory bool: Trueの場合，tracemalloc でピークメモリを計測する（処理時間は長くなる）
+  :params slice_timeout_seconds float: 一つのスライスの処理時間の上限（秒）
+  :params mrc_process_num int: MRCの始点の探索に使うプロセス数
+  :return benchmark_result Dict: 条件，スライスごとの結果，段階ごとの合計時間，ピークメモリ
+  '''
+  substrate_adj_matrix = AdjacencyMatrix(generate_substrate(substrate_kind, node_num, seed), copy=False)
+  slice_nodes_list = draw_slice_nodes_list(node_num, num_of_slices, slice_node_num, seed)
+
+  cwd = os.getcwd()
+  if trace_memory:
+    tracemalloc.start()
+  start = time.perf_counter()
+  try:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      os.chdir(tmp_dir)
+      substrate_distance_oracle = SubstrateDistanceOracle(substrate_adj_matrix)
+      substrate_distance_seconds = time.perf_counter() - start
+
+      topology_manager = TopologyManager(substrate_distance_oracle)
+      result_calculator = ResultCalculator(substrate_distance_oracle, dijkstra_from_slice_nodes)
+      slice_results = [benchmark_slice(substrate_adj_matrix, slice_nodes, slice_count, topology_manager, result_calculator, backup_conf_num,
+                                       slice_timeout_seconds, mrc_process_num)
+                       for slice_count, slice_nodes in enumerate(slice_nodes_list)]
+    total_seconds = time.perf_counter() - start
+    peak_memory_bytes = tracemalloc.get_traced_memory()[1] if trace_memory else None
+  finally:
+    os.chdir(cwd)
+    if trace_memory:
+      tracemalloc.stop()
+
+  stage_seconds = {'substrate_shortest_paths': substrate_distance_seconds}
+  for slice_result in slice_results:
+    for stage, seconds in slice_result['stage_seconds'].items():
+      stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+
+  return {
+    'substrate_kind': substrate_kind,
+    'node_num': node_num,
+    'link_num': int(np.count_nonzero(np.triu(np.asarray(substrate_adj_matrix), 1))),
+    'num_of_slices': num_of_slices,
+    'slice_node_num': slice_node_num,
+    'seed': seed,
+    'backup_conf_num': backup_conf_num,
+    'dijkstra_from_slice_nodes': dijkstra_from_slice_nodes,
+    'mrc_process_num': mrc_process_num,
+    'total_seconds': total_seconds,
+    'stage_seconds': stage_seconds,
+    'peak_memory_bytes': peak_memory_bytes,
+    'mrc_succeeded_num': sum(slice_result['mrc_succeeded'] for slice_result in slice_results),
+    'timed_out_num': sum(slice_result['timed_out'] for slice_result in slice_results),
+    'failed_num': sum(slice_result['failure_reason'] is not None for slice_result in slice_results),
+    'error_num': sum(slice_result['error'] is not None for slice_result in slice_results),
+    'slices': slice_results
+  }
+
+
+def main(argv):
+  parser = argparse.ArgumentParser(description='スライスのMRCの処理時間とピークメモリを計測する')
+  parser.add_argument('--kinds', nargs='+', choices=SUBSTRATE_KINDS, default=SUBSTRATE_KINDS)
+  parser.add_argument('--sizes', nargs='+', type=int, default=[50, 200])
+  parser.add_argument('--slices', type=int, default=5)
+  parser.add_argument('--slice-node-num', type=int, default=SLICE_NODE_NUM)
+  parser.add_argument('--backup-conf-num', type=int, default=BACKUP_CONF_NUM)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--dijkstra-from-slice-nodes', action='store_true')
+  parser.add_argument('--no-trace-memory', action='store_true')
+  parser.add_argument('--slice-timeout', type=float, default=SLICE_TIMEOUT_SECONDS)
+  parser.add_argument('--mrc-process-num', type=int, default=1)
+  parser.add_argument('--output', default='benchmark_result.json')
+  args = parser.parse_args(argv[1:])
+
+  benchmark_results = []
+  for substrate_kind in args.kinds:
+    for node_num in args.sizes:
+      benchmark_result = run_benchmark(substrate_kind, node_num, args.slices, args.slice_node_num, args.seed, args.backup_conf_num,
+                                       args.dijkstra_from_slice_nodes, not args.no_trace_memory, args.slice_timeout, args.mrc_process_num)
+      print(substrate_kind, node_num, '{:.3f}s'.format(benchmark_result['total_seconds']),
+            benchmark_result['mrc_succeeded_num'], '/', args.slices, 'slices',
+            '(' + str(benchmark_result['timed_out_num']) + ' timed out, ' + str(benchmark_result['failed_num']) + ' failed, '
+            + str(benchmark_result['error_num']) + ' errors)')
+      benchmark_results.append(benchmark_result)
+
+  with open(args.output, 'w') as f:
+    json.dump(benchmark_results, f, indent=2)
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv))
@@ -0,0 +1,70 @@
+from typing import List, Dict
+
+
+class BlockCutTree(object):
+  '''
+  二重連結成分（ブロック）と関節点を頂点とするブロックカット木
+
+  ブロックは 0 から順に番号を付け，ブロックと関節点の間にだけ辺を張る
+  '''
+
+  def __init__(self, blocks: List[List[int]], articulation_points: List[int]) -> None:
+    '''
+    :params blocks List[List[int]]: ブロックごとのノード番号のリスト
+    :params articulation_points List[int]: 関節点のノード番号
+    '''
+    self.blocks = blocks
+    self.articulation_points = articulation_points
+
+    articulation_points_set = set(articulation_points)
+    # block_to_cut[i] -> ブロックiに含まれる関節点，cut_to_blocks[v] -> 関節点vを含むブロック
+    self.block_to_cut: List[List[int]] = [[] for _ in range(len(blocks))]
+    self.cut_to_blocks: Dict[int, List[int]] = {node: [] for node in articulation_points}
+    for block_id, block in enumerate(blocks):
+      for node in block:
+        if node in articulation_points_set:
+          self.block_to_cut[block_id].append(node)
+          self.cut_to_blocks[node].append(block_id)
+
+  def is_biconnected(self) -> bool:
+    return len(self.blocks) == 1
+
+  def non_cut_nodes(self, block_id: int) -> List[int]:
+    '''
+    :return List[int]: 指定したブロックに含まれる，関節点ではないノード
+    '''
+    return [node for node in self.blocks[block_id] if node not in self.cut_to_blocks]
+
+  def leaf_blocks(self) -> List[int]:
+    '''
+    関節点を一つだけ含むブロック（木の葉）を，ブロックカット木をDFSで辿った順番に返す
+
+    この順番で葉を i 番目と i + L/2 番目（L は葉の数）のように組にして結ぶと，木全体を一つの閉路で覆うことができる
+    '''
+    if len(self.blocks) <= 1:
+      return []
+
+    leaf_block_list = []
+    visited_blocks = set()
+    visited_cuts = set()
+    for root_block in range(len(self.blocks)):
+      if root_block in visited_blocks:
+        continue
+
+      visited_blocks.add(root_block)
+      block_stack = [root_block]
+      while block_stack:
+        block_id = block_stack.pop()
+        if len(self.block_to_cut[block_id]) == 1:
+          leaf_block_list.append(block_id)
+
+        for cut_node in reversed(self.block_to_cut[block_id]):
+          if cut_node in visited_cuts:
+            continue
+          visited_cuts.add(cut_node)
+          for adj_block in reversed(self.cut_to_blocks[cut_node]):
+            if adj_block not in visited_blocks:
+              visited_blocks.add(adj_block)
+              block_stack.append(adj_block)
+
+    return leaf_block_list
@@ -5,5 +5,21 @@ ATTEMPT_NUM = 1
 SLICE_NUM_PER_ATTEMPT = 5
 NUM_OF_SLICES = ATTEMPT_NUM * SLICE_NUM_PER_ATTEMPT
 
+MRC_PROCESS_NUM = 1
+SLICE_PROCESS_NUM = 1
+BICONNECT_WITH_BLOCK_CUT_TREE = False
+# Trueの場合，BACKUP_CONF_NUMを上限としてスライスごとにできるだけ少ないバックアップ構成数でMRCを実行する
+SEARCH_MINIMUM_BACKUP_CONF_NUM = False
+# Trueの場合，SEARCH_MINIMUM_BACKUP_CONF_NUMで求めた構成数より一つ少ない構成数では，どの始点からもMRCに失敗することを確認する
+CONFIRM_MINIMUM_BACKUP_CONF_NUM = False
+CACHE_SUBSTRATE_DISTANCE = False
+# Trueの場合，スライスの結果（.npz）と同じ内容を確認用のyamlファイルにも出力する
+OUTPUT_RESULT_YAML = False
+# Trueの場合，スライスごとに最短経路の計算，DFS，MRCの始点の試行などの回数と処理時間を集計し，スライスの結果と一緒に保存する
+PROFILE_SLICES = False
+# スライスごとの処理時間（秒）と，MRCに失敗した後にオーバーレイネットワークを広げてやり直す回数の上限（Noneの場合は制限しない）
+SLICE_TIME_BUDGET_SECONDS = 600
+MAX_MRC_RETRY_NUM = 20
+
 RESTRICT_WEIGHT = 1000
 ISOLATE_WEIGHT = 100000
\ No newline at end of file
@@ -1,40 +1,120 @@
+from array import array
+
+# 未探索のノードの探索順とlow-linkの値（float("Inf")の代わり）
+UNVISITED_ORDER = 2 ** 63 - 1
+
+
 class DepthFirstSearchTree(object):
+    '''
+    関節点，橋，二重連結成分を求めるDFS木（Tarjanのアルゴリズム）
+
+    再帰を使わずに明示的なスタックで探索するため，大きなトポロジーでも再帰の上限に達しない
+    各ノードの情報は array に格納し，reset() で同じ領域を使い回す
+    '''
 
     def __init__(self, node_num) -> None:
+        self.node_num = -1
+        self.reset(node_num)
+
+    def reset(self, node_num) -> None:
+        '''
+        探索結果を初期値に戻す（ノード数が変わらない場合は領域を確保し直さない）
+        '''
+        if node_num != self.node_num:
+            self.node_num = node_num
+            self._initial_flags = array('b', [0]) * node_num
+            self._initial_order = array('q', [UNVISITED_ORDER]) * node_num
+            self._initial_parent = array('q', [-1]) * node_num
+
+            self.isVisited = array('b', self._initial_flags)
+            self.search_order = array('q', self._initial_order)
+            self.low_link = array('q', self._initial_order)
+            self.parent = array('q', self._initial_parent)
+            self.isArticulation_point = array('b', self._initial_flags)
+        else:
+            self.isVisited[:] = self._initial_flags
+            self.search_order[:] = self._initial_order
+            self.low_link[:] = self._initial_order
+            self.parent[:] = self._initial_parent
+            self.isArticulation_point[:] = self._initial_flags
+
         self.search_count = 0
-        self.isVisited = [False] * (node_num)
-        self.search_order = [float("Inf")] * (node_num)
-        self.low_link = [float("Inf")] * (node_num)
-        self.parent = [-1] * (node_num)
-        self.isArticulation_point = [False] * (node_num)
+        self.bridges = []
+        # 二重連結成分（ブロック）ごとのノードのリストと，ブロックを切り出すためのノードのスタック
+        self.blocks = []
+        self._block_node_stack = []
 
     def depth_first_search(self, node_u, adj_list):
         """
+        node_uを根としてDFSを行い，探索順，low-link，親ノード，関節点，橋，二重連結成分を求める
+
         return: None
         """
-        children_counter = 0
-        self.isVisited[node_u] = True
+        is_visited = self.isVisited
+        search_order = self.search_order
+        low_link = self.low_link
+        parent = self.parent
+        is_articulation_point = self.isArticulation_point
+        block_node_stack = self._block_node_stack
 
-        self.search_order[node_u] = self.search_count
-        self.low_link[node_u] = self.search_count
+        is_visited[node_u] = True
+        search_order[node_u] = self.search_count
+        low_link[node_u] = self.search_count
         self.search_count += 1
 
-        for node_v in adj_list[node_u]:
-            if self.isVisited[node_v] == False:
-                self.parent[node_v] = node_u
-                children_counter += 1
-                self.depth_first_search(node_v, adj_list)
+        # 探索中のノード，その隣接ノードのイテレータ，子ノードの数をスタックに積む
+        node_stack = [node_u]
+        adj_iter_stack = [iter(adj_list[node_u])]
+        children_counter_stack = [0]
+
+        while node_stack:
+            node = node_stack[-1]
+
+            for node_v in adj_iter_stack[-1]:
+                if is_visited[node_v] == False:
+                    parent[node_v] = node
+                    children_counter_stack[-1] += 1
+
+                    is_visited[node_v] = True
+                    search_order[node_v] = self.search_count
+                    low_link[node_v] = self.search_count
+                    self.search_count += 1
+
+                    block_node_stack.append(node_v)
+                    node_stack.append(node_v)
+                    adj_iter_stack.append(iter(adj_list[node_v]))
+                    children_counter_stack.append(0)
+                    break
+
+                elif node_v != parent[node]:
+                    low_link[node] = min(low_link[node], search_order[node_v])
 
-                self.low_link[node_u] = min(self.low_link[node_u], self.low_link[node_v])
+            else:
+                # 全ての隣接ノードを探索し終えたら，親ノードに戻って関節点と橋を判定する
+                node_stack.pop()
+                adj_iter_stack.pop()
+                children_counter_stack.pop()
+                if not node_stack:
+                    break
 
-                if self.parent[node_u] == -1 and children_counter > 1:
-                    self.isArticulation_point[node_u] = True
+                parent_node = node_stack[-1]
+                low_link[parent_node] = min(low_link[parent_node], low_link[node])
 
-                if self.parent[node_u] != -1 and self.low_link[node_v] >= self.search_order[node_u]:
-                    self.isArticulation_point[node_u] = True
+                if parent[parent_node] == -1 and children_counter_stack[-1] > 1:
+                    is_articulation_point[parent_node] = True
 
-            elif node_v != self.parent[node_u]:
-                self.low_link[node_u] = min(self.low_link[node_u], self.search_order[node_v])
+                if parent[parent_node] != -1 and low_link[node] >= search_order[parent_node]:
+                    is_articulation_point[parent_node] = True
 
+                if low_link[node] > search_order[parent_node]:
+                    self.bridges.append((parent_node, node))
 
-    
\ No newline at end of file
+                # 親ノードが子孫から迂回できない場合，スタックに積んだ子孫と親ノードで一つのブロックになる
+                if low_link[node] >= search_order[parent_node]:
+                    block = [parent_node]
+                    while True:
+                        block_node = block_node_stack.pop()
+                        block.append(block_node)
+                        if block_node == node:
+                            break
+                    self.blocks.append(block)
@@ -0,0 +1,308 @@
+from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from adjacency_matrix import to_csr
+from shortest_paths import batched_dijkstra, extract_paths, remove_backup_configuration_weights
+from sparse_backup_configurations import SparseBackupConfigurations, ISOLATED_LINK, RESTRICTED_LINK
+import slice_result_store
+
+
+def simulate_node_failures(backup_configurations: List[List[int]], isolated_nodes: List[set], slice_nodes: List[int]) -> Dict[str, np.ndarray]:
+  '''
+  全てのノードの単一ノード障害について，スライスのノードペアの障害時のホップ数をまとめて求める
+
+  ノード v の障害時は，v を分離したバックアップ構成で v を経由していたノードペアの経路を切り替える
+  バックアップ構成ごとにスライスのノードを始点とする最短経路を一度だけ求め，全ての障害で使い回す
+  :params backup_configurations List[List[int]]: バックアップ構成の隣接行列（SparseBackupConfigurations でもよい）
+  :params isolated_nodes List[set]: バックアップ構成ごとの分離ノードの集合
+  :params slice_nodes List[int]: スライスのノード番号（バックアップ構成のグラフのノード番号）
+  :return result Dict[str, np.ndarray]:
+    failed_nodes [障害ノード] 障害が発生したノードの番号
+    backup_conf [障害ノード] 障害時に使うバックアップ構成の番号（どの構成でも分離されていない場合は -1）
+    src_nodes, dst_nodes [ノードペア] ノードペアの送信元と宛先（昇順に並べたスライスのノードの (0, 1), (0, 2), ..., (1, 2), ... の順）
+    normal_hops [ノードペア] 障害が発生していない場合のホップ数
+    is_affected [障害ノード, ノードペア] 障害ノードを経由していて，経路を切り替えるノードペアかどうか
+    failure_hops [障害ノード, ノードペア] 障害時のホップ数（送信元か宛先で障害が発生した場合と，到達できない場合は -1）
+    stretch [障害ノード, ノードペア] 障害時のホップ数 / 障害が発生していない場合のホップ数（ホップ数が -1 の場合は nan）
+  '''
+  csr_matrices = [to_csr(adj_matrix) for adj_matrix in backup_configurations]
+  node_num = csr_matrices[0].shape[0]
+
+  slice_nodes = np.sort(np.asarray(slice_nodes, dtype=int))
+  src_index, dst_index = np.triu_indices(len(slice_nodes), 1)
+  src_nodes = slice_nodes[src_index]
+  dst_nodes = slice_nodes[dst_index]
+  pair_index = np.arange(len(src_nodes))
+
+  normal_hops, (offsets, path_nodes) = _get_normal_paths(csr_matrices[0], slice_nodes, src_index, src_nodes, dst_nodes)
+  is_on_normal_path = _get_relay_nodes_on_paths(node_num, offsets, path_nodes)
+
+  # [構成番号, ノードペア] のホップ数（構成ごとに一度だけ求める）
+  dist_matrices = batched_dijkstra(csr_matrices, slice_nodes)
+  conf_hops = remove_backup_configuration_weights(dist_matrices[:, src_index, dst_nodes])
+
+  backup_conf = np.full(node_num, -1, dtype=int)
+  for conf_i, nodes in enumerate(isolated_nodes):
+    backup_conf[list(nodes)] = conf_i
+
+  # 障害ノードを経由しないノードペアは，通常時の経路をそのまま使う
+  failure_hops = np.where(is_on_normal_path, conf_hops[backup_conf], normal_hops[None, :])
+  failure_hops[is_on_normal_path & (backup_conf[:, None] == -1)] = -1
+  failure_hops[src_nodes, pair_index] = -1
+  failure_hops[dst_nodes, pair_index] = -1
+
+  return {
+    'failed_nodes': np.arange(node_num),
+    'backup_conf': backup_conf,
+    'src_nodes': src_nodes,
+    'dst_nodes': dst_nodes,
+    'normal_hops': normal_hops,
+    'is_affected': is_on_normal_path,
+    'failure_hops': failure_hops,
+    'stretch': _get_stretch(failure_hops, normal_hops)
+  }
+
+
+def simulate_slice_node_failures(slice_count: int) -> Dict[str, np.ndarray]:
+  '''
+  保存済みのスライスの結果に対して simulate_node_failures を実行する
+
+  返り値のノード番号（failed_nodes, src_nodes, dst_nodes）は物理ネットワークのノード番号に変換する
+  '''
+  data = slice_result_store.load_slice_result(slice_count)
+  biconnected_graph_nodes = np.asarray(data['biconnected_graph_nodes'], dtype=int)
+  slice_node_index = np.flatnonzero(np.isin(biconnected_graph_nodes, data['slice_nodes']))
+
+  result = simulate_node_failures(data['backup_configurations'], data['isolated_nodes'], slice_node_index)
+  for key in ['failed_nodes', 'src_nodes', 'dst_nodes']:
+    result[key] = biconnected_graph_nodes[result[key]]
+
+  return result
+
+
+def simulate_link_failures(backup_configurations: List[List[int]], slice_nodes: List[int],
+                           shared_risk_link_groups: List[List[Tuple[int, int]]] = None, process_num: int = 1) -> Dict[str, np.ndarray]:
+  '''
+  全ての単一リンク障害と，指定したリンクの組（SRLG）の同時障害について，スライスのノードペアの障害時のホップ数をまとめて求める
+
+  障害が発生したリンクが全て分離リンクになっている構成（なければ，全て分離リンクか制限リンクになっている構成）を障害時に使い，
+  障害リンクを経由していたノードペアの経路を，その構成から障害リンクを取り除いたグラフで切り替える
+  障害時のホップ数は構成ごとに障害パターンをまとめて求め，process_num に2以上を指定した場合は構成ごとにプロセスプールに分散する
+  :params backup_configurations List[List[int]]: バックアップ構成の隣接行列（SparseBackupConfigurations でもよい）
+  :params slice_nodes List[int]: スライスのノード番号（バックアップ構成のグラフのノード番号）
+  :params shared_risk_link_groups List[List[Tuple[int, int]]]: 同時に障害が発生するリンク（ノードの組）のリスト
+  :params process_num int: 並列に実行するプロセス数
+  :return result Dict[str, np.ndarray]:
+    links [リンク, 2] リンクの両端のノード番号（先頭から len(links) 個の障害パターンは，この順番の単一リンク障害）
+    failure_link_offsets, failure_links 障害パターン i で障害が発生するリンクの番号は failure_links[failure_link_offsets[i]:failure_link_offsets[i + 1]]
+    backup_conf [障害パターン] 障害時に使うバックアップ構成の番号（該当する構成がない場合は -1）
+    src_nodes, dst_nodes, normal_hops, is_affected, failure_hops, stretch simulate_node_failures と同じ（障害ノードの代わりに障害パターンごと）
+  '''
+  if not isinstance(backup_configurations, SparseBackupConfigurations):
+    backup_configurations = SparseBackupConfigurations.from_adj_matrices(backup_configurations)
+  node_num = backup_configurations.node_num
+  links = backup_configurations.edges
+
+  slice_nodes = np.sort(np.asarray(slice_nodes, dtype=int))
+  src_index, dst_index = np.triu_indices(len(slice_nodes), 1)
+  src_nodes = slice_nodes[src_index]
+  dst_nodes = slice_nodes[dst_index]
+
+  # 障害パターンごとの障害リンクの番号（単一リンク障害，SRLGの順）
+  failure_link_lists = [np.array([link_i]) for link_i in range(len(links))]
+  for link_group in shared_risk_link_groups or []:
+    link_group = np.asarray(link_group, dtype=int).reshape(-1, 2)
+    failure_link_lists.append(_to_link_index(links, node_num, link_group[:, 0], link_group[:, 1]))
+  failure_link_offsets = np.zeros(len(failure_link_lists) + 1, dtype=int)
+  np.cumsum([len(failure_link) for failure_link in failure_link_lists], out=failure_link_offsets[1:])
+  failure_links = np.concatenate(failure_link_lists) if failure_link_lists else np.zeros(0, dtype=int)
+
+  backup_conf = _get_link_failure_backup_conf(backup_configurations.weight_classes, failure_link_offsets, failure_links)
+
+  normal_hops, (offsets, path_nodes) = _get_normal_paths(backup_configurations.to_csr(0), slice_nodes, src_index, src_nodes, dst_nodes)
+  is_link_on_normal_path = _get_links_on_paths(links, node_num, offsets, path_nodes)
+  failure_index = np.repeat(np.arange(len(failure_link_lists)), np.diff(failure_link_offsets))
+  is_affected = np.zeros((len(failure_link_lists), len(src_nodes)), dtype=bool)
+  np.logical_or.at(is_affected, failure_index, is_link_on_normal_path[failure_links])
+
+  # 障害リンクを経由しないノードペアは，通常時の経路をそのまま使う
+  failure_hops = np.repeat(normal_hops[None, :], len(failure_link_lists), axis=0)
+  failure_hops[is_affected & (backup_conf[:, None] == -1)] = -1
+
+  # 経路を切り替えるノードペアがある障害パターンだけを，使う構成ごとにまとめて計算する
+  tasks = []
+  for conf_i in range(len(backup_configurations)):
+    failure_index_list = np.flatnonzero((backup_conf == conf_i) & is_affected.any(axis=1))
+    if len(failure_index_list) > 0:
+      failure_link_list = [failure_links[failure_link_offsets[i]:failure_link_offsets[i + 1]] for i in failure_index_list]
+      tasks.append((failure_index_list, (backup_configurations, conf_i, failure_link_list, slice_nodes, src_index, dst_nodes)))
+
+  if process_num <= 1:
+    task_results = [_calculate_link_failure_hops(*task_args) for _, task_args in tasks]
+  else:
+    with ProcessPoolExecutor(max_workers=process_num) as executor:
+      task_results = list(executor.map(_calculate_link_failure_hops, *zip(*[task_args for _, task_args in tasks])))
+
+  for (failure_index_list, _), conf_hops in zip(tasks, task_results):
+    failure_hops[failure_index_list] = np.where(is_affected[failure_index_list], conf_hops, failure_hops[failure_index_list])
+
+  return {
+    'links': links,
+    'failure_link_offsets': failure_link_offsets,
+    'failure_links': failure_links,
+    'backup_conf': backup_conf,
+    'src_nodes': src_nodes,
+    'dst_nodes': dst_nodes,
+    'normal_hops': normal_hops,
+    'is_affected': is_affected,
+    'failure_hops': failure_hops,
+    'stretch': _get_stretch(failure_hops, normal_hops)
+  }
+
+
+def simulate_slice_link_failures(slice_count: int, shared_risk_link_groups: List[List[Tuple[int, int]]] = None, process_num: int = 1) -> Dict[str, np.ndarray]:
+  '''
+  保存済みのスライスの結果に対して simulate_link_failures を実行する
+
+  SRLGは物理ネットワークのノード番号で指定し，スライスのグラフに含まれないリンクは無視する
+  返り値のノード番号（links, src_nodes, dst_nodes）は物理ネットワークのノード番号に変換する
+  '''
+  data = slice_result_store.load_slice_result(slice_count)
+  biconnected_graph_nodes = np.asarray(data['biconnected_graph_nodes'], dtype=int)
+  slice_node_index = np.flatnonzero(np.isin(biconnected_graph_nodes, data['slice_nodes']))
+  # 物理ネットワークのノード番号 -> スライスのグラフのノード番号
+  overlay_index = {int(node): i for i, node in enumerate(biconnected_graph_nodes)}
+
+  link_groups_on_overlay = None
+  if shared_risk_link_groups is not None:
+    backup_configurations = data['backup_configurations']
+    if not isinstance(backup_configurations, SparseBackupConfigurations):
+      backup_configurations = SparseBackupConfigurations.from_adj_matrices(backup_configurations)
+      data['backup_configurations'] = backup_configurations
+    overlay_links = {(int(node_u), int(node_v)) for node_u, node_v in backup_configurations.edges}
+
+    link_groups_on_overlay = []
+    for link_group in shared_risk_link_groups:
+      link_group_on_overlay = []
+      for node_u, node_v in link_group:
+        if node_u in overlay_index and node_v in overlay_index:
+          overlay_link = tuple(sorted((overlay_index[node_u], overlay_index[node_v])))
+          if overlay_link in overlay_links:
+            link_group_on_overlay.append(overlay_link)
+      link_groups_on_overlay.append(link_group_on_overlay)
+
+  result = simulate_link_failures(data['backup_configurations'], slice_node_index, link_groups_on_overlay, process_num)
+  for key in ['links', 'src_nodes', 'dst_nodes']:
+    result[key] = biconnected_graph_nodes[result[key]]
+
+  return result
+
+
+def _get_normal_paths(csr_matrix, slice_nodes: np.ndarray, src_index: np.ndarray, src_nodes: np.ndarray, dst_nodes: np.ndarray):
+  '''
+  全てのリンクの重みを1にした通常構成で，ノードペアのホップ数と経路を求める
+
+  :return normal_hops np.ndarray: [ノードペア] のホップ数（到達できない場合は -1）
+  :return (offsets, path_nodes) Tuple[np.ndarray, np.ndarray]: i 番目のノードペアの経路は path_nodes[offsets[i]:offsets[i + 1]]
+  '''
+  normal_csr_matrix = csr_matrix.copy()
+  normal_csr_matrix.eliminate_zeros()
+  normal_csr_matrix.data[:] = 1
+
+  dist_matrices, predecessors = batched_dijkstra([normal_csr_matrix], slice_nodes, return_predecessors=True)
+  normal_hops = remove_backup_configuration_weights(dist_matrices[0][src_index, dst_nodes])
+
+  return normal_hops, extract_paths(predecessors[0], src_nodes, dst_nodes, src_rows=src_index)
+
+
+def _get_relay_nodes_on_paths(node_num: int, offsets: np.ndarray, path_nodes: np.ndarray) -> np.ndarray:
+  '''
+  :return is_on_path np.ndarray: [ノード, ノードペア] ノードがノードペアの経路の中継ノードかどうか
+  '''
+  lengths = np.diff(offsets)
+  path_index = np.repeat(np.arange(len(lengths)), lengths)
+  position = np.arange(len(path_nodes)) - offsets[path_index]
+  # 経路の先頭（送信元）と末尾（宛先）を除いたノードが中継ノード
+  is_relay = (position > 0) & (position < lengths[path_index] - 1)
+
+  is_on_path = np.zeros((node_num, len(lengths)), dtype=bool)
+  is_on_path[path_nodes[is_relay], path_index[is_relay]] = True
+
+  return is_on_path
+
+
+def _get_links_on_paths(edges: np.ndarray, node_num: int, offsets: np.ndarray, path_nodes: np.ndarray) -> np.ndarray:
+  '''
+  :return is_on_path np.ndarray: [リンク, ノードペア] リンク（edges の番号）がノードペアの経路に含まれるかどうか
+  '''
+  lengths = np.diff(offsets)
+  path_index = np.repeat(np.arange(len(lengths)), lengths)
+  # 経路上で隣り合うノードの組（経路の末尾のノードから始まる組は除く）
+  has_next = np.arange(len(path_nodes)) < offsets[path_index + 1] - 1
+  hop_src = path_nodes[:-1][has_next[:-1]]
+  hop_dst = path_nodes[1:][has_next[:-1]]
+
+  link_index = _to_link_index(edges, node_num, hop_src, hop_dst)
+  is_on_path = np.zeros((len(edges), len(lengths)), dtype=bool)
+  is_on_path[link_index, path_index[:-1][has_next[:-1]]] = True
+
+  return is_on_path
+
+
+def _to_link_index(edges: np.ndarray, node_num: int, node_u: np.ndarray, node_v: np.ndarray) -> np.ndarray:
+  '''
+  ノードの組に対応するリンクの番号（edges の番号）を返す（存在しないリンクを指定した場合は ValueError）
+  '''
+  edge_keys = np.minimum(edges[:, 0], edges[:, 1]).astype(np.int64) * node_num + np.maximum(edges[:, 0], edges[:, 1])
+  keys = np.minimum(node_u, node_v).astype(np.int64) * node_num + np.maximum(node_u, node_v)
+
+  sorted_order = np.argsort(edge_keys)
+  sorted_index = np.minimum(np.searchsorted(edge_keys[sorted_order], keys), len(edge_keys) - 1)
+  link_index = sorted_order[sorted_index] if len(edge_keys) else sorted_index
+  if len(keys) and (len(edge_keys) == 0 or np.any(edge_keys[link_index] != keys)):
+    raise ValueError('link does not exist in the backup configurations')
+
+  return link_index
+
+
+def _get_link_failure_backup_conf(weight_classes: np.ndarray, failure_link_offsets: np.ndarray, failure_links: np.ndarray) -> np.ndarray:
+  '''
+  障害パターンごとに，障害時に使うバックアップ構成の番号を返す
+
+  障害リンクが全て分離リンクになっている最初の構成，なければ全て分離リンクか制限リンクになっている最初の構成を使う
+  :return backup_conf np.ndarray: [障害パターン] バックアップ構成の番号（該当する構成がない場合は -1）
+  '''
+  failure_num = len(failure_link_offsets) - 1
+  failure_index = np.repeat(np.arange(failure_num), np.diff(failure_link_offsets))
+  backup_conf = np.full(failure_num, -1, dtype=int)
+
+  for safe_weight_classes in [[ISOLATED_LINK], [ISOLATED_LINK, RESTRICTED_LINK]]:
+    # [構成番号, 障害パターン] 全ての障害リンクが safe_weight_classes に含まれるかどうか
+    is_safe_link = np.isin(weight_classes[:, failure_links], safe_weight_classes)
+    is_safe = np.ones((len(weight_classes), failure_num), dtype=bool)
+    for conf_i in range(len(weight_classes)):
+      np.logical_and.at(is_safe[conf_i], failure_index, is_safe_link[conf_i])
+
+    is_undecided = (backup_conf == -1) & is_safe.any(axis=0)
+    backup_conf[is_undecided] = is_safe.argmax(axis=0)[is_undecided]
+
+  return backup_conf
+
+
+def _calculate_link_failure_hops(backup_configurations: SparseBackupConfigurations, conf_i: int, failure_link_list: List[np.ndarray],
+                                 slice_nodes: np.ndarray, src_index: np.ndarray, dst_nodes: np.ndarray) -> np.ndarray:
+  '''
+  一つの構成について，障害リンクを取り除いたグラフでのノードペアのホップ数を，障害パターンごとにまとめて求める
+
+  :return hop_nums np.ndarray: [障害パターン, ノードペア] のホップ数（到達できない場合は -1）
+  '''
+  csr_matrices = [backup_configurations.to_csr_without_links(conf_i, failure_link) for failure_link in failure_link_list]
+  dist_matrices = batched_dijkstra(csr_matrices, slice_nodes)
+
+  return remove_backup_configuration_weights(dist_matrices[:, src_index, dst_nodes])
+
+
+def _get_stretch(failure_hops: np.ndarray, normal_hops: np.ndarray) -> np.ndarray:
+  is_valid = (failure_hops >= 0) & (normal_hops > 0)
+  return np.divide(failure_hops, normal_hops, out=np.full(failure_hops.shape, np.nan), where=is_valid)
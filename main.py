@@ -1,10 +1,9 @@
 import sys
 import random
-import copy
-import yaml
 
-from constants import BACKUP_CONF_NUM, NUM_OF_SLICES, SLICE_NODE_NUM, SLICE_NUM_PER_ATTEMPT
-import my_module
+from constants import NUM_OF_SLICES, MRC_PROCESS_NUM, SLICE_PROCESS_NUM, CACHE_SUBSTRATE_DISTANCE
+import batch_runner
+from substrate_distance_oracle import SubstrateDistanceOracle
 from topology_manager import TopologyManager
 from topology_changer import TopologyChanger
 import path_strings_collection as path_str
@@ -13,61 +12,28 @@ import path_strings_collection as path_str
 random.seed(1)
 
 def main(argv):
-  substrate_adj_matrix = my_module.from_file_to_adj_matrix(path_str.substrate_topo_file)
+  # 物理ネットワークの最短経路は起動時に一度だけ求め，全てのスライスで使い回す
+  cache_dir = path_str.substrate_distance_cache_dir if CACHE_SUBSTRATE_DISTANCE else None
+  substrate_distance_oracle = SubstrateDistanceOracle.from_file(path_str.substrate_topo_file, cache_dir)
+  # 全スライスで同じ隣接行列を使うため，CSR形式は一度だけ作成される
+  substrate_adj_matrix = substrate_distance_oracle.substrate_adj_matrix
 
-  topology_manager = TopologyManager()
-  topology_changer = TopologyChanger()
-
-  for slice_count in range(NUM_OF_SLICES):
-    slice_nodes = my_module.rand_ints_nodup(0, len(substrate_adj_matrix)-1, SLICE_NODE_NUM)
-
-    overlay_topology = topology_manager.generate_overlay_network(substrate_adj_matrix, slice_nodes)
-    topology_changer.connect_overlay_topology(overlay_topology, topology_manager)
+  # 全スライスのノードを先に決めておく（スライスを一つずつ作成する場合と同じ乱数列になる）
+  slice_nodes_list = batch_runner.draw_slice_nodes_list(len(substrate_adj_matrix), NUM_OF_SLICES)
 
-    topology_changer.create_biconnect_graph(overlay_topology, topology_manager)
+  if SLICE_PROCESS_NUM > 1:
+    batch_runner.run_batch(substrate_adj_matrix, slice_nodes_list, SLICE_PROCESS_NUM, substrate_distance_oracle)
+    return
 
-    while len(overlay_topology.adj_matrix) <= len(substrate_adj_matrix):
-      start_point = 0
-      while start_point < overlay_topology.node_num:
-        mrc = topology_manager.apply_mrc(overlay_topology.adj_matrix, 'check_mrc/output'+str(slice_count)+'/backup', start_point)
-        if not mrc:
-          start_point += 1
-        else:
-          print('スライス', slice_count, 'のMRCが正常に実行されました')
-          
-          # TODO このタイミングでバックアップ構成のデータをyaml書き出し  
-          biconnected_graph_nodes = []
-          for i in overlay_topology.node_list_mapping_to_substrate:
-            biconnected_graph_nodes.append(int(i))
-          
-          backup_configurations_list = []
-          isolated_nodes_list = []
-
-          for i in range(BACKUP_CONF_NUM):
-            backup_configurations_list.append(mrc.backup_conf[i].adj_matrix)
-            isolated_nodes_list.append(mrc.backup_conf[i].isolated_nodes_set)
-          slice_backup_configuration_data = {
-            'slice_nodes': slice_nodes,
-            # これだけなぜか文字列に変換しないとバグが起きる(ログとして残すだけなので一旦はこのままで)
-            'biconnected_graph_nodes': biconnected_graph_nodes,
-            'backup_configurations': backup_configurations_list,
-            'isolated_nodes': isolated_nodes_list
-          }
+  topology_manager = TopologyManager(substrate_distance_oracle)
+  topology_changer = TopologyChanger()
 
-          with open('yaml/slice' + str(slice_count) + '_mrc_result.yaml', 'w') as f:
-            yaml.dump(slice_backup_configuration_data, f, default_flow_style=False, allow_unicode=True)
-          
-          break
-      # あってるかわからない
-      # [TODO] 結果の取り方決めてから実行してみる
-      else:
-        topology_changer.connect_overlay_topology(overlay_topology, topology_manager, reconnect=True)
-        topology_changer.create_biconnect_graph(overlay_topology, topology_manager)
-        continue
-      
-      break
+  for slice_count, slice_nodes in enumerate(slice_nodes_list):
+    slice_backup_configuration_data = batch_runner.build_slice(substrate_adj_matrix, slice_nodes, slice_count,
+                                                               topology_manager, topology_changer, MRC_PROCESS_NUM)
+    batch_runner.output_slice_result(slice_count, slice_backup_configuration_data)
 
 
 
 if __name__ == '__main__':
-  sys.exit(main(sys.argv))
\ No newline at end of file
+  sys.exit(main(sys.argv))
@@ -1,9 +1,14 @@
-import queue
 import sys
+from array import array
+from collections import deque
 from typing import List
+import numpy as np
 
+from adjacency_matrix import AdjacencyMatrix
 from normal_configuration import NormalConfiguration
 from backup_configuration import BackupConfiguration
+from node_queue import NodeQueue
+from sparse_backup_configurations import SparseBackupConfigurations
 from constants import DIRECTORY_NAME, BACKUP_CONF_NUM
 
 RESTRICT_WEIGHT = 1000
@@ -11,21 +16,39 @@ ISOLATE_WEIGHT = 100000
 
 
 class MultipleRoutingConfigurations(object):
-  def __init__(self, adj_matrix: List[int]) -> None:
+  def __init__(self, adj_matrix: List[int], backup_conf_num: int = BACKUP_CONF_NUM) -> None:
+    '''
+    :params backup_conf_num int: バックアップ構成数
+    '''
+    # 通常構成と全てのバックアップ構成は一つの配列を共有し，書き換える構成だけが配列を複製する
+    adj_matrix = AdjacencyMatrix(adj_matrix)
     self.normal_conf = NormalConfiguration(adj_matrix)
-    self.backup_conf = self._get_backup_conf(adj_matrix)
+    # isolated_configuration[node] -> ノードを分離したバックアップ構成の番号（分離されていない場合は -1）
+    self.isolated_configuration = array('q', [-1]) * len(adj_matrix)
+    self.backup_conf = self._get_backup_conf(adj_matrix, backup_conf_num)
 
-    self.node_queue = queue.Queue()
-    self.priority_link_list = []
+    self.node_queue = NodeQueue()
+    self.priority_link_list = deque()
   
-  def _get_backup_conf(self, adj_matrix: List[int]) -> List[int]:
+  def _get_backup_conf(self, adj_matrix: List[int], backup_conf_num: int) -> List[int]:
     '''
     指定した数のバックアップルーティング構成オブジェクトを生成
     '''
-    backup_conf = [None] * BACKUP_CONF_NUM
-    for i in range(BACKUP_CONF_NUM):
-      backup_conf[i] = BackupConfiguration(adj_matrix)
+    backup_conf = [None] * backup_conf_num
+    for i in range(backup_conf_num):
+      backup_conf[i] = BackupConfiguration(adj_matrix, i, self.isolated_configuration)
     return backup_conf
+
+  def add_backup_configuration(self) -> int:
+    '''
+    バックアップルーティング構成を一つ追加する
+
+    既存の構成で分離したノードとリンクはそのまま残す
+    :return conf_num: int 追加した構成の番号
+    '''
+    conf_num = len(self.backup_conf)
+    self.backup_conf.append(BackupConfiguration(self.normal_conf.adj_matrix, conf_num, self.isolated_configuration))
+    return conf_num
   
   def _get_isolated_configuration(self, node: int) -> int:
     '''
@@ -33,10 +56,7 @@ class MultipleRoutingConfigurations(object):
 
     :return i: int ノードが既に分離されているバックアップルーティング構成, 分離されていない場合は -1 を返す
     '''
-    for i in range(BACKUP_CONF_NUM):
-      if node in set(self.backup_conf[i].isolated_nodes_set):
-        return i
-    return -1
+    return self.isolated_configuration[node]
   
 
   def reorder_node_queue(self, isolated_node: int, next_isolating_node: int) -> None:
@@ -48,33 +68,14 @@ class MultipleRoutingConfigurations(object):
     :params isolated_node: int あるバックアップ構成で分離したノード
     :params next_isolating_node: int 別のバックアップ構成で優先的に分離するノード
     '''
-    node_queue_for_sorting = queue.Queue()
-
-    while not self.node_queue.empty():
-      tmp = self.node_queue.get()
-      if tmp != next_isolating_node:
-        node_queue_for_sorting.put(tmp)
-
-    self.node_queue.put(next_isolating_node)
-
-    while not node_queue_for_sorting.empty():
-      self.node_queue.put(node_queue_for_sorting.get())
-    
+    self.node_queue.move_to_front(next_isolating_node)
 
 
   def get_link_queue_for_sorting(self, next_isolating_conf: int) -> None:
-    priority_link_num = len(self.priority_link_list)
-
-    for _ in range(priority_link_num):
-      next_isolating_node, isolating_node = self.priority_link_list.pop(0)
-      isIsolated = False
-      for conf_i in range(len(self.backup_conf)):
-        if next_isolating_node in set(self.backup_conf[conf_i].isolated_nodes_set):
-          isIsolated = True
-          break
-
-      if not isIsolated:
-        self.backup_conf[next_isolating_conf].links_queue_for_sorting.put([next_isolating_node,isolating_node])
+    while self.priority_link_list:
+      next_isolating_node, isolating_node = self.priority_link_list.popleft()
+      if self.isolated_configuration[next_isolating_node] == -1:
+        self.backup_conf[next_isolating_conf].links_queue_for_sorting.append([next_isolating_node,isolating_node])
 
 
   def _get_link_queue_for_isolate(self, isolating_conf: int, isolating_node: int) -> None:
@@ -83,32 +84,59 @@ class MultipleRoutingConfigurations(object):
 
     キューの順番でリンクを分離していくため，優先したいリンクはこの時に先に入れておく
     '''
-    priority_links = []
+    priority_links = list(self.backup_conf[isolating_conf].links_queue_for_sorting)
+    self.backup_conf[isolating_conf].links_queue_for_sorting.clear()
     priority_set = set()
 
-    while not self.backup_conf[isolating_conf].links_queue_for_sorting.empty():
-      priority_links.append(self.backup_conf[isolating_conf].links_queue_for_sorting.get())
-
     for i in range(len(priority_links)):
       if priority_links[i][0] == isolating_node:
-        self.backup_conf[isolating_conf].connected_links_queue.put(priority_links[i])
+        self.backup_conf[isolating_conf].connected_links_queue.append(priority_links[i])
       priority_set.add(priority_links[i][1])
 
-    for i in range(len(self.backup_conf[isolating_conf].adj_matrix)):
-      if i not in priority_set\
-          and self.backup_conf[isolating_conf].adj_matrix[isolating_node][i] != 0:
-        self.backup_conf[isolating_conf].connected_links_queue.put([isolating_node,i])
+    for i in np.flatnonzero(self.backup_conf[isolating_conf].adj_matrix[isolating_node]).tolist():
+      if i not in priority_set:
+        self.backup_conf[isolating_conf].connected_links_queue.append([isolating_node,i])
 
 
-  def isolate_a_node(self, isolating_conf: int, node_to_isolate: int) -> None:
+  def _save_isolation_state(self, isolating_conf: int, node_to_isolate: int) -> tuple:
+    '''
+    isolate_a_node が書き換える状態（分離するノードに接続されたリンクの重み，リンクのキュー，ノードのキュー，優先するリンク）を保存する
+    '''
+    backup_conf = self.backup_conf[isolating_conf]
+    return (np.array(backup_conf.adj_matrix[node_to_isolate]), list(backup_conf.links_queue_for_sorting), self.node_queue.copy(),
+            len(self.priority_link_list))
+
+
+  def _restore_isolation_state(self, isolating_conf: int, node_to_isolate: int, saved_state: tuple) -> None:
+    '''
+    分離できなかったノードについて，isolate_a_node を呼び出す前の状態に戻す
+    '''
+    adj_links, links_queue_for_sorting, node_queue, priority_link_num = saved_state
+    backup_conf = self.backup_conf[isolating_conf]
+
+    backup_conf.adj_matrix[node_to_isolate, :] = adj_links
+    backup_conf.adj_matrix[:, node_to_isolate] = adj_links
+    backup_conf.connected_links_queue.clear()
+    backup_conf.links_queue_for_sorting = deque(links_queue_for_sorting)
+    self.node_queue = node_queue
+    # 優先するリンクは末尾に追加されるだけなので，追加した分を取り除く
+    while len(self.priority_link_list) > priority_link_num:
+      self.priority_link_list.pop()
+
+
+  def isolate_a_node(self, isolating_conf: int, node_to_isolate: int, rollback_on_failure: bool = False) -> None:
     '''
     :params isolating_conf: int 分離するバックアップルーティング構成の番号
     :parsms node_to_isolate: int 分離するノードの番号
+    :params rollback_on_failure: bool Trueの場合，分離できなかった時にリンクの重みとキューを呼び出す前の状態に戻す
+    （構成を追加しながら分離する場合に使う．Falseの場合は，分離を試みた時の変更がそのまま残る）
     '''
+    saved_state = self._save_isolation_state(isolating_conf, node_to_isolate) if rollback_on_failure else None
+
     self._get_link_queue_for_isolate(isolating_conf, node_to_isolate)
 
-    while not self.backup_conf[isolating_conf].connected_links_queue.empty():
-      isolating_node, connected_node = self.backup_conf[isolating_conf].connected_links_queue.get()
+    while self.backup_conf[isolating_conf].connected_links_queue:
+      isolating_node, connected_node = self.backup_conf[isolating_conf].connected_links_queue.popleft()
       
       if isolating_node != node_to_isolate:
           continue
@@ -121,6 +149,8 @@ class MultipleRoutingConfigurations(object):
       # - ノード間のリンクが分離リンクであれば，分離可能
       if isolating_conf == conf_already_isolate:
         if self.backup_conf[conf_already_isolate].adj_matrix[isolating_node][connected_node] == RESTRICT_WEIGHT:
+          if rollback_on_failure:
+            self._restore_isolation_state(isolating_conf, node_to_isolate, saved_state)
           return False
         else:
           self.backup_conf[isolating_conf].set_isolate_weight(isolating_node, connected_node)
@@ -132,11 +162,13 @@ class MultipleRoutingConfigurations(object):
       #   - 他に分離リンクしか接続されていない場合は，分離するとMRCの制約に反する
       # * 別のバックアップ構成において，ノード間のリンクが既に分離されている場合
       #   - ノード間のリンクを制限リンクにする
-      elif 0 <= conf_already_isolate <= BACKUP_CONF_NUM:
+      elif 0 <= conf_already_isolate < len(self.backup_conf):
         if self.backup_conf[conf_already_isolate].adj_matrix[isolating_node][connected_node] == RESTRICT_WEIGHT:
           if self.backup_conf[isolating_conf].can_isolate_a_link(isolating_node, connected_node):
               self.backup_conf[isolating_conf].set_isolate_weight(isolating_node, connected_node)
           else:
+            if rollback_on_failure:
+              self._restore_isolation_state(isolating_conf, node_to_isolate, saved_state)
             return False
 
         elif self.backup_conf[conf_already_isolate].adj_matrix[isolating_node][connected_node] == ISOLATE_WEIGHT:
@@ -176,4 +208,10 @@ class MultipleRoutingConfigurations(object):
         for row in range(len(self.normal_conf.adj_matrix)):
           for col in range(len(self.normal_conf.adj_matrix)):
               f.write("{:8}".format(int(self.backup_conf[i].adj_matrix[row][col])))
-          f.write('\n')
\ No newline at end of file
+          f.write('\n')
+
+  def export_sparse_adj_matrix(self, output_file_name: str) -> None:
+    '''
+    全てのバックアップ構成を，リンクのリストと構成ごとのリンクの種類だけを持つ一つの .npz ファイルに出力する
+    '''
+    SparseBackupConfigurations.from_adj_matrices([conf.adj_matrix for conf in self.backup_conf]).save(output_file_name + '.npz')
\ No newline at end of file
@@ -1,24 +1,91 @@
+import os
 import random
+import warnings
+import numpy as np
 import matplotlib.pyplot as plt
 
-def from_file_to_adj_matrix(file_name):
-    with open(file_name, "r") as f:
+# 辺リスト形式のトポロジーファイルの拡張子
+EDGE_LIST_EXTENSIONS = ('.edges', '.edgelist')
+# 辺リスト形式のファイルの先頭に書くノード数の行
+NODE_NUM_HEADER = '# node_num '
+
+
+def load_adj_matrix(file_name):
+    '''
+    トポロジーファイルを隣接行列（NumPy配列）として読み込む
+
+    拡張子で形式を判別する（.npy: NumPy配列，.edges/.edgelist: 1行に1リンクの辺リスト，それ以外: 空白区切りの隣接行列）
+    '''
+    extension = os.path.splitext(file_name)[1]
+    if extension == '.npy':
+        return np.load(file_name).astype(int, copy=False)
+    if extension in EDGE_LIST_EXTENSIONS:
+        return _load_edge_list(file_name)
+
+    return np.loadtxt(file_name, dtype=int, ndmin=2)
+
+
+def save_adj_matrix(adj_matrix, file_name):
+    '''
+    隣接行列をトポロジーファイルに書き出す（形式は load_adj_matrix と同じく拡張子で判別する）
+    '''
+    adj_matrix = np.asarray(adj_matrix).astype(int)
+    extension = os.path.splitext(file_name)[1]
+    if extension == '.npy':
+        np.save(file_name, adj_matrix)
+    elif extension in EDGE_LIST_EXTENSIONS:
+        _save_edge_list(adj_matrix, file_name)
+    else:
+        np.savetxt(file_name, adj_matrix, fmt='%2d', delimiter='')
+
 
-        adj_matrix = f.readlines()
-        for i in range(len(adj_matrix)):
-            adj_matrix[i] = adj_matrix[i].split()
-            for j in range(len(adj_matrix)):
-                adj_matrix[i][j] = int(adj_matrix[i][j])
+def _load_edge_list(file_name):
+    '''
+    「送信元 宛先 [重み]」を1行に1リンクずつ書いた辺リストを読み込む
+
+    先頭に "# node_num N" の行があればノード数をNとし，なければ最大のノード番号 + 1 とする
+    '''
+    node_num = None
+    with open(file_name, 'r') as f:
+        first_line = f.readline()
+    if first_line.startswith(NODE_NUM_HEADER):
+        node_num = int(first_line[len(NODE_NUM_HEADER):])
+
+    with warnings.catch_warnings():
+        # リンクがないファイルは正しい形式なので，空のファイルに対する警告は出さない
+        warnings.simplefilter('ignore', UserWarning)
+        edges = np.loadtxt(file_name, dtype=int, ndmin=2)
+    # リンクがない場合，edges の形は (0, 1) になる
+    if edges.size == 0:
+        return np.zeros((node_num or 0, node_num or 0), dtype=int)
+    if node_num is None:
+        node_num = int(edges[:, :2].max()) + 1
+
+    adj_matrix = np.zeros((node_num, node_num), dtype=int)
+    weights = edges[:, 2] if edges.shape[1] > 2 else 1
+    adj_matrix[edges[:, 0], edges[:, 1]] = weights
+    adj_matrix[edges[:, 1], edges[:, 0]] = weights
 
     return adj_matrix
 
 
+def _save_edge_list(adj_matrix, file_name):
+    rows, cols = np.nonzero(np.triu(adj_matrix, 1))
+    weights = adj_matrix[rows, cols]
+    # 重みが全て1の場合は重みの列を省略する
+    if np.all(weights == 1):
+        edges = np.stack([rows, cols], axis=1)
+    else:
+        edges = np.stack([rows, cols, weights], axis=1)
+    np.savetxt(file_name, edges, fmt='%d', header=NODE_NUM_HEADER[2:] + str(len(adj_matrix)))
+
+
+def from_file_to_adj_matrix(file_name):
+    return load_adj_matrix(file_name).tolist()
+
+
 def from_adj_matrix_to_file(adj_matrix, file_name):
-    with open(file_name,'w') as f:
-        for row in range(len(adj_matrix)):
-            for col in range(len(adj_matrix)):
-                f.write("{:2}".format(int(adj_matrix[row][col])))
-            f.write('\n')
+    save_adj_matrix(adj_matrix, file_name)
 
 # Random int value generation without duplicates
 def rand_ints_nodup(a, b, k):
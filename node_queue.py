@@ -0,0 +1,60 @@
+from collections import deque
+from itertools import count
+from typing import Dict
+
+
+class NodeQueue(object):
+  '''
+  MRCで分離するノードの順番を管理するキュー
+
+  各ノードはキューに高々一つだけ入る．move_to_front() で古い要素を削除せずに無効化し（取り出す時に読み飛ばす），
+  新しい要素を先頭に入れるため，キューの長さに関係なく定数時間で順番を入れ替えられる
+  '''
+
+  def __init__(self) -> None:
+    self._queue = deque()
+    # ノード番号 -> キューに入っている有効な要素の番号
+    self._entry_ids: Dict[int, int] = {}
+    self._entry_counter = count()
+
+  def __len__(self) -> int:
+    return len(self._entry_ids)
+
+  def empty(self) -> bool:
+    return not self._entry_ids
+
+  def put(self, node: int) -> None:
+    '''
+    ノードを末尾に入れる（既にキューに入っている場合は末尾に移動する）
+    '''
+    entry_id = next(self._entry_counter)
+    self._entry_ids[node] = entry_id
+    self._queue.append((entry_id, node))
+
+  def move_to_front(self, node: int) -> None:
+    '''
+    ノードを先頭に入れる（既にキューに入っている場合は先頭に移動する）
+    '''
+    entry_id = next(self._entry_counter)
+    self._entry_ids[node] = entry_id
+    self._queue.appendleft((entry_id, node))
+
+  def copy(self) -> 'NodeQueue':
+    '''
+    同じ順番のキューを複製する（要素の番号は複製元と共通の連番から振るため，どちらに入れても重ならない）
+    '''
+    node_queue = NodeQueue()
+    node_queue._queue = deque(self._queue)
+    node_queue._entry_ids = dict(self._entry_ids)
+    node_queue._entry_counter = self._entry_counter
+    return node_queue
+
+  def get(self) -> int:
+    '''
+    先頭のノードを取り出す
+    '''
+    while True:
+      entry_id, node = self._queue.popleft()
+      if self._entry_ids.get(node) == entry_id:
+        del self._entry_ids[node]
+        return node
@@ -1,7 +1,11 @@
-from typing import List
-import copy
+from typing import List, Tuple
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
 
+from adjacency_matrix import to_csr
+from shortest_paths import to_hop_matrix
 from topology import Topology
+import slice_profiler
 
 class OverlayTopology(Topology):
   '''
@@ -10,8 +14,9 @@ class OverlayTopology(Topology):
   
   node_list_mapping_to_substrate: List[int]
   substrate_adj_matrix: List[int]
-  adj_matrix_on_substrate: List[int]
-  substrate_adj_matrix_without_overlay: List[int]
+  adj_matrix_on_substrate: np.ndarray
+  substrate_adj_matrix_without_overlay: np.ndarray
+  substrate_version: int
   flag_to_exit_recursion: bool
 
   def __init__(self, overlay_adj_matrix: List[int], overlay_node_list: List[int], substrate_adj_matrix: List[int]):
@@ -22,39 +27,64 @@ class OverlayTopology(Topology):
     self.adj_matrix_on_substrate = self.extract_overlay_topology_from_substrate()
     self.substrate_adj_matrix_without_overlay = self.find_resources_not_used_overlay()
 
+    # substrate_adj_matrix_without_overlayが更新されるたびに増える版数と，その版数に対する最短経路のキャッシュ
+    self.substrate_version = 0
+    self._shortest_paths_version = -1
+    self._shortest_paths_without_overlay = None
+
     # self.flag_to_exit_recursion = 0
   
   def update_attribute(self) -> None:
     super().update_attribute()
     self.adj_matrix_on_substrate = self.extract_overlay_topology_from_substrate()
     self.substrate_adj_matrix_without_overlay = self.find_resources_not_used_overlay()
+    self.substrate_version += 1
 
-  
-  def extract_overlay_topology_from_substrate(self) -> List[int]:
+
+  def get_shortest_paths_without_overlay(self) -> Tuple[np.ndarray, np.ndarray]:
     '''
-    return: List[int] 物理ネットワークの隣接行列からオーバーレイネットワークに対応した要素だけを抽出した隣接行列
+    オーバーレイネットワークで使われていない物理ネットワークの資源に対する全ノード間の最短経路を返す
+
+    計算結果は substrate_version ごとにキャッシュし，update_attribute が呼ばれるまで使い回す
+    :return (dist_matrix, predecessors) Tuple[np.ndarray, np.ndarray]: ホップ数（int型，到達できない場合は -1）と最終ホップのノード番号
     '''
-    substrate_node_num = len(self.substrate_adj_matrix)
+    if self._shortest_paths_version != self.substrate_version:
+      adj_csr_matrix = to_csr(self.substrate_adj_matrix_without_overlay)
+      with slice_profiler.timed('dijkstra'):
+        dist_matrix, predecessors = dijkstra(csgraph=adj_csr_matrix, directed=False, return_predecessors=True)
+      dist_matrix = to_hop_matrix(dist_matrix)
+
+      self._shortest_paths_without_overlay = (dist_matrix, predecessors)
+      self._shortest_paths_version = self.substrate_version
+
+    return self._shortest_paths_without_overlay
 
-    adj_matrix_on_substrate = [[0 for i in range(substrate_node_num)] for j in range(substrate_node_num)]
+  
+  def extract_overlay_topology_from_substrate(self) -> np.ndarray:
+    '''
+    return: np.ndarray 物理ネットワークの隣接行列からオーバーレイネットワークに対応した要素だけを抽出した隣接行列
+    '''
+    substrate_adj_matrix = np.asarray(self.substrate_adj_matrix)
+    overlay_index = np.ix_(self.node_list_mapping_to_substrate, self.node_list_mapping_to_substrate)
 
-    for i in range(substrate_node_num):
-        for j in range(substrate_node_num):
-            if i in self.node_list_mapping_to_substrate and j in self.node_list_mapping_to_substrate \
-              and self.substrate_adj_matrix[i][j] == 1:
-              adj_matrix_on_substrate[i][j] = 1
+    adj_matrix_on_substrate = np.zeros(substrate_adj_matrix.shape, dtype=int)
+    adj_matrix_on_substrate[overlay_index] = substrate_adj_matrix[overlay_index] == 1
     
     return adj_matrix_on_substrate
 
 
-  def find_resources_not_used_overlay(self) -> List[int]:
-    substrate_topo_not_used_slice = copy.deepcopy(self.substrate_adj_matrix)
+  def find_resources_not_used_overlay(self) -> np.ndarray:
+    '''
+    return: np.ndarray 物理ネットワークの隣接行列からオーバーレイネットワークで使用しているリンクを取り除いた隣接行列
+    '''
+    substrate_topo_not_used_slice = np.array(self.substrate_adj_matrix)
+
+    overlay_nodes = self.node_list_mapping_to_substrate[:len(self.adj_matrix)]
+    overlay_index = np.ix_(overlay_nodes, overlay_nodes)
 
-    overlay_node_num = len(self.adj_matrix)
-    for i in range(overlay_node_num):
-      for j in range(overlay_node_num):
-        if self.substrate_adj_matrix[self.node_list_mapping_to_substrate[i]][self.node_list_mapping_to_substrate[j]] == 1:
-          substrate_topo_not_used_slice[self.node_list_mapping_to_substrate[i]][self.node_list_mapping_to_substrate[j]] = 0
+    overlay_links = substrate_topo_not_used_slice[overlay_index]
+    overlay_links[overlay_links == 1] = 0
+    substrate_topo_not_used_slice[overlay_index] = overlay_links
   
     return substrate_topo_not_used_slice
   
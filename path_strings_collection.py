@@ -2,6 +2,7 @@ from constants import DIRECTORY_NAME, SLICE_NODE_NUM, NUM_OF_SLICES
 
 substrate_topo_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/substrate_topo.txt'
 substrate_backup_topo_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/backup_topo'
+substrate_distance_cache_dir = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/cache'
 extract_topo_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/logs/extract_topo.txt'
 searchable_topo_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/logs/searchable_topo.txt'
 mrc_subject_topo_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/logs/slice.txt'
@@ -18,6 +19,15 @@ isolate_nodes_set_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME +
 slice_result_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/results/slice_result.txt'
 substrate_result_file = '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/results/sub_nw_slice_result.txt'
 
+def slice_mrc_result_file(slice):
+    return 'npz/slice' + str(slice) + '_mrc_result.npz'
+
+def slice_mrc_result_yaml_file(slice):
+    return 'yaml/slice' + str(slice) + '_mrc_result.yaml'
+
+def slice_mrc_failure_file(slice):
+    return 'yaml/slice' + str(slice) + '_mrc_failure.yaml'
+
 def slice_path_per_node_failure_log_file(slice, failure_node):
     return '/home/misugi/Documents/slice_mrc/' + DIRECTORY_NAME + '/logs/' + str(SLICE_NODE_NUM) + 'nodes/path/slice' + str(slice) + '_node' + str(failure_node) + '_failure_path.txt'
 
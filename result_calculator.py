@@ -1,52 +1,76 @@
 from typing import List
-import sys
+import numpy as np
 import yaml
 
-from constants import BACKUP_CONF_NUM, RESTRICT_WEIGHT
-from scipy.sparse import csr_matrix
+from constants import RESTRICT_WEIGHT
 from scipy.sparse.csgraph import dijkstra
+from adjacency_matrix import to_csr
+from shortest_paths import batched_dijkstra, extract_paths, remove_backup_configuration_weights
+from substrate_distance_oracle import SubstrateDistanceOracle
 import my_module
+import slice_result_store
+import slice_profiler
 import path_strings_collection as path_str
 
 class ResultCalculator(object):
-  def __init__(self) -> None:
-    pass
+  def __init__(self, substrate_distance_oracle: SubstrateDistanceOracle = None, dijkstra_from_slice_nodes: bool = False) -> None:
+    '''
+    :params substrate_distance_oracle SubstrateDistanceOracle: 計算済みの物理ネットワークの最短経路（省略した場合は最初に必要になった時に一度だけ計算する）
+    :params dijkstra_from_slice_nodes bool: Trueの場合，全ノード間ではなくスライスのノードを始点とする最短経路だけを，全ての構成についてまとめて求める
+    '''
+    self.substrate_distance_oracle = substrate_distance_oracle
+    self.dijkstra_from_slice_nodes = dijkstra_from_slice_nodes
+    # dijkstra_from_slice_nodes で物理ネットワークの経路を求めるための隣接行列（最初に必要になった時に読み込む）
+    self._substrate_adj_matrix = None
 
-  def _calculate_backup_hops_per_conf(self, backup_adj_matrix: List[int], node_list: List[int]) -> List[int]:
+  def _calculate_backup_hops_per_conf(self, backup_adj_matrix: List[int], node_list: List[int]) -> np.ndarray:
     '''
     与えらえたバックアップ構成に対してホップ数の計算を行う
 
     引数として渡すリストに格納されたノードの組み合わせに対して，指定したバックアップルーティング構成における経路を計算する
     :params backup_adj_martix: List[int] バックアップルーティング構成の隣接行列
     :params node_list: List[int] 経路を計算したいノードのリスト（オーバーレイトポロジーのノード番号を指定），
-    :return hop_num_list: List[int] 任意のノード間のホップ数（生データ）が格納されたリスト
+    :return hop_num_list: np.ndarray 任意のノード間のホップ数（生データ）が格納された配列
+    '''
+    return self.calculate_backup_hops([backup_adj_matrix], node_list)[0]
+
+
+  def calculate_backup_hops(self, backup_configurations: List[List[int]], node_list: List[int]) -> np.ndarray:
+    '''
+    全てのバックアップ構成に対して，指定したノード間のホップ数をまとめて計算する
+
+    :params backup_configurations: List[List[int]] バックアップ構成の隣接行列（全ての構成を格納したリスト）
+    :params node_list: List[int] 経路を計算したいノードのリスト（オーバーレイトポロジーのノード番号を指定）
+    :return hop_num_matrix: np.ndarray [構成番号, ノードペアの番号] のホップ数．ノードペアは昇順に並べたノードの (0, 1), (0, 2), ..., (1, 2), ... の順
     '''
     # ホップ数を計測するノードを昇順に並び替える
-    node_list.sort()
-    # バックアップルーティング構成の距離行列を取得
-    backup_adj_matrix = csr_matrix(backup_adj_matrix)
-    dist_matrix = dijkstra(csgraph=backup_adj_matrix, directed=False)
-
-    # それぞれのノードの組み合わせに対するホップ数を取得し，リストに格納
-    hop_num_list = []
-    for src_node in node_list:
-      src_node_index = node_list.index(src_node)
-      for dst_node in node_list[src_node_index + 1 :]:
-        hop_num = self._remove_backup_configuration_weight(dist_matrix[src_node][dst_node])
-        hop_num_list.append(hop_num)
-    
-    return hop_num_list
+    node_list = np.sort(np.asarray(node_list, dtype=int))
+    src_nodes, dst_nodes = self._get_node_pairs(node_list)
+
+    if self.dijkstra_from_slice_nodes:
+      # 全ての構成について，ノードペアの送信元（node_list の i 番目）を始点とする距離だけをまとめて求める
+      src_index, _ = np.triu_indices(len(node_list), 1)
+      dist_matrices = batched_dijkstra(backup_configurations, node_list)
+      return remove_backup_configuration_weights(dist_matrices[:, src_index, dst_nodes])
+
+    hop_num_matrix = np.empty((len(backup_configurations), len(src_nodes)), dtype=int)
+    for conf_i, backup_adj_matrix in enumerate(backup_configurations):
+      # バックアップルーティング構成の距離行列を取得
+      with slice_profiler.timed('dijkstra'):
+        dist_matrix = dijkstra(csgraph=to_csr(backup_adj_matrix), directed=False)
+      hop_num_matrix[conf_i] = remove_backup_configuration_weights(dist_matrix[src_nodes, dst_nodes])
+
+    return hop_num_matrix
   
 
   def output_hop_count_yaml(self, slice_count: int, backup_configurations: List[int]) -> None:
     '''
-    経路のホップ数を取得して, yaml出力する
+    経路のホップ数を取得して, スライスの結果に追加する
 
     :params slice_count: int ホップ数を取得したいスライスの番号
     :params backup_configurations: List[int] バックアップ構成の隣接行列（全ての構成を格納したリスト）
     '''
-    with open('yaml/slice' + str(slice_count) + '_mrc_result.yaml', encoding='utf-8') as f:
-      data = yaml.safe_load(f)
+    data = slice_result_store.load_slice_result(slice_count)
     
     slice_nodes = data['slice_nodes']
     biconnected_graph_nodes = data['biconnected_graph_nodes']
@@ -56,20 +80,9 @@ class ResultCalculator(object):
       if biconnected_graph_nodes[i] in slice_nodes:
         slice_node_index.append(i)
 
-    hop_num_data = []
-    for i in range(BACKUP_CONF_NUM):
-      hop_num_per_conf = self._calculate_backup_hops_per_conf(backup_configurations[i], slice_node_index)
-      hop_num_data.extend(hop_num_per_conf)
+    hop_num_data = self.calculate_backup_hops(backup_configurations, slice_node_index)
     
-    # yaml出力用にint型に変換（numpy配列のデータはそのまま出力するとバグるので）
-    hop_num_int_data = []
-    for i in hop_num_data:
-      hop_num_int_data.append(int(i))
-
-    add_yaml_data = {'hop_num_raw_data': hop_num_int_data}
-
-    with open('yaml/slice' + str(slice_count) + '_mrc_result.yaml', 'a') as f:
-      yaml.dump(add_yaml_data, f, default_flow_style=False, allow_unicode=True)
+    slice_result_store.add_hop_num_raw_data(slice_count, hop_num_data.ravel().tolist())
 
   
 
@@ -83,8 +96,7 @@ class ResultCalculator(object):
     :return backup_path_list: List[Dict[int]] 全てのバックアップルーティング構成におけるスライスの経路
     リストの要素数 = バックアップ構成数で，各要素は経路上のノード番号を，送信元/宛先ノードの組み合わせ（タプル）をキーとした辞書型で格納
     '''
-    with open('yaml/slice' + str(slice_count) + '_mrc_result.yaml', encoding='utf-8') as f:
-      data = yaml.safe_load(f)
+    data = slice_result_store.load_slice_result(slice_count)
     
     slice_nodes = data['slice_nodes']
     slice_nodes.sort()
@@ -110,29 +122,41 @@ class ResultCalculator(object):
         data = yaml.safe_load(f)
 
 
-    backup_path_list = [[] for _ in range(BACKUP_CONF_NUM)]
-
-    for conf_i in range(BACKUP_CONF_NUM):
-      backup_adj_matrix = data['backup_configurations'][conf_i]
-
-      backup_adj_matrix = csr_matrix(backup_adj_matrix)
-      dist_matrix, predecessors = dijkstra(csgraph=backup_adj_matrix, directed=False, return_predecessors=True)
-
-      for src_node in slice_nodes:
-        src_node_index = slice_nodes.index(src_node)
-        for dst_node in slice_nodes[src_node_index + 1 :]:
-          # バックアップルーティング構成の距離行列から2点間の値を取得し，重みを取り除く → ホップ数
-          hop_num_with_weight = dist_matrix[src_node][dst_node]
-          hop_num = self._remove_backup_configuration_weight(hop_num_with_weight)
-
-          tmp_path_list = self._get_path_list(src_node, dst_node, int(hop_num), predecessors)
-
-          # 経路のリストには物理ネットワークのノード番号を格納する
-          if is_overlay_mrc:
-            tmp_path_list = self._to_substrate_index(tmp_path_list, biconnected_graph_nodes)
-            backup_path_list[conf_i].append({(biconnected_graph_nodes[src_node], biconnected_graph_nodes[dst_node]): tmp_path_list})
-          else:
-            backup_path_list[conf_i].append({(src_node, dst_node): tmp_path_list})
+    # バックアップ構成数はスライスごとに異なる場合がある
+    backup_conf_num = len(data['backup_configurations'])
+    backup_path_list = [[] for _ in range(backup_conf_num)]
+
+    src_nodes, dst_nodes = self._get_node_pairs(slice_nodes)
+    src_rows = None
+    if self.dijkstra_from_slice_nodes:
+      # 全ての構成について，スライスのノードを始点とする最短経路だけをまとめて求める
+      src_rows, _ = np.triu_indices(len(slice_nodes), 1)
+      dist_matrices, predecessors_matrices = batched_dijkstra(data['backup_configurations'], slice_nodes, return_predecessors=True)
+
+    for conf_i in range(backup_conf_num):
+      if self.dijkstra_from_slice_nodes:
+        pair_dists = dist_matrices[conf_i][src_rows, dst_nodes]
+        predecessors = predecessors_matrices[conf_i]
+      else:
+        backup_adj_matrix = data['backup_configurations'][conf_i]
+
+        backup_adj_matrix = to_csr(backup_adj_matrix)
+        with slice_profiler.timed('dijkstra'):
+          dist_matrix, predecessors = dijkstra(csgraph=backup_adj_matrix, directed=False, return_predecessors=True)
+        pair_dists = dist_matrix[src_nodes, dst_nodes]
+
+      # 制限リンクを3本以上経由する（分離リンクを経由する）経路がないことを確認する
+      if np.any(pair_dists >= 3 * RESTRICT_WEIGHT):
+        raise ValueError('バックアップ構成 ' + str(conf_i) + ' の経路に不具合があります')
+
+      path_lists = self._get_path_lists(src_nodes, dst_nodes, predecessors, src_rows)
+      for src_node, dst_node, tmp_path_list in zip(src_nodes.tolist(), dst_nodes.tolist(), path_lists):
+        # 経路のリストには物理ネットワークのノード番号を格納する
+        if is_overlay_mrc:
+          tmp_path_list = self._to_substrate_index(tmp_path_list, biconnected_graph_nodes)
+          backup_path_list[conf_i].append({(biconnected_graph_nodes[src_node], biconnected_graph_nodes[dst_node]): tmp_path_list})
+        else:
+          backup_path_list[conf_i].append({(src_node, dst_node): tmp_path_list})
 
     return backup_path_list
 
@@ -146,49 +170,48 @@ class ResultCalculator(object):
     :params slice_count: int 経路を取得したスライスの番号
     :return shortest_path_list: List[int] 物理ネットワークでの最短経路上のノード番号
     '''
-    substrate_adj_matrix = my_module.from_file_to_adj_matrix(path_str.substrate_topo_file)
-    with open('yaml/slice' + str(slice_count) + '_mrc_result.yaml', encoding='utf-8') as f:
-      data = yaml.safe_load(f)
+    if self.substrate_distance_oracle is None and not self.dijkstra_from_slice_nodes:
+      self.substrate_distance_oracle = SubstrateDistanceOracle.from_file(path_str.substrate_topo_file)
+
+    data = slice_result_store.load_slice_result(slice_count)
     
     slice_nodes = data['slice_nodes']
     slice_nodes.sort()
 
     shortest_path_list = []
 
-    substrate_adj_matrix = csr_matrix(substrate_adj_matrix)
-    dist_matrix, predecessors = dijkstra(csgraph=substrate_adj_matrix, directed=False, return_predecessors=True)
+    src_nodes, dst_nodes = self._get_node_pairs(slice_nodes)
+    if self.substrate_distance_oracle is not None:
+      predecessors = self.substrate_distance_oracle.predecessors
+      src_rows = None
+    else:
+      # 全ノード間の最短経路を求めずに，スライスのノードを始点とする最短経路だけを求める
+      if self._substrate_adj_matrix is None:
+        self._substrate_adj_matrix = my_module.load_adj_matrix(path_str.substrate_topo_file)
+      _, predecessors_matrices = batched_dijkstra([self._substrate_adj_matrix], slice_nodes, return_predecessors=True)
+      predecessors = predecessors_matrices[0]
+      src_rows, _ = np.triu_indices(len(slice_nodes), 1)
 
-    for src_node in slice_nodes:
-      src_node_index = slice_nodes.index(src_node)
-      for dst_node in slice_nodes[src_node_index + 1 :]:
-        tmp_path_list = self._get_path_list(src_node, dst_node, int(dist_matrix[src_node][dst_node]), predecessors)
-        shortest_path_list.append({(src_node, dst_node): tmp_path_list})
+    path_lists = self._get_path_lists(src_nodes, dst_nodes, predecessors, src_rows)
+    for src_node, dst_node, tmp_path_list in zip(src_nodes.tolist(), dst_nodes.tolist(), path_lists):
+      shortest_path_list.append({(src_node, dst_node): tmp_path_list})
 
     return shortest_path_list
 
-  def _get_path_list(self, src_node: int, dst_node: int, hop_num: int, predecessors: List[int]):
+  def _get_path_lists(self, src_nodes: List[int], dst_nodes: List[int], predecessors: np.ndarray, src_rows: List[int] = None) -> List[List[int]]:
     '''
-    経路上のノードをリストに格納する
+    全てのノードペアについて，経路上のノードをまとめてリストに格納する
 
-    :params src_node: int 取得したい経路の送信元ノードの番号
-    :params dst_node: int 取得したい経路の宛先ノードの番号
-    :params hop_num: int 経路のホップ数
-    :params predecessor: List[int] 各ノードペアに対する最短経路のラストホップノードの番号が格納されたリスト
+    :params src_nodes: List[int] 取得したい経路の送信元ノードの番号
+    :params dst_nodes: List[int] 取得したい経路の宛先ノードの番号
+    :params predecessors: np.ndarray 最短経路のラストホップノードの番号が格納された行列
+    :params src_rows: List[int] 送信元に対応する predecessors の行番号（省略した場合は送信元のノード番号）
+    :return path_lists: List[List[int]] ノードペアごとの経路（送信元から宛先の順）
     '''
-    tmp_path_list = []
-    tmp_dst = dst_node
+    offsets, path_nodes = extract_paths(predecessors, src_nodes, dst_nodes, src_rows)
+    path_nodes = path_nodes.tolist()
 
-    # 経路上のノードをリストに格納(逆順に格納される)
-    for _ in range(hop_num):
-      tmp_path_list.append(tmp_dst)
-      tmp_dst = predecessors[src_node][tmp_dst]
-    
-    # 最後に送信元をappendして，
-    # 順番を入れ替えることで経路のノード番号を取得
-    tmp_path_list.append(src_node)
-    tmp_path_list.reverse()
-
-    return tmp_path_list
+    return [path_nodes[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
   
 
   def _to_substrate_index(self, nodes_index_in_overlay, biconnected_graph_nodes):
@@ -201,16 +224,10 @@ class ResultCalculator(object):
     return substrate_index_list
   
 
-  def _remove_backup_configuration_weight(self, hop_number: int) -> int:
+  def _get_node_pairs(self, node_list: List[int]):
     '''
-    ホップ数を計算するために，制限リンクにかけている重みを取り除く
+    リストの順番で i < j となる全てのノードペア (node_list[i], node_list[j]) を，送信元と宛先の配列で返す
     '''
-    if hop_number >= 3 * RESTRICT_WEIGHT:
-      print('バックアップ構成の経路に不具合があります')
-      sys.exit()
-    elif hop_number >= 2 * RESTRICT_WEIGHT:
-      hop_number = hop_number - 2 * RESTRICT_WEIGHT + 2
-    elif hop_number >= RESTRICT_WEIGHT:
-      hop_number = hop_number - RESTRICT_WEIGHT + 1
-    
-    return hop_number
+    node_list = np.asarray(node_list, dtype=int)
+    src_index, dst_index = np.triu_indices(len(node_list), 1)
+    return node_list[src_index], node_list[dst_index]
@@ -0,0 +1,120 @@
+from typing import List
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from constants import RESTRICT_WEIGHT, ISOLATE_WEIGHT
+from adjacency_matrix import to_csr
+import slice_profiler
+
+
+def batched_dijkstra(adj_matrices: List[List[int]], indices: List[int], return_predecessors: bool = False):
+  '''
+  ノード数が同じ複数のグラフに対して，指定したノードを始点とするDijkstra法を実行し，結果を一つの配列にまとめる
+
+  グラフごとに始点だけから探索するため，全ノード間の最短経路を求める場合と違い，
+  計算量と結果の配列の大きさは「グラフ数 × 始点数 × ノード数」に比例する
+  :params adj_matrices List[List[int]]: グラフごとの隣接行列（CSR形式でもよい）
+  :params indices List[int]: 始点のノード番号（全てのグラフで共通）
+  :params return_predecessors bool: Trueの場合は最終ホップのノード番号も返す
+  :return dist_matrices np.ndarray: [グラフの番号, 始点の番号, ノード番号] の距離
+  :return predecessors np.ndarray: [グラフの番号, 始点の番号, ノード番号] の最終ホップのノード番号（到達できない場合は -9999）
+  '''
+  indices = np.asarray(indices, dtype=int)
+  results = []
+  for adj_matrix in adj_matrices:
+    csr_matrix = to_csr(adj_matrix)
+    with slice_profiler.timed('dijkstra'):
+      results.append(dijkstra(csgraph=csr_matrix, directed=False, indices=indices, return_predecessors=return_predecessors))
+
+  if not return_predecessors:
+    return np.stack(results)
+
+  dist_matrices = np.stack([dist_matrix for dist_matrix, _ in results])
+  predecessors = np.stack([predecessors for _, predecessors in results])
+
+  return dist_matrices, predecessors
+
+
+def to_hop_matrix(dist_matrix: np.ndarray) -> np.ndarray:
+  '''
+  Dijkstra法の距離を int 型のホップ数に変換する
+
+  inf をそのまま int 型に変換した値は環境によって異なるため，到達できないノード間は明示的に -1 にする
+  :return hop_matrix np.ndarray: ホップ数（到達できない場合は -1）
+  '''
+  return np.where(np.isinf(dist_matrix), -1, dist_matrix).astype(int)
+
+
+def remove_backup_configuration_weights(dist_matrix: np.ndarray) -> np.ndarray:
+  '''
+  バックアップ構成の距離から，制限リンクと分離リンクの重みを取り除いたホップ数を求める
+
+  距離は「通常リンク数 + 制限リンク数 × RESTRICT_WEIGHT + 分離リンク数 × ISOLATE_WEIGHT」なので，それぞれの数に分解して足す
+  :return hop_nums np.ndarray: ホップ数（到達できない場合は -1）
+  '''
+  dist_matrix = np.asarray(dist_matrix)
+  is_reachable = np.isfinite(dist_matrix)
+  weights = np.where(is_reachable, dist_matrix, 0).astype(np.int64)
+
+  hop_nums = weights // ISOLATE_WEIGHT + (weights % ISOLATE_WEIGHT) // RESTRICT_WEIGHT + weights % RESTRICT_WEIGHT
+  hop_nums[~is_reachable] = -1
+
+  return hop_nums
+
+
+# scipy の predecessors で，最終ホップのノードが存在しないことを表す値
+NO_PREDECESSOR = -9999
+
+
+def extract_paths(predecessors: np.ndarray, src_nodes: List[int], dst_nodes: List[int], src_rows: List[int] = None):
+  '''
+  最終ホップのノード番号の行列から，指定した全ての (src, dst) の経路をまとめて復元する
+
+  全てのペアについて宛先から送信元へ一ホップずつ同時に辿るため，ホップ数を事前に求めておく必要はない
+  途中で -9999（最終ホップなし）に達したペアは到達できないものとして，長さ0の経路を返す
+  :params predecessors np.ndarray: [始点, ノード番号] の最終ホップのノード番号
+  :params src_nodes List[int]: 経路の送信元のノード番号
+  :params dst_nodes List[int]: 経路の宛先のノード番号
+  :params src_rows List[int]: 送信元に対応する predecessors の行番号（省略した場合は送信元のノード番号）
+  :return (offsets, nodes) Tuple[np.ndarray, np.ndarray]: i 番目の経路は nodes[offsets[i]:offsets[i + 1]]（送信元から宛先の順）
+  '''
+  predecessors = np.asarray(predecessors)
+  src_nodes = np.asarray(src_nodes, dtype=int)
+  dst_nodes = np.asarray(dst_nodes, dtype=int)
+  src_rows = src_nodes if src_rows is None else np.asarray(src_rows, dtype=int)
+  pair_num = len(src_nodes)
+
+  # hop_nodes[k][i] -> i 番目の経路で宛先から k ホップ戻ったノード
+  hop_nodes = [dst_nodes]
+  lengths = np.ones(pair_num, dtype=int)
+  current_nodes = dst_nodes
+  is_searching = current_nodes != src_nodes
+  # 経路はノード数より長くならないため，predecessors が壊れていても無限ループしない
+  for _ in range(predecessors.shape[-1]):
+    if not is_searching.any():
+      break
+
+    previous_nodes = np.full(pair_num, NO_PREDECESSOR, dtype=int)
+    previous_nodes[is_searching] = predecessors[src_rows[is_searching], current_nodes[is_searching]]
+
+    is_unreachable = is_searching & (previous_nodes == NO_PREDECESSOR)
+    lengths[is_unreachable] = 0
+    is_searching &= ~is_unreachable
+
+    lengths[is_searching] += 1
+    hop_nodes.append(previous_nodes)
+    current_nodes = np.where(is_searching, previous_nodes, current_nodes)
+    is_searching &= previous_nodes != src_nodes
+  else:
+    lengths[is_searching] = 0
+
+  offsets = np.zeros(pair_num + 1, dtype=int)
+  np.cumsum(lengths, out=offsets[1:])
+
+  # 宛先から辿った順番に並んでいるので，経路ごとに逆順にして詰める
+  hop_nodes = np.array(hop_nodes)
+  hop_index, pair_index = np.nonzero(np.arange(len(hop_nodes))[:, None] < lengths[None, :])
+  nodes = np.empty(offsets[-1], dtype=int)
+  nodes[offsets[pair_index] + lengths[pair_index] - 1 - hop_index] = hop_nodes[hop_index, pair_index]
+
+  return offsets, nodes
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import Future, TimeoutError
+
+from constants import SLICE_TIME_BUDGET_SECONDS, MAX_MRC_RETRY_NUM
+
+
+class SliceBuildFailed(ValueError):
+  '''
+  スライスに対してMRCを実行できないことが分かった時に送出する例外
+
+  reason にMRCを実行できなかった理由を持つ
+  '''
+
+  def __init__(self, reason: str) -> None:
+    super().__init__(reason)
+    self.reason = reason
+
+
+class SliceBudget(object):
+  '''
+  一つのスライスに使える処理時間とMRCのやり直し回数
+
+  時間は処理の区切り（二重連結化のループ，MRCの始点ごと）で確認するため，一回のMRCの実行を途中で止めることはない
+  ただし，MRCの始点を別プロセスで探索する場合は，結果を待つ時間を残りの時間までに制限する
+  '''
+
+  def __init__(self, time_budget_seconds: float = SLICE_TIME_BUDGET_SECONDS, max_retry_num: int = MAX_MRC_RETRY_NUM) -> None:
+    '''
+    :params time_budget_seconds float: 処理時間の上限（秒），None の場合は制限しない
+    :params max_retry_num int: MRCに失敗した後にオーバーレイネットワークを広げてやり直す回数の上限，None の場合は制限しない
+    '''
+    self.time_budget_seconds = time_budget_seconds
+    self.deadline = None if time_budget_seconds is None else time.perf_counter() + time_budget_seconds
+    self.max_retry_num = max_retry_num
+    self.retry_num = 0
+
+  def is_time_exhausted(self) -> bool:
+    return self.deadline is not None and time.perf_counter() > self.deadline
+
+  def check_time(self) -> None:
+    '''
+    処理時間の上限を超えていれば SliceBuildFailed を送出する
+    '''
+    if self.is_time_exhausted():
+      raise self._time_exhausted()
+
+  def wait(self, future: Future):
+    '''
+    処理時間の残りだけ別プロセスの処理の結果を待ち，時間内に終わらなければ SliceBuildFailed を送出する
+    '''
+    if self.deadline is None:
+      return future.result()
+    try:
+      return future.result(timeout=max(self.deadline - time.perf_counter(), 0.0))
+    except TimeoutError:
+      raise self._time_exhausted() from None
+
+  def _time_exhausted(self) -> SliceBuildFailed:
+    return SliceBuildFailed('time budget of ' + str(self.time_budget_seconds) + ' seconds exhausted')
+
+  def consume_retry(self) -> None:
+    '''
+    MRCのやり直しを一回数え，上限を超えていれば SliceBuildFailed を送出する
+    '''
+    self.retry_num += 1
+    if self.max_retry_num is not None and self.retry_num > self.max_retry_num:
+      raise SliceBuildFailed('MRC retry budget of ' + str(self.max_retry_num) + ' exhausted')
+    self.check_time()
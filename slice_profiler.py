@@ -0,0 +1,99 @@
+from typing import Dict
+from contextlib import contextmanager
+import time
+
+
+class SliceProfiler(object):
+  '''
+  一つのスライスの処理で，計測対象の処理を呼び出した回数と合計時間（秒）を集計する
+
+  計測対象の名前:
+  dijkstra: 最短経路の計算（グラフごと），dfs: 関節点やブロックカット木を求めるDFS，apply_mrc: MRCの実行，mrc_start_point: MRCを試した始点の数，
+  mrc_retry: MRCに失敗した後の再接続と二重連結化，reconnect: reconnect=True での再接続，
+  isolate_rejection: ノードを分離できなかった構成の数，
+  generate_overlay_network, connect_overlay_topology, create_biconnect_graph, mrc_search: build_slice の段階ごとの処理
+  （mrc_retry 内の再接続と二重連結化も含む）
+  '''
+
+  def __init__(self) -> None:
+    self.counts = {}
+    self.seconds = {}
+
+  def count(self, name: str, num: int = 1) -> None:
+    self.counts[name] = self.counts.get(name, 0) + num
+
+  def add_seconds(self, name: str, seconds: float) -> None:
+    self.counts[name] = self.counts.get(name, 0) + 1
+    self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+  def to_dict(self) -> Dict[str, Dict]:
+    '''
+    :return profile Dict[str, Dict]: 名前 -> {'count': 呼び出し回数, 'seconds': 合計時間（回数だけを数える処理は0）}
+    '''
+    return {name: {'count': self.counts[name], 'seconds': self.seconds.get(name, 0.0)} for name in sorted(self.counts)}
+
+
+# 集計中のプロファイラ（None の場合，count と timed は何もしない）
+_active_profiler = None
+
+
+class _NullTimer(object):
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    return False
+
+
+class _Timer(object):
+  def __init__(self, profiler: SliceProfiler, name: str) -> None:
+    self.profiler = profiler
+    self.name = name
+
+  def __enter__(self):
+    self.start = time.perf_counter()
+    return self
+
+  def __exit__(self, *exc_info):
+    self.profiler.add_seconds(self.name, time.perf_counter() - self.start)
+    return False
+
+
+# 計測しない場合は，毎回インスタンスを作らずに同じものを返す
+_NULL_TIMER = _NullTimer()
+
+
+@contextmanager
+def profile_slice():
+  '''
+  with ブロック内の処理を集計する
+
+  with profile_slice() as profiler:
+    ...
+  profiler.to_dict()
+  '''
+  global _active_profiler
+
+  previous_profiler = _active_profiler
+  _active_profiler = SliceProfiler()
+  try:
+    yield _active_profiler
+  finally:
+    _active_profiler = previous_profiler
+
+
+def count(name: str, num: int = 1) -> None:
+  '''
+  集計中であれば，指定した処理の回数を数える
+  '''
+  if _active_profiler is not None:
+    _active_profiler.count(name, num)
+
+
+def timed(name: str):
+  '''
+  集計中であれば，with ブロックの回数と処理時間を計測する
+  '''
+  if _active_profiler is None:
+    return _NULL_TIMER
+  return _Timer(_active_profiler, name)
@@ -0,0 +1,207 @@
+import os
+import tempfile
+from typing import Dict, List
+import numpy as np
+import yaml
+
+from constants import OUTPUT_RESULT_YAML
+from sparse_backup_configurations import SparseBackupConfigurations
+import path_strings_collection as path_str
+
+
+def save_slice_result(slice_count: int, slice_backup_configuration_data: Dict, output_yaml: bool = OUTPUT_RESULT_YAML) -> None:
+  '''
+  スライスのMRCの結果を .npz ファイルに保存する
+
+  バックアップ構成は隣接行列ではなく，リンクのリストと構成ごとのリンクの種類（SparseBackupConfigurations）として保存する
+  :params slice_count int: スライスの番号
+  :params slice_backup_configuration_data Dict: slice_nodes, biconnected_graph_nodes, backup_configurations, isolated_nodes を持つ辞書
+  backup_configurations は SparseBackupConfigurations か，隣接行列のリスト（hop_num_raw_data と profile は任意）
+  :params output_yaml bool: Trueの場合，確認用に同じ内容をyamlファイルにも出力する
+  '''
+  backup_configurations = slice_backup_configuration_data['backup_configurations']
+  if not isinstance(backup_configurations, SparseBackupConfigurations):
+    backup_configurations = SparseBackupConfigurations.from_adj_matrices(backup_configurations)
+
+  isolated_nodes_offsets, isolated_nodes = _to_offsets_and_nodes(slice_backup_configuration_data['isolated_nodes'])
+  arrays = {
+    'slice_nodes': np.asarray(slice_backup_configuration_data['slice_nodes'], dtype=np.int32),
+    'biconnected_graph_nodes': np.asarray(slice_backup_configuration_data['biconnected_graph_nodes'], dtype=np.int32),
+    'node_num': backup_configurations.node_num,
+    'edges': backup_configurations.edges,
+    'weight_classes': backup_configurations.weight_classes,
+    'isolated_nodes_offsets': isolated_nodes_offsets,
+    'isolated_nodes': isolated_nodes
+  }
+  if 'hop_num_raw_data' in slice_backup_configuration_data:
+    arrays['hop_num_raw_data'] = np.asarray(slice_backup_configuration_data['hop_num_raw_data'], dtype=np.int32)
+  if 'profile' in slice_backup_configuration_data:
+    arrays.update(_to_profile_arrays(slice_backup_configuration_data['profile']))
+
+  _savez_atomically(path_str.slice_mrc_result_file(slice_count), arrays)
+  # 以前の実行で同じスライスが失敗していた場合の記録は残さない
+  _remove_if_exists(path_str.slice_mrc_failure_file(slice_count))
+
+  if output_yaml:
+    export_slice_result_yaml(slice_count, load_slice_result(slice_count))
+
+
+def load_slice_result(slice_count: int) -> Dict:
+  '''
+  スライスのMRCの結果を読み込む
+
+  .npz ファイルがない場合は，以前の実行で出力したyamlファイルから読み込む
+  :params slice_count int: スライスの番号
+  :return slice_backup_configuration_data Dict: ノード番号はリスト，バックアップ構成は SparseBackupConfigurations
+  （yamlファイルから読み込んだ場合は隣接行列のリスト）
+  '''
+  result_file = path_str.slice_mrc_result_file(slice_count)
+  if not os.path.exists(result_file):
+    with open(path_str.slice_mrc_result_yaml_file(slice_count), encoding='utf-8') as f:
+      return yaml.safe_load(f)
+
+  with np.load(result_file) as data:
+    slice_backup_configuration_data = {
+      'slice_nodes': data['slice_nodes'].tolist(),
+      'biconnected_graph_nodes': data['biconnected_graph_nodes'].tolist(),
+      'backup_configurations': SparseBackupConfigurations(int(data['node_num']), data['edges'], data['weight_classes']),
+      'isolated_nodes': _to_node_sets(data['isolated_nodes_offsets'], data['isolated_nodes'])
+    }
+    if 'hop_num_raw_data' in data:
+      slice_backup_configuration_data['hop_num_raw_data'] = data['hop_num_raw_data'].tolist()
+    if 'profile_names' in data:
+      slice_backup_configuration_data['profile'] = _to_profile(data['profile_names'], data['profile_counts'], data['profile_seconds'])
+
+  return slice_backup_configuration_data
+
+
+def save_slice_failure(slice_count: int, slice_failure_data: Dict) -> None:
+  '''
+  MRCを実行できなかったスライスについて，スライスのノードと失敗した理由をyamlファイルに保存する
+
+  以前の実行で保存した同じスライスの結果は，今回の結果と取り違えないように削除する
+  :params slice_count int: スライスの番号
+  :params slice_failure_data Dict: slice_nodes, failure_reason を持つ辞書（profile は任意）
+  '''
+  yaml_data = {
+    'slice_nodes': [int(node) for node in slice_failure_data['slice_nodes']],
+    'failure_reason': slice_failure_data['failure_reason']
+  }
+  if 'profile' in slice_failure_data:
+    yaml_data['profile'] = slice_failure_data['profile']
+
+  failure_file = path_str.slice_mrc_failure_file(slice_count)
+  os.makedirs(os.path.dirname(failure_file) or '.', exist_ok=True)
+  with open(failure_file, 'w') as f:
+    yaml.dump(yaml_data, f, default_flow_style=False, allow_unicode=True)
+
+  _remove_if_exists(path_str.slice_mrc_result_file(slice_count))
+  _remove_if_exists(path_str.slice_mrc_result_yaml_file(slice_count))
+
+
+def load_slice_failure(slice_count: int) -> Dict:
+  '''
+  :return slice_failure_data Dict: MRCを実行できなかったスライスのノードと理由，失敗の記録がない場合は None を返す
+  '''
+  failure_file = path_str.slice_mrc_failure_file(slice_count)
+  if not os.path.exists(failure_file):
+    return None
+
+  with open(failure_file, encoding='utf-8') as f:
+    return yaml.safe_load(f)
+
+
+def add_hop_num_raw_data(slice_count: int, hop_num_raw_data: List[int]) -> None:
+  '''
+  保存済みのスライスの結果にホップ数を追加する
+
+  yamlファイルから読み込む結果の場合は，そのyamlファイルに追記する
+  '''
+  if not os.path.exists(path_str.slice_mrc_result_file(slice_count)):
+    with open(path_str.slice_mrc_result_yaml_file(slice_count), 'a') as f:
+      yaml.dump({'hop_num_raw_data': hop_num_raw_data}, f, default_flow_style=False, allow_unicode=True)
+    return
+
+  slice_backup_configuration_data = load_slice_result(slice_count)
+  slice_backup_configuration_data['hop_num_raw_data'] = hop_num_raw_data
+  save_slice_result(slice_count, slice_backup_configuration_data,
+                    output_yaml=os.path.exists(path_str.slice_mrc_result_yaml_file(slice_count)))
+
+
+def export_slice_result_yaml(slice_count: int, slice_backup_configuration_data: Dict) -> None:
+  '''
+  スライスの結果を確認用のyamlファイルに出力する
+  '''
+  backup_configurations = slice_backup_configuration_data['backup_configurations']
+  if isinstance(backup_configurations, SparseBackupConfigurations):
+    backup_configurations = [backup_configurations.to_adj_matrix(conf_i) for conf_i in range(len(backup_configurations))]
+
+  yaml_data = {
+    'slice_nodes': [int(node) for node in slice_backup_configuration_data['slice_nodes']],
+    'biconnected_graph_nodes': [int(node) for node in slice_backup_configuration_data['biconnected_graph_nodes']],
+    'backup_configurations': [np.asarray(adj_matrix).tolist() for adj_matrix in backup_configurations],
+    'isolated_nodes': [set(int(node) for node in nodes) for nodes in slice_backup_configuration_data['isolated_nodes']]
+  }
+  if 'hop_num_raw_data' in slice_backup_configuration_data:
+    yaml_data['hop_num_raw_data'] = [int(hop_num) for hop_num in slice_backup_configuration_data['hop_num_raw_data']]
+  if 'profile' in slice_backup_configuration_data:
+    yaml_data['profile'] = slice_backup_configuration_data['profile']
+
+  yaml_file = path_str.slice_mrc_result_yaml_file(slice_count)
+  os.makedirs(os.path.dirname(yaml_file) or '.', exist_ok=True)
+  with open(yaml_file, 'w') as f:
+    yaml.dump(yaml_data, f, default_flow_style=False, allow_unicode=True)
+
+
+def _to_offsets_and_nodes(node_sets: List[set]):
+  '''
+  構成ごとのノードの集合を，区切り位置とノード番号を並べた配列に変換する（i 番目の集合は nodes[offsets[i]:offsets[i + 1]]）
+  '''
+  node_lists = [sorted(int(node) for node in nodes) for nodes in node_sets]
+  offsets = np.zeros(len(node_lists) + 1, dtype=np.int32)
+  np.cumsum([len(nodes) for nodes in node_lists], out=offsets[1:])
+  nodes = np.array([node for node_list in node_lists for node in node_list], dtype=np.int32)
+
+  return offsets, nodes
+
+
+def _to_node_sets(offsets: np.ndarray, nodes: np.ndarray) -> List[set]:
+  nodes = nodes.tolist()
+  return [set(nodes[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+
+
+def _to_profile_arrays(profile: Dict[str, Dict]) -> Dict[str, np.ndarray]:
+  '''
+  slice_profiler で集計した結果を，名前，回数，合計時間の配列に変換する
+  '''
+  names = sorted(profile)
+  return {
+    'profile_names': np.array(names, dtype=str),
+    'profile_counts': np.array([profile[name]['count'] for name in names], dtype=np.int64),
+    'profile_seconds': np.array([profile[name]['seconds'] for name in names], dtype=np.float64)
+  }
+
+
+def _to_profile(names: np.ndarray, counts: np.ndarray, seconds: np.ndarray) -> Dict[str, Dict]:
+  return {str(name): {'count': int(count), 'seconds': float(second)} for name, count, second in zip(names, counts, seconds)}
+
+
+def _remove_if_exists(file_name: str) -> None:
+  if os.path.exists(file_name):
+    os.remove(file_name)
+
+
+def _savez_atomically(file_name: str, arrays: Dict[str, np.ndarray]) -> None:
+  '''
+  書き込み途中のファイルを読み込まないように，一時ファイルに保存してから置き換える
+  '''
+  dir_name = os.path.dirname(file_name) or '.'
+  os.makedirs(dir_name, exist_ok=True)
+  fd, tmp_file_name = tempfile.mkstemp(dir=dir_name, suffix='.npz')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      np.savez(f, **arrays)
+    os.replace(tmp_file_name, file_name)
+  except BaseException:
+    os.remove(tmp_file_name)
+    raise
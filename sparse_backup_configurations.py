@@ -0,0 +1,117 @@
+from typing import List
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from constants import RESTRICT_WEIGHT, ISOLATE_WEIGHT
+
+# リンクの種類（weight_classes の値）
+NORMAL_LINK = 0
+RESTRICTED_LINK = 1
+ISOLATED_LINK = 2
+# リンクの種類ごとの重み
+LINK_WEIGHTS = np.array([1, RESTRICT_WEIGHT, ISOLATE_WEIGHT])
+
+
+class SparseBackupConfigurations(object):
+  '''
+  全てのバックアップ構成を，共通のリンクのリストと構成ごとのリンクの種類（1リンクあたり1バイト）で保持する
+
+  バックアップ構成はリンクの重みだけが異なるため，N×N の隣接行列を構成数だけ持つ代わりに
+  リンク数 × 構成数 の配列で表す．CSR形式や隣接行列は必要になった時に作成する
+  '''
+
+  def __init__(self, node_num: int, edges: np.ndarray, weight_classes: np.ndarray) -> None:
+    '''
+    :params node_num int: ノード数
+    :params edges np.ndarray: [リンクの番号, 2] のリンクの両端のノード番号（小さい方が先）
+    :params weight_classes np.ndarray: [構成番号, リンクの番号] のリンクの種類
+    '''
+    self.node_num = int(node_num)
+    self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+    self.weight_classes = np.asarray(weight_classes, dtype=np.uint8)
+    # 構成番号 -> 作成済みのCSR形式の隣接行列
+    self._csr_cache = {}
+
+  @classmethod
+  def from_adj_matrices(cls, adj_matrices: List[List[int]]) -> 'SparseBackupConfigurations':
+    '''
+    バックアップ構成の隣接行列から作成する
+
+    :params adj_matrices List[List[int]]: バックアップ構成の隣接行列（全ての構成を格納したリスト）
+    '''
+    adj_matrices = [np.asarray(adj_matrix) for adj_matrix in adj_matrices]
+    node_num = len(adj_matrices[0])
+
+    # いずれかの構成でリンクがある要素を，全ての構成で共通のリンクとする
+    is_link = np.zeros((node_num, node_num), dtype=bool)
+    for adj_matrix in adj_matrices:
+      is_link |= adj_matrix != 0
+    rows, cols = np.nonzero(np.triu(is_link, 1))
+
+    weight_classes = np.empty((len(adj_matrices), len(rows)), dtype=np.uint8)
+    for conf_i, adj_matrix in enumerate(adj_matrices):
+      link_weights = adj_matrix[rows, cols]
+      is_known_weight = link_weights[:, None] == LINK_WEIGHTS[None, :]
+      if not np.all(is_known_weight.any(axis=1)):
+        raise ValueError('backup configuration ' + str(conf_i) + ' has a link weight other than 1, RESTRICT_WEIGHT or ISOLATE_WEIGHT')
+      weight_classes[conf_i] = is_known_weight.argmax(axis=1)
+
+    return cls(node_num, np.stack([rows, cols], axis=1), weight_classes)
+
+  def __len__(self) -> int:
+    return len(self.weight_classes)
+
+  def __getitem__(self, conf_i: int) -> csr_matrix:
+    return self.to_csr(conf_i)
+
+  def __iter__(self):
+    for conf_i in range(len(self)):
+      yield self.to_csr(conf_i)
+
+  def link_weights(self, conf_i: int) -> np.ndarray:
+    '''
+    :return link_weights np.ndarray: 指定した構成における各リンクの重み
+    '''
+    return LINK_WEIGHTS[self.weight_classes[conf_i]]
+
+  def to_csr(self, conf_i: int) -> csr_matrix:
+    '''
+    指定した構成のCSR形式の隣接行列（作成済みであればキャッシュを返す）
+    '''
+    if conf_i not in self._csr_cache:
+      self._csr_cache[conf_i] = self._to_csr(self.edges, self.link_weights(conf_i))
+
+    return self._csr_cache[conf_i]
+
+  def to_csr_without_links(self, conf_i: int, link_index: List[int]) -> csr_matrix:
+    '''
+    指定したリンク（edges の番号）を取り除いた構成のCSR形式の隣接行列（リンク障害時の構成）
+    '''
+    is_remaining = np.ones(len(self.edges), dtype=bool)
+    is_remaining[np.asarray(link_index, dtype=int)] = False
+
+    return self._to_csr(self.edges[is_remaining], self.link_weights(conf_i)[is_remaining])
+
+  def _to_csr(self, edges: np.ndarray, link_weights: np.ndarray) -> csr_matrix:
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    return csr_matrix((np.concatenate([link_weights, link_weights]), (rows, cols)), shape=(self.node_num, self.node_num))
+
+  def to_adj_matrix(self, conf_i: int) -> np.ndarray:
+    '''
+    指定した構成の隣接行列
+    '''
+    adj_matrix = np.zeros((self.node_num, self.node_num), dtype=int)
+    link_weights = self.link_weights(conf_i)
+    adj_matrix[self.edges[:, 0], self.edges[:, 1]] = link_weights
+    adj_matrix[self.edges[:, 1], self.edges[:, 0]] = link_weights
+
+    return adj_matrix
+
+  def save(self, file_name: str) -> None:
+    np.savez(file_name, node_num=self.node_num, edges=self.edges, weight_classes=self.weight_classes)
+
+  @classmethod
+  def load(cls, file_name: str) -> 'SparseBackupConfigurations':
+    with np.load(file_name) as data:
+      return cls(int(data['node_num']), data['edges'], data['weight_classes'])
@@ -0,0 +1,84 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from adjacency_matrix import AdjacencyMatrix, to_csr
+from shortest_paths import to_hop_matrix
+import my_module
+import slice_profiler
+
+
+class SubstrateDistanceOracle(object):
+  '''
+  物理ネットワークの全ノード間の最短経路（ホップ数と最終ホップのノード番号）
+
+  物理ネットワークは実行中に変わらないため，起動時に一度だけ計算して全てのスライスで使い回す
+  '''
+
+  def __init__(self, substrate_adj_matrix, dist_matrix: np.ndarray = None, predecessors: np.ndarray = None) -> None:
+    '''
+    :params substrate_adj_matrix: 物理ネットワークの隣接行列
+    :params dist_matrix np.ndarray: 計算済みのホップ数（省略した場合はここで計算する）
+    :params predecessors np.ndarray: 計算済みの最終ホップのノード番号
+    '''
+    self.substrate_adj_matrix = substrate_adj_matrix
+
+    if dist_matrix is None or predecessors is None:
+      with slice_profiler.timed('dijkstra'):
+        dist_matrix, predecessors = dijkstra(csgraph=to_csr(substrate_adj_matrix), directed=False, return_predecessors=True)
+      dist_matrix = to_hop_matrix(dist_matrix)
+
+    self.dist_matrix = dist_matrix
+    self.predecessors = predecessors
+    self.node_num = len(dist_matrix)
+
+  def is_for(self, substrate_adj_matrix) -> bool:
+    '''
+    指定した隣接行列に対して計算した結果かどうか
+    '''
+    return substrate_adj_matrix is self.substrate_adj_matrix
+
+  @classmethod
+  def from_file(cls, topo_file: str, cache_dir: str = None) -> 'SubstrateDistanceOracle':
+    '''
+    トポロジーファイルから物理ネットワークを読み込み，最短経路を求める
+
+    cache_dirを指定した場合は，トポロジーファイルのハッシュ値をファイル名にした .npy ファイルに計算結果を保存し，
+    次回以降の実行ではメモリマップで読み込む
+    :params topo_file str: 物理ネットワークの隣接行列のファイル
+    :params cache_dir str: 計算結果を保存するディレクトリ
+    '''
+    substrate_adj_matrix = AdjacencyMatrix(my_module.load_adj_matrix(topo_file), copy=False)
+    if cache_dir is None:
+      return cls(substrate_adj_matrix)
+
+    with open(topo_file, 'rb') as f:
+      topo_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    dist_file = os.path.join(cache_dir, topo_hash + '_dist.npy')
+    predecessors_file = os.path.join(cache_dir, topo_hash + '_predecessors.npy')
+
+    if os.path.exists(dist_file) and os.path.exists(predecessors_file):
+      return cls(substrate_adj_matrix, np.load(dist_file, mmap_mode='r'), np.load(predecessors_file, mmap_mode='r'))
+
+    oracle = cls(substrate_adj_matrix)
+    os.makedirs(cache_dir, exist_ok=True)
+    _save_atomically(dist_file, oracle.dist_matrix)
+    _save_atomically(predecessors_file, oracle.predecessors)
+
+    return oracle
+
+
+def _save_atomically(file_name: str, array: np.ndarray) -> None:
+  '''
+  書き込み途中のファイルを他の実行が読み込まないように，一時ファイルに保存してから置き換える
+  '''
+  fd, tmp_file_name = tempfile.mkstemp(dir=os.path.dirname(file_name), suffix='.npy')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      np.save(f, array)
+    os.replace(tmp_file_name, file_name)
+  except BaseException:
+    os.remove(tmp_file_name)
+    raise
@@ -0,0 +1,31 @@
+from topology_manager import TopologyManager
+
+
+# 0-1-2-3-4-5-0 のリング（一つの構成で一つのノードしか分離できないため，ノード数と同じ6つの構成が必要）
+ring_adj_matrix = [[1 if abs(i - j) in (1, 5) else 0 for j in range(6)] for i in range(6)]
+
+# 3×3 の格子
+# 0-1-2
+# | | |
+# 3-4-5
+# | | |
+# 6-7-8
+grid_adj_matrix = [[0, 1, 0, 1, 0, 0, 0, 0, 0], [1, 0, 1, 0, 1, 0, 0, 0, 0], [0, 1, 0, 0, 0, 1, 0, 0, 0],
+                   [1, 0, 0, 0, 1, 0, 1, 0, 0], [0, 1, 0, 1, 0, 1, 0, 1, 0], [0, 0, 1, 0, 1, 0, 0, 0, 1],
+                   [0, 0, 0, 1, 0, 0, 0, 1, 0], [0, 0, 0, 0, 1, 0, 1, 0, 1], [0, 0, 0, 0, 0, 1, 0, 1, 0]]
+
+
+def apply_ring_mrc():
+  '''
+  リングを6つの構成で分離したMRCの結果（各構成が一つのノードだけを分離する）
+  '''
+  return TopologyManager().apply_mrc(ring_adj_matrix, 'check_mrc/output', backup_conf_num=6)
+
+
+def apply_grid_mrc():
+  '''
+  格子をノード0から4つの構成で分離したMRCの結果
+
+  分離ノードは構成0から順に {0, 2, 8}, {3, 5}, {4, 6}, {1, 7} で，全ての構成が複数のノードを分離する
+  '''
+  return TopologyManager().apply_mrc(grid_adj_matrix, 'check_mrc/output', 0, backup_conf_num=4)
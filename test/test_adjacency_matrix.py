@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from adjacency_matrix import AdjacencyMatrix, to_csr
+
+
+adj_matrix = [[0, 1, 1],
+              [1, 0, 1],
+              [1, 1, 0]]
+
+class AdjacencyMatrixTestCase(unittest.TestCase):
+  def test_accept_list(self):
+    matrix = AdjacencyMatrix(adj_matrix)
+    self.assertEqual(len(matrix), 3)
+    self.assertEqual(matrix[0][1], 1)
+    self.assertEqual(matrix.tolist(), adj_matrix)
+    # scipyにそのまま渡せる
+    self.assertEqual(csr_matrix(matrix).nnz, 6)
+
+  def test_copy_on_write(self):
+    matrix = AdjacencyMatrix(adj_matrix)
+    clone = matrix.copy()
+    # 書き換えるまでは配列を共有する
+    self.assertTrue(np.shares_memory(matrix.array, clone.array))
+
+    clone[0, 1] = 1000
+    self.assertEqual(clone[0][1], 1000)
+    self.assertEqual(matrix[0][1], 1)
+    self.assertFalse(np.shares_memory(matrix.array, clone.array))
+
+  def test_csr_cache(self):
+    matrix = AdjacencyMatrix(adj_matrix)
+    self.assertIs(to_csr(matrix), to_csr(matrix))
+
+    matrix[0, 1] = 0
+    matrix[1, 0] = 0
+    # 書き換えた後は作り直す
+    self.assertEqual(to_csr(matrix).nnz, 4)
+
+  def test_row_is_read_only(self):
+    matrix = AdjacencyMatrix(adj_matrix)
+    with self.assertRaises(ValueError):
+      matrix[0][1] = 0
+
+  def test_borrowed_array(self):
+    array = np.array(adj_matrix)
+    array.flags.writeable = False
+    matrix = AdjacencyMatrix(array, copy=False)
+    matrix[0, 1] = 0
+    self.assertEqual(matrix[0][1], 0)
+    self.assertEqual(array[0][1], 1)
@@ -0,0 +1,47 @@
+import unittest
+
+from backup_configuration import BackupConfiguration
+
+
+# 0-1-2-3-0 のリングに 1-3 の弦を加えたトポロジー
+adj_matrix = [[0, 1, 0, 1],
+              [1, 0, 1, 1],
+              [0, 1, 0, 1],
+              [1, 1, 1, 0]]
+
+class BackupConfigurationTestCase(unittest.TestCase):
+  def test_can_isolate_a_node(self):
+    backup_conf = BackupConfiguration(adj_matrix)
+    # 関節点を持たないので，どのノードも分離できる
+    for node in range(len(adj_matrix)):
+      self.assertTrue(backup_conf.can_isolate_a_node(node))
+
+  def test_can_isolate_a_node_after_isolation(self):
+    backup_conf = BackupConfiguration(adj_matrix)
+    backup_conf.isolate_node(0)
+    # ノード0を分離すると 1-2-3 の三角形が残り，どのノードも関節点ではない
+    self.assertTrue(backup_conf.can_isolate_a_node(2))
+
+    backup_conf.isolate_node(2)
+    # 1-3 のリンクだけが残る
+    self.assertTrue(backup_conf.can_isolate_a_node(1))
+    self.assertEqual(backup_conf.normal_nodes_matrix[0][1], 0)
+    self.assertEqual(backup_conf.normal_nodes_matrix[2][3], 0)
+
+  def test_can_not_isolate_articulation_point(self):
+    # 0-1-2 のパス
+    backup_conf = BackupConfiguration([[0, 1, 0],
+                                       [1, 0, 1],
+                                       [0, 1, 0]])
+    self.assertFalse(backup_conf.can_isolate_a_node(1))
+    self.assertTrue(backup_conf.can_isolate_a_node(0))
+
+  def test_isolated_configuration(self):
+    # 全てのバックアップ構成で一つの配列を共有し，分離したノードに構成の番号を記録する
+    backup_conf_0 = BackupConfiguration(adj_matrix, 0)
+    backup_conf_1 = BackupConfiguration(adj_matrix, 1, backup_conf_0.isolated_configuration)
+    backup_conf_0.isolate_node(0)
+    backup_conf_1.isolate_node(2)
+
+    self.assertIs(backup_conf_0.isolated_configuration, backup_conf_1.isolated_configuration)
+    self.assertEqual(list(backup_conf_0.isolated_configuration), [0, -1, 1, -1])
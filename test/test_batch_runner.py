@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+
+import batch_runner
+import substrate_distance_oracle
+from substrate_distance_oracle import SubstrateDistanceOracle
+from topology_manager import TopologyManager
+from topology_changer import TopologyChanger
+from mrc_test_topologies import grid_adj_matrix
+
+
+class BatchRunnerTestCase(unittest.TestCase):
+  def setUp(self) -> None:
+    self.cwd = os.getcwd()
+    self.tmp_dir = tempfile.TemporaryDirectory()
+    os.chdir(self.tmp_dir.name)
+
+  def tearDown(self) -> None:
+    os.chdir(self.cwd)
+    self.tmp_dir.cleanup()
+
+  def test_init_worker(self):
+    # ワーカーは親プロセスで求めた最短経路を共有メモリから参照し，計算し直さない
+    oracle = SubstrateDistanceOracle(grid_adj_matrix)
+    shared_memories = []
+    specs = []
+    for array in [grid_adj_matrix, oracle.dist_matrix, oracle.predecessors]:
+      array_shared_memory, spec = batch_runner._to_shared_memory(array)
+      shared_memories.append(array_shared_memory)
+      specs.append(spec)
+
+    try:
+      with mock.patch.object(substrate_distance_oracle, 'dijkstra') as dijkstra:
+        batch_runner._init_worker(*specs)
+      dijkstra.assert_not_called()
+
+      worker_oracle = batch_runner._worker_substrate_distance_oracle
+      self.assertTrue(worker_oracle.is_for(batch_runner._worker_substrate_adj_matrix))
+      self.assertTrue(np.array_equal(worker_oracle.dist_matrix, oracle.dist_matrix))
+      self.assertTrue(np.array_equal(worker_oracle.predecessors, oracle.predecessors))
+    finally:
+      for array_shared_memory in batch_runner._worker_shared_memories + shared_memories:
+        array_shared_memory.close()
+      batch_runner._worker_shared_memories.clear()
+      for array_shared_memory in shared_memories:
+        array_shared_memory.unlink()
+
+  def test_run_batch(self):
+    # スライスをプロセスに分散しても，逐次実行と同じ結果になる
+    slice_nodes_list = [[0, 4, 8], [1, 3, 5]]
+    results = batch_runner.run_batch(grid_adj_matrix, slice_nodes_list, 2)
+
+    for slice_count, slice_nodes in enumerate(slice_nodes_list):
+      expected = batch_runner.build_slice(grid_adj_matrix, slice_nodes, slice_count, TopologyManager(), TopologyChanger())
+      self.assertEqual(results[slice_count]['biconnected_graph_nodes'], expected['biconnected_graph_nodes'])
+      self.assertEqual(results[slice_count]['isolated_nodes'], expected['isolated_nodes'])
+
+
+if __name__ == "__main__":
+  unittest.main()
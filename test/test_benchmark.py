@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from benchmark import SUBSTRATE_KINDS, generate_substrate, draw_slice_nodes_list, run_benchmark
+
+
+class BenchmarkTestCase(unittest.TestCase):
+  def test_generate_substrate(self):
+    for substrate_kind in SUBSTRATE_KINDS:
+      adj_matrix = generate_substrate(substrate_kind, 30, seed=1)
+      self.assertEqual(adj_matrix.shape, (30, 30))
+      self.assertTrue(np.array_equal(adj_matrix, adj_matrix.T))
+      self.assertFalse(np.diag(adj_matrix).any())
+      self.assertEqual(connected_components(csr_matrix(adj_matrix), directed=False)[0], 1)
+      # 同じシードからは同じネットワークを作る
+      self.assertTrue(np.array_equal(adj_matrix, generate_substrate(substrate_kind, 30, seed=1)))
+
+  def test_draw_slice_nodes_list(self):
+    slice_nodes_list = draw_slice_nodes_list(30, 4, 5, seed=1)
+    self.assertEqual(slice_nodes_list, draw_slice_nodes_list(30, 4, 5, seed=1))
+    for slice_nodes in slice_nodes_list:
+      self.assertEqual(len(set(slice_nodes)), 5)
+
+  def test_run_benchmark(self):
+    benchmark_result = run_benchmark('ba', 30, num_of_slices=2, seed=1, backup_conf_num=4, slice_timeout_seconds=30)
+    self.assertEqual(len(benchmark_result['slices']), 2)
+    self.assertGreater(benchmark_result['peak_memory_bytes'], 0)
+    self.assertIn('mrc_search', benchmark_result['stage_seconds'])
+    self.assertIn('apply_mrc', benchmark_result['slices'][0]['profile'])
+    self.assertEqual(benchmark_result['error_num'], 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
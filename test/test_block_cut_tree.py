@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+
+from topology import Topology
+from topology_manager import TopologyManager
+from topology_changer import TopologyChanger
+from adjacency_matrix import AdjacencyMatrix
+from mrc_test_topologies import grid_adj_matrix
+
+
+# 0-1-2 の三角形と 3-4-5 の三角形を 2-3 のリンクでつなぎ，ノード5にノード6をぶら下げたトポロジー
+adj_matrix = [[0, 1, 1, 0, 0, 0, 0],
+              [1, 0, 1, 0, 0, 0, 0],
+              [1, 1, 0, 1, 0, 0, 0],
+              [0, 0, 1, 0, 1, 1, 0],
+              [0, 0, 0, 1, 0, 1, 0],
+              [0, 0, 0, 1, 1, 0, 1],
+              [0, 0, 0, 0, 0, 1, 0]]
+
+class BlockCutTreeTestCase(unittest.TestCase):
+  def test_blocks(self):
+    block_cut_tree = Topology(adj_matrix).get_block_cut_tree()
+
+    self.assertEqual(sorted(sorted(block) for block in block_cut_tree.blocks), [[0, 1, 2], [2, 3], [3, 4, 5], [5, 6]])
+    self.assertEqual(sorted(block_cut_tree.articulation_points), [2, 3, 5])
+    self.assertFalse(block_cut_tree.is_biconnected())
+
+    # 関節点は find_articulation_points と同じ順番で求める
+    self.assertEqual(block_cut_tree.articulation_points, TopologyManager().find_articulation_points(Topology(adj_matrix)))
+
+  def test_leaf_blocks(self):
+    block_cut_tree = Topology(adj_matrix).get_block_cut_tree()
+    leaf_blocks = block_cut_tree.leaf_blocks()
+
+    self.assertEqual(sorted(sorted(block_cut_tree.blocks[block_id]) for block_id in leaf_blocks), [[0, 1, 2], [5, 6]])
+    self.assertEqual(sorted(node for block_id in leaf_blocks for node in block_cut_tree.non_cut_nodes(block_id)), [0, 1, 6])
+
+  def test_biconnected(self):
+    block_cut_tree = Topology([[0, 1, 1], [1, 0, 1], [1, 1, 0]]).get_block_cut_tree()
+    self.assertTrue(block_cut_tree.is_biconnected())
+    self.assertEqual(block_cut_tree.leaf_blocks(), [])
+
+  def test_create_biconnect_graph_with_block_cut_tree(self):
+    # ブロックカット木を使う二重連結化では，ブロックカット木のDFSだけで関節点を求める
+    topology_manager = TopologyManager()
+    overlay_topology = topology_manager.generate_overlay_network(AdjacencyMatrix(grid_adj_matrix), [0, 4, 8])
+    topology_changer = TopologyChanger()
+    topology_changer.connect_overlay_topology(overlay_topology, topology_manager)
+
+    with mock.patch.object(TopologyManager, 'find_articulation_points') as find_articulation_points:
+      topology_changer.create_biconnect_graph(overlay_topology, topology_manager, plan_with_block_cut_tree=True)
+    find_articulation_points.assert_not_called()
+    self.assertEqual(overlay_topology.get_block_cut_tree().articulation_points, [])
@@ -0,0 +1,38 @@
+import sys
+import unittest
+
+from depth_first_search_tree import DepthFirstSearchTree
+
+
+class DepthFirstSearchTreeTestCase(unittest.TestCase):
+  def test_articulation_points_and_bridges(self):
+    # 0-1-2 の三角形に 2-3 のリンクをつなげたトポロジー
+    adj_list = {0: [1, 2], 1: [0, 2], 2: [0, 1, 3], 3: [2]}
+    dfs_tree = DepthFirstSearchTree(4)
+    dfs_tree.depth_first_search(0, adj_list)
+
+    self.assertEqual(list(dfs_tree.search_order), [0, 1, 2, 3])
+    self.assertEqual(list(dfs_tree.parent), [-1, 0, 1, 2])
+    self.assertEqual([index for index, value in enumerate(dfs_tree.isArticulation_point) if value], [2])
+    self.assertEqual(dfs_tree.bridges, [(2, 3)])
+
+  def test_long_chain(self):
+    # 再帰の上限を超える長さのパスでも探索できる
+    node_num = sys.getrecursionlimit() * 2
+    adj_list = {i: [j for j in (i - 1, i + 1) if 0 <= j < node_num] for i in range(node_num)}
+    dfs_tree = DepthFirstSearchTree(node_num)
+    dfs_tree.depth_first_search(0, adj_list)
+
+    self.assertEqual(sum(dfs_tree.isArticulation_point), node_num - 2)
+
+  def test_reset(self):
+    adj_list = {0: [1], 1: [0]}
+    dfs_tree = DepthFirstSearchTree(2)
+    dfs_tree.depth_first_search(0, adj_list)
+    is_visited = dfs_tree.isVisited
+
+    dfs_tree.reset(2)
+    # ノード数が同じであれば同じ領域を使い回す
+    self.assertIs(dfs_tree.isVisited, is_visited)
+    self.assertEqual(list(dfs_tree.isVisited), [0, 0])
+    self.assertEqual(dfs_tree.search_count, 0)
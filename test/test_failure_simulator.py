@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+from failure_simulator import simulate_node_failures, simulate_link_failures
+from mrc_test_topologies import apply_ring_mrc, apply_grid_mrc
+
+
+class FailureSimulatorTestCase(unittest.TestCase):
+  def test_simulate_node_failures(self):
+    mrc = apply_ring_mrc()
+    result = simulate_node_failures([conf.adj_matrix for conf in mrc.backup_conf],
+                                    [conf.isolated_nodes_set for conf in mrc.backup_conf], [3, 0, 2])
+
+    self.assertEqual(result['src_nodes'].tolist(), [0, 0, 2])
+    self.assertEqual(result['dst_nodes'].tolist(), [2, 3, 3])
+    self.assertEqual(result['normal_hops'].tolist(), [2, 3, 1])
+    for node in range(6):
+      self.assertIn(node, mrc.backup_conf[result['backup_conf'][node]].isolated_nodes_set)
+
+    # ノード1の障害時は，0-1-2 の経路を反対回りの 0-5-4-3-2 に切り替える
+    self.assertTrue(result['is_affected'][1][0])
+    self.assertEqual(result['failure_hops'][1].tolist(), [4, 3, 1])
+    self.assertEqual(result['stretch'][1].tolist(), [2.0, 1.0, 1.0])
+
+    # 送信元か宛先で障害が発生したノードペアは対象外
+    self.assertEqual(result['failure_hops'][0].tolist(), [-1, -1, 1])
+    self.assertTrue(np.isnan(result['stretch'][0][0]))
+
+  def test_simulate_link_failures(self):
+    mrc = apply_ring_mrc()
+    backup_configurations = [conf.adj_matrix for conf in mrc.backup_conf]
+    # リンク(0, 1)とリンク(3, 4)が同時に障害になるSRLG
+    result = simulate_link_failures(backup_configurations, [3, 0, 2], [[(0, 1), (4, 3)]])
+
+    self.assertEqual(result['links'].tolist(), [[0, 1], [0, 5], [1, 2], [2, 3], [3, 4], [4, 5]])
+    self.assertEqual(len(result['backup_conf']), 7)
+    self.assertTrue(np.all(result['backup_conf'][:6] >= 0))
+
+    # リンク(0, 1)の障害時は，0-1-2 の経路を反対回りの 0-5-4-3-2 に切り替える
+    self.assertEqual(result['failure_hops'][0].tolist(), [4, 3, 1])
+    self.assertEqual(result['is_affected'][0].tolist(), [True, False, False])
+
+    # SRLGの障害でリングが分断されると，障害リンクを経由するノードペアは到達できない
+    self.assertEqual(result['failure_links'][result['failure_link_offsets'][6]:].tolist(), [0, 4])
+    self.assertEqual(result['failure_hops'][6].tolist(), [-1, -1, 1])
+
+    # 構成ごとに並列に実行しても結果は同じ
+    parallel_result = simulate_link_failures(backup_configurations, [3, 0, 2], [[(0, 1), (4, 3)]], process_num=2)
+    self.assertTrue(np.array_equal(parallel_result['failure_hops'], result['failure_hops']))
+
+  def test_simulate_node_failures_on_grid(self):
+    # 格子では一つの構成が複数のノードを分離するため，障害ノードごとに分離している構成を選ぶ
+    mrc = apply_grid_mrc()
+    result = simulate_node_failures([conf.adj_matrix for conf in mrc.backup_conf],
+                                    [conf.isolated_nodes_set for conf in mrc.backup_conf], [0, 2, 6])
+
+    self.assertEqual(result['backup_conf'].tolist(), [0, 3, 0, 1, 2, 1, 2, 3, 0])
+    self.assertEqual(result['normal_hops'].tolist(), [2, 2, 4])
+
+    # 障害ノードを経由するノードペアだけを切り替える
+    self.assertEqual(result['is_affected'][1].tolist(), [True, False, False])
+    self.assertEqual(result['is_affected'][3].tolist(), [False, True, False])
+    self.assertEqual(result['is_affected'][4].tolist(), [False, False, False])
+
+    # ノード1の障害時は，{1, 7} を分離した構成で 0-1-2 の経路を 0-3-4-5-2 に切り替える
+    self.assertEqual(result['failure_hops'][1].tolist(), [4, 2, 4])
+    self.assertEqual(result['stretch'][1].tolist(), [2.0, 1.0, 1.0])
+    # ノード8は送信元と宛先（0と2）も分離した構成で切り替えるが，ホップ数は制限リンクを含めて数える
+    self.assertTrue(result['is_affected'][8][2])
+    self.assertEqual(result['failure_hops'][8].tolist(), [2, 2, 4])
+
+    # 送信元か宛先で障害が発生したノードペアは対象外
+    self.assertEqual(result['failure_hops'][2].tolist(), [-1, 2, -1])
+
+  def test_simulate_link_failures_on_grid(self):
+    mrc = apply_grid_mrc()
+    result = simulate_link_failures([conf.adj_matrix for conf in mrc.backup_conf], [0, 2, 6], [])
+
+    # リンク(3, 6)の障害時は，{4, 6} を分離した構成を使うため，0-3-6 の経路はノード4も避けて 0-1-2-5-8-7-6 になる
+    link_i = result['links'].tolist().index([3, 6])
+    self.assertEqual(mrc.backup_conf[result['backup_conf'][link_i]].isolated_nodes_set, {4, 6})
+    self.assertEqual(result['is_affected'][link_i].tolist(), [False, True, False])
+    self.assertEqual(result['failure_hops'][link_i].tolist(), [2, 6, 4])
@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 import numpy as np
 from scipy.sparse import csr_matrix
 from scipy.sparse.csgraph import dijkstra
@@ -9,6 +10,7 @@ import path_strings_collection as path_str
 from multiple_routing_configurations import MultipleRoutingConfigurations
 from topology_manager import TopologyManager
 from result_calculator import ResultCalculator
+from mrc_test_topologies import ring_adj_matrix, grid_adj_matrix, apply_ring_mrc
 
 
 # 制限リンクの重み
@@ -19,6 +21,12 @@ ISOLATE_WEIGHT = 100000
 adj_matrix = my_module.from_file_to_adj_matrix(path_str.substrate_topo_file)
 topology_manager = TopologyManager()
 
+# 始点を8にすると，固定の構成数のMRCでノードの分離に失敗する構成があるトポロジー
+failing_isolation_adj_matrix = [[0, 0, 0, 0, 0, 1, 1, 0, 1, 0], [0, 0, 1, 0, 0, 1, 0, 0, 1, 0], [0, 1, 0, 1, 1, 0, 0, 0, 1, 1],
+                                [0, 0, 1, 0, 1, 0, 0, 0, 0, 1], [0, 0, 1, 1, 0, 1, 0, 1, 1, 0], [1, 1, 0, 0, 1, 0, 1, 0, 0, 1],
+                                [1, 0, 0, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0, 0, 0, 1], [1, 1, 1, 0, 1, 0, 0, 0, 0, 0],
+                                [0, 0, 1, 1, 0, 1, 0, 1, 0, 0]]
+
 class MultipleRoutingConfigurationsTestCase(unittest.TestCase):
   def test_class_valid(self):
     mrc = MultipleRoutingConfigurations(adj_matrix)
@@ -108,4 +116,94 @@ class MultipleRoutingConfigurationsTestCase(unittest.TestCase):
           print('バックアップ構成', conf_num, 'の分離ノード', node, 'に制限リンクが接続されていません')
           is_connected_restricted_link_to_isolated_node = False
     
-    self.assertTrue(is_connected_restricted_link_to_isolated_node)
\ No newline at end of file
+    self.assertTrue(is_connected_restricted_link_to_isolated_node)
+
+  def test_apply_mrc_with_backup_conf_num(self):
+    # リングはノード数より少ない構成数ではMRCを実行できない
+    self.assertFalse(topology_manager.search_mrc_start_point(ring_adj_matrix, 'check_mrc/output', backup_conf_num=3))
+    mrc = apply_ring_mrc()
+    self.assertTrue(mrc)
+    self.assertEqual(len(mrc.backup_conf), 6)
+
+  def test_apply_mrc_keeps_failed_isolation(self):
+    # 固定の構成数のMRCは，分離に失敗した時に変更したリンクの重みを戻さない（以前から同じ結果になる）
+    # 構成ごとの (ノード, ノード, 重み)，重みが1のリンクは省略
+    expected_links = [
+      [(0, 8, 100000), (1, 2, 100000), (1, 5, 1000), (1, 8, 100000), (2, 8, 100000), (4, 8, 1000)],
+      [(0, 5, 100000), (1, 2, 1000), (1, 5, 100000), (2, 3, 100000), (2, 4, 100000), (2, 8, 1000), (2, 9, 1000), (3, 4, 100000),
+       (4, 5, 100000), (4, 7, 1000), (4, 8, 100000), (5, 6, 100000)],
+      [(0, 5, 100000), (1, 5, 100000), (2, 3, 1000), (3, 4, 1000), (3, 9, 1000), (4, 5, 1000), (4, 7, 100000), (5, 6, 100000),
+       (5, 9, 100000), (7, 9, 1000)],
+      [(0, 5, 1000), (0, 6, 100000), (0, 8, 1000), (2, 9, 100000), (3, 9, 100000), (5, 6, 1000), (5, 9, 1000), (7, 9, 100000)]
+    ]
+    mrc = topology_manager.apply_mrc(failing_isolation_adj_matrix, 'check_mrc/output', 8, backup_conf_num=4)
+    node_num = len(failing_isolation_adj_matrix)
+    for conf_num, links in enumerate(expected_links):
+      conf_adj_matrix = np.asarray(mrc.backup_conf[conf_num].adj_matrix)
+      self.assertEqual([(i, j, int(conf_adj_matrix[i][j])) for i in range(node_num) for j in range(i + 1, node_num) if conf_adj_matrix[i][j] > 1],
+                       links)
+
+  def test_isolate_a_node_rollback(self):
+    # 構成を追加しながら分離する場合は，分離に失敗した構成を isolate_a_node を呼び出す前の状態に戻す
+    def get_isolation_state(mrc, isolating_conf):
+      backup_conf = mrc.backup_conf[isolating_conf]
+      node_queue = [node for entry_id, node in mrc.node_queue._queue if mrc.node_queue._entry_ids.get(node) == entry_id]
+      return (np.asarray(backup_conf.adj_matrix).tolist(), list(backup_conf.links_queue_for_sorting), list(backup_conf.connected_links_queue),
+              node_queue, list(mrc.priority_link_list))
+
+    isolate_a_node = MultipleRoutingConfigurations.isolate_a_node
+    failure_num = 0
+    def isolate_a_node_and_check(mrc, isolating_conf, node_to_isolate, rollback_on_failure=False):
+      nonlocal failure_num
+      state = get_isolation_state(mrc, isolating_conf)
+      was_able_to_isolate = isolate_a_node(mrc, isolating_conf, node_to_isolate, rollback_on_failure)
+      if not was_able_to_isolate and rollback_on_failure:
+        failure_num += 1
+        self.assertEqual(get_isolation_state(mrc, isolating_conf), state)
+      return was_able_to_isolate
+
+    with mock.patch.object(MultipleRoutingConfigurations, 'isolate_a_node', isolate_a_node_and_check):
+      for start_point in range(len(failing_isolation_adj_matrix)):
+        topology_manager.apply_mrc_with_growing_configurations(failing_isolation_adj_matrix, 'check_mrc/output', start_point, 2, 4)
+    self.assertGreater(failure_num, 0)
+
+  def test_search_minimum_backup_configurations(self):
+    mrc = topology_manager.search_minimum_backup_configurations(adj_matrix, 'check_mrc/output', max_backup_conf_num=BACKUP_CONF_NUM,
+                                                                confirm_minimum=True)
+    self.assertTrue(mrc)
+    self.assertLessEqual(len(mrc.backup_conf), BACKUP_CONF_NUM)
+    # 一つ少ない構成数では，どの始点からもMRCに失敗する
+    if len(mrc.backup_conf) > 2:
+      self.assertFalse(topology_manager.search_mrc_start_point(adj_matrix, 'check_mrc/output', backup_conf_num=len(mrc.backup_conf) - 1))
+
+    # リングはノード数と同じ構成数が最小
+    self.assertEqual(len(topology_manager.search_minimum_backup_configurations(ring_adj_matrix, 'check_mrc/output').backup_conf), 6)
+
+    # 全てのノードがどれか一つの構成で分離されている
+    for node in range(len(adj_matrix)):
+      conf_num = mrc.isolated_configuration[node]
+      self.assertIn(node, mrc.backup_conf[conf_num].isolated_nodes_set)
+
+  def test_search_minimum_backup_configurations_by_growing(self):
+    # 確認しない場合は，構成を追加しながら分離した結果だけを使い，固定の構成数のMRCは実行しない
+    with mock.patch.object(TopologyManager, 'search_mrc_start_point') as search_mrc_start_point:
+      mrc = topology_manager.search_minimum_backup_configurations(grid_adj_matrix, 'check_mrc/output')
+    search_mrc_start_point.assert_not_called()
+
+    # 格子は構成を追加しながら分離すると3つで済む（固定の3つの構成では，どの始点からも失敗する）
+    self.assertEqual(len(mrc.backup_conf), 3)
+    self.assertFalse(topology_manager.search_mrc_start_point(grid_adj_matrix, 'check_mrc/output', backup_conf_num=3))
+    for node in range(len(grid_adj_matrix)):
+      self.assertIn(node, mrc.backup_conf[mrc.isolated_configuration[node]].isolated_nodes_set)
+
+  def test_search_minimum_backup_configurations_in_parallel(self):
+    # 始点をプロセスに分散しても，逐次実行と同じ結果になる
+    for mrc_subject_adj_matrix in [grid_adj_matrix, failing_isolation_adj_matrix]:
+      mrc = topology_manager.search_minimum_backup_configurations(mrc_subject_adj_matrix, 'check_mrc/output')
+      parallel_mrc = topology_manager.search_minimum_backup_configurations(mrc_subject_adj_matrix, 'check_mrc/output', process_num=2)
+      self.assertEqual(parallel_mrc.isolated_configuration, mrc.isolated_configuration)
+      for conf, parallel_conf in zip(mrc.backup_conf, parallel_mrc.backup_conf):
+        self.assertTrue(np.array_equal(parallel_conf.adj_matrix, conf.adj_matrix))
+
+    parallel_mrc = topology_manager.search_minimum_backup_configurations(grid_adj_matrix, 'check_mrc/output', confirm_minimum=True, process_num=2)
+    self.assertEqual(len(parallel_mrc.backup_conf), 3)
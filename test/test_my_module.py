@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import my_module
+
+
+adj_matrix = [[0, 1, 0, 1],
+              [1, 0, 1000, 0],
+              [0, 1000, 0, 1],
+              [1, 0, 1, 0]]
+
+class MyModuleTestCase(unittest.TestCase):
+  def test_adj_matrix_file(self):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      topo_file = os.path.join(tmp_dir, 'substrate_topo.txt')
+      ring_adj_matrix = (np.array(adj_matrix) > 0).astype(int).tolist()
+      my_module.from_adj_matrix_to_file(ring_adj_matrix, topo_file)
+
+      # 1要素を幅2で，区切り文字なしで書き出す
+      with open(topo_file, encoding='utf-8') as f:
+        self.assertEqual(f.readline(), ' 0 1 0 1\n')
+      self.assertEqual(my_module.from_file_to_adj_matrix(topo_file), ring_adj_matrix)
+
+  def test_edge_list_and_npy(self):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      for file_name in ['substrate_topo.edges', 'substrate_topo.npy']:
+        topo_file = os.path.join(tmp_dir, file_name)
+        my_module.save_adj_matrix(adj_matrix, topo_file)
+        self.assertEqual(my_module.load_adj_matrix(topo_file).tolist(), adj_matrix)
+
+      # リンクがないトポロジーも，ノード数を保ったまま読み込める
+      topo_file = os.path.join(tmp_dir, 'no_links.edges')
+      my_module.save_adj_matrix(np.zeros((3, 3), dtype=int), topo_file)
+      self.assertEqual(my_module.load_adj_matrix(topo_file).tolist(), [[0, 0, 0], [0, 0, 0], [0, 0, 0]])
+
+      # ノード数の行がない辺リストは，最大のノード番号までのノードを持つ
+      topo_file = os.path.join(tmp_dir, 'ring.edgelist')
+      with open(topo_file, 'w') as f:
+        f.write('0 1\n1 2\n2 0\n')
+      self.assertTrue(np.array_equal(my_module.load_adj_matrix(topo_file), [[0, 1, 1], [1, 0, 1], [1, 1, 0]]))
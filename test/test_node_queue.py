@@ -0,0 +1,28 @@
+import unittest
+
+from node_queue import NodeQueue
+
+
+class NodeQueueTestCase(unittest.TestCase):
+  def test_fifo(self):
+    node_queue = NodeQueue()
+    for node in [3, 0, 1, 2]:
+      node_queue.put(node)
+
+    self.assertEqual(len(node_queue), 4)
+    self.assertEqual([node_queue.get() for _ in range(4)], [3, 0, 1, 2])
+    self.assertTrue(node_queue.empty())
+
+  def test_move_to_front(self):
+    node_queue = NodeQueue()
+    for node in range(5):
+      node_queue.put(node)
+    node_queue.get()
+
+    # キューに入っているノードは先頭に移動し，取り出し済みのノードは先頭に入れ直す
+    node_queue.move_to_front(3)
+    node_queue.move_to_front(0)
+
+    self.assertEqual(len(node_queue), 5)
+    self.assertEqual([node_queue.get() for _ in range(5)], [0, 3, 1, 2, 4])
+    self.assertTrue(node_queue.empty())
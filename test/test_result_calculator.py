@@ -1,7 +1,9 @@
 import unittest
+from unittest import mock
 import yaml
 
 from result_calculator import ResultCalculator
+import slice_result_store
 from constants import BACKUP_CONF_NUM
 
 result_calculator = ResultCalculator()
@@ -50,7 +52,37 @@ class TopologyManagerTestCase(unittest.TestCase):
     print(result)
     self.assertEqual(len(result), BACKUP_CONF_NUM)
 
+  def test_get_backup_path_through_isolated_link(self):
+    # 0-1-2 のパスでノード1を分離した構成では，ノード0と2の経路が分離リンクを経由する
+    data = {'slice_nodes': [0, 2], 'biconnected_graph_nodes': [0, 1, 2],
+            'backup_configurations': [[[0, 100000, 0], [100000, 0, 100000], [0, 100000, 0]]]}
+    with mock.patch.object(slice_result_store, 'load_slice_result', return_value=data):
+      with self.assertRaises(ValueError):
+        result_calculator.get_backup_path(slice_count=0)
+
   def test_get_normal_path(self):
     without_failure_path_list = result_calculator.get_normal_path(slice_count=2)
     # print(without_failure_path_list)
-    self.assertEqual(len(without_failure_path_list), 3)
\ No newline at end of file
+    self.assertEqual(len(without_failure_path_list), 3)
+
+  def test_remove_backup_configuration_weights(self):
+    # 分離リンクを経由する経路も，failure_simulator と同じホップ数になる
+    backup_configurations = [[[0, 100000, 0], [100000, 0, 1000], [0, 1000, 0]]]
+    hop_num_matrix = result_calculator.calculate_backup_hops(backup_configurations, [0, 1, 2])
+    self.assertEqual(hop_num_matrix.tolist(), [[1, 2, 1]])
+
+  def test_calculate_backup_hops(self):
+    # 0-1-2-3-0 のリングで，ノード0を分離した構成と，ノード2を分離した構成
+    backup_configurations = [[[0, 100000, 0, 1000], [100000, 0, 1, 0], [0, 1, 0, 1], [1000, 0, 1, 0]],
+                             [[0, 1, 0, 1], [1, 0, 1000, 0], [0, 1000, 0, 100000], [1, 0, 100000, 0]]]
+    hop_num_matrix = result_calculator.calculate_backup_hops(backup_configurations, [3, 0, 1])
+
+    # ノードペアは (0, 1), (0, 3), (1, 3) の順
+    self.assertEqual(hop_num_matrix.tolist(), [[3, 1, 2], [1, 1, 2]])
+
+  def test_calculate_backup_hops_from_slice_nodes(self):
+    backup_configurations = [[[0, 100000, 0, 1000], [100000, 0, 1, 0], [0, 1, 0, 1], [1000, 0, 1, 0]],
+                             [[0, 1, 0, 1], [1, 0, 1000, 0], [0, 1000, 0, 100000], [1, 0, 100000, 0]]]
+    hop_num_matrix = ResultCalculator(dijkstra_from_slice_nodes=True).calculate_backup_hops(backup_configurations, [3, 0, 1])
+
+    self.assertEqual(hop_num_matrix.tolist(), result_calculator.calculate_backup_hops(backup_configurations, [3, 0, 1]).tolist())
@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from adjacency_matrix import to_csr
+from shortest_paths import batched_dijkstra, extract_paths, to_hop_matrix, remove_backup_configuration_weights
+
+
+# 0-1-2-3-0 のリングと，そのリンク(0, 1)に重みを付けたトポロジー
+adj_matrices = [[[0, 1, 0, 1], [1, 0, 1, 0], [0, 1, 0, 1], [1, 0, 1, 0]],
+                [[0, 1000, 0, 1], [1000, 0, 1, 0], [0, 1, 0, 1], [1, 0, 1, 0]]]
+
+class ShortestPathsTestCase(unittest.TestCase):
+  def test_batched_dijkstra(self):
+    dist_matrices, predecessors = batched_dijkstra(adj_matrices, [0, 2], return_predecessors=True)
+    self.assertEqual(dist_matrices.shape, (2, 2, 4))
+
+    # グラフごとに全ノード間の最短経路を求めた場合の，始点の行と一致する
+    for graph_i, adj_matrix in enumerate(adj_matrices):
+      expected_dist_matrix, expected_predecessors = dijkstra(csgraph=to_csr(adj_matrix), directed=False, return_predecessors=True)
+      self.assertTrue(np.array_equal(dist_matrices[graph_i], expected_dist_matrix[[0, 2]]))
+      self.assertTrue(np.array_equal(predecessors[graph_i], expected_predecessors[[0, 2]]))
+
+    self.assertEqual(dist_matrices[1][0][1], 3)
+
+
+  def test_extract_paths(self):
+    # ノード4は孤立している
+    adj_matrix = [[0, 1, 0, 1, 0], [1, 0, 1, 0, 0], [0, 1, 0, 1, 0], [1, 0, 1, 0, 0], [0, 0, 0, 0, 0]]
+    _, predecessors = dijkstra(csgraph=to_csr(adj_matrix), directed=False, return_predecessors=True)
+
+    offsets, nodes = extract_paths(predecessors, [0, 1, 3, 0], [1, 3, 3, 4])
+    paths = [nodes[offsets[i]:offsets[i + 1]].tolist() for i in range(len(offsets) - 1)]
+    self.assertEqual(paths, [[0, 1], [1, predecessors[1][3], 3], [3], []])
+
+    # 始点の行だけを持つ predecessors からも同じ経路を復元できる
+    offsets_by_rows, nodes_by_rows = extract_paths(predecessors[[0, 1, 3]], [0, 1, 3, 0], [1, 3, 3, 4], src_rows=[0, 1, 2, 0])
+    self.assertTrue(np.array_equal(offsets_by_rows, offsets))
+    self.assertTrue(np.array_equal(nodes_by_rows, nodes))
+
+  def test_remove_backup_configuration_weights(self):
+    hop_nums = remove_backup_configuration_weights([3, 1002, 2 * 1000 + 1, 100000 + 1001, np.inf])
+    self.assertEqual(hop_nums.tolist(), [3, 3, 3, 3, -1])
+
+  def test_to_hop_matrix(self):
+    # 到達できないノード間は，環境によらず -1 にする
+    dist_matrix = dijkstra(csgraph=to_csr(np.array([[0, 1, 0], [1, 0, 0], [0, 0, 0]])), directed=False)
+    self.assertEqual(to_hop_matrix(dist_matrix).tolist(), [[0, 1, -1], [1, 0, -1], [-1, -1, 0]])
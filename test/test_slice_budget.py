@@ -0,0 +1,86 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+import batch_runner
+import slice_profiler
+import slice_result_store
+from slice_budget import SliceBudget, SliceBuildFailed
+from topology import Topology
+import topology_manager
+from topology_manager import TopologyManager
+from topology_changer import TopologyChanger
+from mrc_test_topologies import ring_adj_matrix
+
+
+# 0-1-2-0 と 2-3-4-2 の二つの三角形（ノード2が関節点）
+bowtie_adj_matrix = [[0, 1, 1, 0, 0], [1, 0, 1, 0, 0], [1, 1, 0, 1, 1], [0, 0, 1, 0, 1], [0, 0, 1, 1, 0]]
+
+def _apply_mrc_slowly(mrc_subject_adj_matrix, start_point, backup_conf_num):
+  # 処理時間の上限までに終わらないMRC（プロセスプールに渡すため，モジュールの関数にする）
+  time.sleep(30)
+  return False
+
+
+class SliceBudgetTestCase(unittest.TestCase):
+  def setUp(self) -> None:
+    self.cwd = os.getcwd()
+    self.tmp_dir = tempfile.TemporaryDirectory()
+    os.chdir(self.tmp_dir.name)
+
+  def tearDown(self) -> None:
+    os.chdir(self.cwd)
+    self.tmp_dir.cleanup()
+
+  def test_check_mrc_preconditions(self):
+    topology_manager = TopologyManager()
+    self.assertIsNone(topology_manager.check_mrc_preconditions(Topology(ring_adj_matrix), 6))
+    self.assertIn('ring', topology_manager.check_mrc_preconditions(Topology(ring_adj_matrix), 5))
+    self.assertIn('at least 2', topology_manager.check_mrc_preconditions(Topology(ring_adj_matrix), 1))
+    self.assertIn('not biconnected', topology_manager.check_mrc_preconditions(Topology(bowtie_adj_matrix), 4))
+
+    # 関節点がないことを確認済みの場合は，DFSを実行しない
+    with slice_profiler.profile_slice() as profiler:
+      self.assertIsNone(topology_manager.check_mrc_preconditions(Topology(bowtie_adj_matrix), 4, check_articulation_points=False))
+    self.assertNotIn('dfs', profiler.to_dict())
+
+  def test_budget(self):
+    budget = SliceBudget(time_budget_seconds=None, max_retry_num=1)
+    budget.consume_retry()
+    with self.assertRaises(SliceBuildFailed):
+      budget.consume_retry()
+
+    with self.assertRaises(SliceBuildFailed):
+      SliceBudget(time_budget_seconds=0).check_time()
+
+  def test_budget_in_parallel_search(self):
+    # 別プロセスのMRCが終わらなくても，処理時間の上限で打ち切る
+    start = time.perf_counter()
+    with mock.patch.object(topology_manager, '_try_apply_mrc', _apply_mrc_slowly):
+      with self.assertRaises(SliceBuildFailed):
+        TopologyManager().search_mrc_start_point(ring_adj_matrix, 'check_mrc/output', process_num=2, backup_conf_num=6,
+                                                 budget=SliceBudget(time_budget_seconds=0.5))
+    self.assertLess(time.perf_counter() - start, 10)
+
+  def test_build_slice_on_ring(self):
+    # 物理ネットワーク全体がリングの場合，オーバーレイネットワークを広げられないため失敗として理由を返す
+    slice_backup_configuration_data = batch_runner.build_slice(ring_adj_matrix, [0, 2, 4], 0, TopologyManager(), TopologyChanger(),
+                                                               backup_conf_num=4)
+    self.assertIn('cannot be extended', slice_backup_configuration_data['failure_reason'])
+
+    batch_runner.output_slice_result(0, slice_backup_configuration_data)
+    self.assertEqual(slice_result_store.load_slice_failure(0)['slice_nodes'], [0, 2, 4])
+
+    # 構成数がノード数以上であればリングでもMRCを実行できる
+    slice_backup_configuration_data = batch_runner.build_slice(ring_adj_matrix, [0, 2, 4], 0, TopologyManager(), TopologyChanger(),
+                                                               backup_conf_num=7)
+    self.assertNotIn('failure_reason', slice_backup_configuration_data)
+
+    batch_runner.output_slice_result(0, slice_backup_configuration_data)
+    self.assertIsNone(slice_result_store.load_slice_failure(0))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import slice_profiler
+from topology import Topology
+from topology_manager import TopologyManager
+from shortest_paths import batched_dijkstra
+from mrc_test_topologies import ring_adj_matrix
+
+
+class SliceProfilerTestCase(unittest.TestCase):
+  def test_profile_slice(self):
+    with slice_profiler.profile_slice() as profiler:
+      mrc = TopologyManager().search_mrc_start_point(ring_adj_matrix, 'check_mrc/output', backup_conf_num=6)
+    self.assertTrue(mrc)
+
+    profile = profiler.to_dict()
+    self.assertEqual(profile['mrc_start_point']['count'], 1)
+    self.assertEqual(profile['apply_mrc']['count'], 1)
+    self.assertGreaterEqual(profile['apply_mrc']['seconds'], 0.0)
+    self.assertEqual(profile['mrc_start_point']['seconds'], 0.0)
+
+  def test_dijkstra_and_dfs(self):
+    # batched_dijkstra はグラフごとに数え，ブロックカット木のDFSも数える
+    with slice_profiler.profile_slice() as profiler:
+      batched_dijkstra([ring_adj_matrix, ring_adj_matrix, ring_adj_matrix], [0, 3])
+      Topology(ring_adj_matrix).get_block_cut_tree()
+
+    profile = profiler.to_dict()
+    self.assertEqual(profile['dijkstra']['count'], 3)
+    self.assertEqual(profile['dfs']['count'], 1)
+
+  def test_disabled(self):
+    # 集計していない時は何も記録せず，入れ子にした集計は外側に影響しない
+    with slice_profiler.timed('dfs'):
+      slice_profiler.count('reconnect')
+
+    with slice_profiler.profile_slice() as outer_profiler:
+      slice_profiler.count('reconnect')
+      with slice_profiler.profile_slice() as inner_profiler:
+        slice_profiler.count('reconnect', 2)
+      with slice_profiler.timed('dfs'):
+        pass
+
+    self.assertEqual(outer_profiler.to_dict()['reconnect']['count'], 1)
+    self.assertEqual(outer_profiler.to_dict()['dfs']['count'], 1)
+    self.assertEqual(inner_profiler.to_dict(), {'reconnect': {'count': 2, 'seconds': 0.0}})
+    self.assertIsNone(slice_profiler._active_profiler)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import yaml
+
+import slice_result_store
+import path_strings_collection as path_str
+
+
+slice_backup_configuration_data = {
+  'slice_nodes': [3, 0, 2],
+  'biconnected_graph_nodes': [0, 1, 2, 3],
+  'backup_configurations': [[[0, 1, 0, 100000], [1, 0, 1, 0], [0, 1, 0, 1], [100000, 0, 1, 0]],
+                            [[0, 1000, 0, 1], [1000, 0, 100000, 0], [0, 100000, 0, 1], [1, 0, 1, 0]]],
+  'isolated_nodes': [{3}, {1, 2}]
+}
+
+class SliceResultStoreTestCase(unittest.TestCase):
+  def setUp(self) -> None:
+    self.cwd = os.getcwd()
+    self.tmp_dir = tempfile.TemporaryDirectory()
+    os.chdir(self.tmp_dir.name)
+
+  def tearDown(self) -> None:
+    os.chdir(self.cwd)
+    self.tmp_dir.cleanup()
+
+  def test_save_and_load(self):
+    slice_result_store.save_slice_result(0, slice_backup_configuration_data, output_yaml=False)
+    self.assertFalse(os.path.exists(path_str.slice_mrc_result_yaml_file(0)))
+
+    data = slice_result_store.load_slice_result(0)
+    self.assertEqual(data['slice_nodes'], [3, 0, 2])
+    self.assertEqual(data['biconnected_graph_nodes'], [0, 1, 2, 3])
+    self.assertEqual(data['backup_configurations'].weight_classes.dtype, np.uint8)
+    for conf_i, adj_matrix in enumerate(slice_backup_configuration_data['backup_configurations']):
+      self.assertEqual(data['backup_configurations'].to_adj_matrix(conf_i).tolist(), adj_matrix)
+    self.assertEqual(data['isolated_nodes'], [{3}, {1, 2}])
+
+    slice_result_store.add_hop_num_raw_data(0, [1, 2, 3, 1, 2, 3])
+    self.assertEqual(slice_result_store.load_slice_result(0)['hop_num_raw_data'], [1, 2, 3, 1, 2, 3])
+
+  def test_yaml(self):
+    slice_result_store.save_slice_result(1, slice_backup_configuration_data, output_yaml=True)
+    with open(path_str.slice_mrc_result_yaml_file(1), encoding='utf-8') as f:
+      yaml_data = yaml.safe_load(f)
+    self.assertEqual(yaml_data, slice_backup_configuration_data)
+
+    # .npz ファイルがない場合は yaml ファイルから読み込み，ホップ数も yaml ファイルに追記する
+    os.remove(path_str.slice_mrc_result_file(1))
+    slice_result_store.add_hop_num_raw_data(1, [4, 5])
+    data = slice_result_store.load_slice_result(1)
+    self.assertEqual(data['backup_configurations'], slice_backup_configuration_data['backup_configurations'])
+    self.assertEqual(data['hop_num_raw_data'], [4, 5])
+
+  def test_profile(self):
+    profile = {'apply_mrc': {'count': 2, 'seconds': 0.5}, 'isolate_rejection': {'count': 3, 'seconds': 0.0}}
+    slice_result_store.save_slice_result(2, dict(slice_backup_configuration_data, profile=profile), output_yaml=False)
+    self.assertEqual(slice_result_store.load_slice_result(2)['profile'], profile)
+
+    # ホップ数を追加しても，集計結果は残る
+    slice_result_store.add_hop_num_raw_data(2, [1, 2])
+    self.assertEqual(slice_result_store.load_slice_result(2)['profile'], profile)
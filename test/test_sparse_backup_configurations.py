@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from adjacency_matrix import to_csr
+from sparse_backup_configurations import SparseBackupConfigurations, NORMAL_LINK, RESTRICTED_LINK, ISOLATED_LINK
+
+
+# 0-1-2-3-0 のリングで，構成0はノード3を，構成1はノード1を分離したバックアップ構成
+adj_matrices = [[[0, 1, 0, 100000], [1, 0, 1, 0], [0, 1, 0, 1000], [100000, 0, 1000, 0]],
+                [[0, 1000, 0, 1], [1000, 0, 100000, 0], [0, 100000, 0, 1], [1, 0, 1, 0]]]
+
+class SparseBackupConfigurationsTestCase(unittest.TestCase):
+  def test_from_adj_matrices(self):
+    backup_configurations = SparseBackupConfigurations.from_adj_matrices(adj_matrices)
+
+    self.assertEqual(len(backup_configurations), 2)
+    self.assertEqual(backup_configurations.edges.tolist(), [[0, 1], [0, 3], [1, 2], [2, 3]])
+    self.assertEqual(backup_configurations.weight_classes.tolist(), [[NORMAL_LINK, ISOLATED_LINK, NORMAL_LINK, RESTRICTED_LINK],
+                                                                     [RESTRICTED_LINK, NORMAL_LINK, ISOLATED_LINK, NORMAL_LINK]])
+    for conf_i, adj_matrix in enumerate(adj_matrices):
+      self.assertEqual(backup_configurations.to_adj_matrix(conf_i).tolist(), adj_matrix)
+      # CSR形式の隣接行列で求めた最短経路は，隣接行列から求めた場合と一致する
+      self.assertTrue(np.array_equal(dijkstra(backup_configurations[conf_i], directed=False), dijkstra(to_csr(adj_matrix), directed=False)))
+
+  def test_unknown_weight(self):
+    with self.assertRaises(ValueError):
+      SparseBackupConfigurations.from_adj_matrices([[[0, 2], [2, 0]]])
+
+  def test_save_and_load(self):
+    backup_configurations = SparseBackupConfigurations.from_adj_matrices(adj_matrices)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      file_name = os.path.join(tmp_dir, 'backup.npz')
+      backup_configurations.save(file_name)
+      loaded_backup_configurations = SparseBackupConfigurations.load(file_name)
+
+    self.assertEqual(loaded_backup_configurations.node_num, 4)
+    self.assertTrue(np.array_equal(loaded_backup_configurations.edges, backup_configurations.edges))
+    self.assertTrue(np.array_equal(loaded_backup_configurations.weight_classes, backup_configurations.weight_classes))
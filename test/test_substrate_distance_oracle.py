@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import my_module
+from substrate_distance_oracle import SubstrateDistanceOracle
+from topology_manager import TopologyManager
+
+
+# 0-1-2-3 のパスに 0-3 のリンクを加えたリング
+adj_matrix = [[0, 1, 0, 1],
+              [1, 0, 1, 0],
+              [0, 1, 0, 1],
+              [1, 0, 1, 0]]
+
+class SubstrateDistanceOracleTestCase(unittest.TestCase):
+  def test_shortest_paths(self):
+    oracle = SubstrateDistanceOracle(adj_matrix)
+
+    self.assertEqual(oracle.dist_matrix.tolist(), [[0, 1, 2, 1], [1, 0, 1, 2], [2, 1, 0, 1], [1, 2, 1, 0]])
+    self.assertEqual(oracle.predecessors[0][1], 0)
+    self.assertTrue(oracle.is_for(adj_matrix))
+    self.assertFalse(oracle.is_for([row[:] for row in adj_matrix]))
+
+  def test_shared_with_topology_manager(self):
+    oracle = SubstrateDistanceOracle(adj_matrix)
+    dist_matrix, predecessors = TopologyManager(oracle).get_substrate_shortest_paths(adj_matrix)
+
+    self.assertIs(dist_matrix, oracle.dist_matrix)
+    self.assertIs(predecessors, oracle.predecessors)
+
+  def test_cache(self):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      topo_file = os.path.join(tmp_dir, 'substrate_topo.txt')
+      my_module.from_adj_matrix_to_file(adj_matrix, topo_file)
+      cache_dir = os.path.join(tmp_dir, 'cache')
+
+      oracle = SubstrateDistanceOracle.from_file(topo_file, cache_dir)
+      self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+      # 2回目はキャッシュをメモリマップで読み込む
+      cached_oracle = SubstrateDistanceOracle.from_file(topo_file, cache_dir)
+      self.assertIsInstance(cached_oracle.dist_matrix, np.memmap)
+      self.assertTrue(np.array_equal(cached_oracle.dist_matrix, oracle.dist_matrix))
+      self.assertTrue(np.array_equal(cached_oracle.predecessors, oracle.predecessors))
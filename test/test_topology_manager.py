@@ -108,3 +108,15 @@ class TopologyManagerTestCase(unittest.TestCase):
     self.assertEqual(overlay_topology.adj_matrix_on_substrate[2][3], 0)
     self.assertEqual(overlay_topology.adj_matrix_on_substrate[7][10], 0)
     self.assertEqual(overlay_topology.adj_matrix_on_substrate[10][16], 0)
+
+
+  def test_shortest_paths_without_overlay_cache(self):
+    overlay_topology = topo_man.generate_overlay_network(substrate_adj_matrix, [6, 10, 16])
+    shortest_paths = overlay_topology.get_shortest_paths_without_overlay()
+    # トポロジーが変わらない間は同じ計算結果を使い回す
+    self.assertIs(overlay_topology.get_shortest_paths_without_overlay(), shortest_paths)
+
+    topo_changer.connect_overlay_topology(overlay_topology, topo_man)
+    # update_attributeが呼ばれたら計算し直す
+    self.assertIsNot(overlay_topology.get_shortest_paths_without_overlay(), shortest_paths)
+    self.assertEqual(len(overlay_topology.get_shortest_paths_without_overlay()[0]), len(substrate_adj_matrix))
@@ -0,0 +1,18 @@
+import unittest
+
+from union_find import UnionFind
+
+
+class UnionFindTestCase(unittest.TestCase):
+  def test_union(self):
+    node_components = UnionFind(5)
+    self.assertTrue(node_components.union(0, 1))
+    self.assertTrue(node_components.union(3, 4))
+    self.assertFalse(node_components.union(1, 0))
+
+    self.assertEqual(node_components.find(0), node_components.find(1))
+    self.assertNotEqual(node_components.find(1), node_components.find(3))
+    self.assertEqual(node_components.find(2), 2)
+
+    self.assertTrue(node_components.union(1, 4))
+    self.assertEqual(len({node_components.find(node) for node in range(5)}), 2)
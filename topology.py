@@ -3,6 +3,8 @@ from collections import defaultdict
 import numpy as np
 
 import depth_first_search_tree
+from block_cut_tree import BlockCutTree
+import slice_profiler
 
 class Topology(object):
 
@@ -15,8 +17,9 @@ class Topology(object):
     def update_attribute(self):
         self.node_num = len(self.adj_matrix)
         self.adj_list = self.to_adj_list_from_matrix()
-        self.dfs_tree = depth_first_search_tree.DepthFirstSearchTree(self.node_num)
-        self.dfs_tree.depth_first_search(0, self.adj_list)
+        with slice_profiler.timed('dfs'):
+            self.dfs_tree.reset(self.node_num)
+            self.dfs_tree.depth_first_search(0, self.adj_list)
 
     def add_link(self, node_i, node_j):
         self.adj_list[node_i].append(node_j)
@@ -32,17 +35,17 @@ class Topology(object):
 
     def to_adj_list_from_matrix(self):
         adj_dict = defaultdict(list)
-        for i in range(len(self.adj_matrix)):
-            for j in range(i+1, len(self.adj_matrix)):
-                if self.adj_matrix[i][j] == 1:
-                    adj_dict[i].append(j)
-                    adj_dict[j].append(i)
+        # 上三角の要素を行優先の順番で取り出す（隣接リストの並びはDFSの探索順に影響する）
+        link_rows, link_cols = np.nonzero(np.triu(np.asarray(self.adj_matrix) == 1, 1))
+        for i, j in zip(link_rows.tolist(), link_cols.tolist()):
+            adj_dict[i].append(j)
+            adj_dict[j].append(i)
 
         return adj_dict
             
 
     def find_articulation_points(self, node_num, start_point=0):
-        self.dfs_tree = depth_first_search_tree.DepthFirstSearchTree(node_num)
+        self.dfs_tree.reset(node_num)
         self.dfs_tree.depth_first_search(start_point, self.adj_list)
 
         for i in range(node_num):
@@ -58,6 +61,29 @@ class Topology(object):
 
         return articulation_points_list
 
+    def get_block_cut_tree(self, start_point=0):
+        '''
+        一度のDFSで二重連結成分（ブロック）と関節点を求め，ブロックカット木を作成する
+
+        リンクを持たないノードは，そのノードだけで一つのブロックとする
+        '''
+        node_num = len(self.adj_matrix)
+        with slice_profiler.timed('dfs'):
+            self.dfs_tree.reset(node_num)
+
+            for node in [start_point] + list(range(node_num)):
+                if self.dfs_tree.isVisited[node] == False:
+                    self.dfs_tree.depth_first_search(node, self.adj_list)
+                    if len(self.adj_list[node]) == 0:
+                        self.dfs_tree.blocks.append([node])
+
+        articulation_points_list = []
+        for index, value in enumerate(self.dfs_tree.isArticulation_point):
+            if value == True:
+                articulation_points_list.append(index)
+
+        return BlockCutTree(self.dfs_tree.blocks, articulation_points_list)
+
 
 
 def main(argv):
@@ -1,11 +1,15 @@
 from typing import List, Tuple, Dict
 import copy
 import numpy as np
-from scipy.sparse import csr_matrix
-from scipy.sparse.csgraph import dijkstra
 
+from constants import BACKUP_CONF_NUM
+from block_cut_tree import BlockCutTree
+from union_find import UnionFind
+from shortest_paths import extract_paths
 from overlay_topology import OverlayTopology
 from topology_manager import TopologyManager
+from slice_budget import SliceBudget, SliceBuildFailed
+import slice_profiler
 
 import sys
 
@@ -13,16 +17,14 @@ class TopologyChanger(object):
   def __init__(self) -> None:
     pass
 
-  def _add_slice_node(self, overlay_topology: OverlayTopology, connect_src: int, connect_dst: int, dist_matrix: List[int], predecessors: List[int]) -> None:
+  def _add_slice_node(self, overlay_topology: OverlayTopology, connect_src: int, connect_dst: int, predecessors: List[int]) -> None:
     '''
     物理ネットワーク上に指定した2点間の最短経路を求めて, スライスのリストに追加する
     '''
     slice_nodes = copy.deepcopy(overlay_topology.node_list_mapping_to_substrate)
 
-    dst = connect_dst
-    for _ in range(dist_matrix[connect_src][connect_dst]):
-        slice_nodes.append(predecessors[connect_src][dst])
-        dst = predecessors[connect_src][dst]
+    _, path_nodes = extract_paths(predecessors, [connect_src], [connect_dst])
+    slice_nodes.extend(path_nodes.tolist())
 
     slice_nodes = list(set(slice_nodes))
     slice_nodes.sort()
@@ -30,7 +32,6 @@ class TopologyChanger(object):
     overlay_topology.node_list_mapping_to_substrate = slice_nodes
 
     return None
-  
 
   def connect_overlay_topology(self, overlay_topology: OverlayTopology, topology_manager: TopologyManager, reconnect: bool = False) -> None:
     '''
@@ -42,27 +43,46 @@ class TopologyChanger(object):
     :params topology_manager TopologyManager
     :params reconnect bool: Trueを指定した場合はオーバーレイ上で使われていないリソースを使用して接続する
     '''
-    if reconnect:
-      substrate_csr__matrix = csr_matrix(overlay_topology.substrate_adj_matrix_without_overlay)
-    else:
-      substrate_csr__matrix = csr_matrix(overlay_topology.substrate_adj_matrix)
     # dist_matrix グラフ上の2点間のホップ数
     # predeccessors 最終ホップのノード番号
-    substrate_dist_matrix, substrate_predecessors = dijkstra(csgraph=substrate_csr__matrix, directed=False, return_predecessors=True)
-    substrate_dist_matrix = substrate_dist_matrix.astype(int)
+    if reconnect:
+      slice_profiler.count('reconnect')
+      substrate_dist_matrix, substrate_predecessors = overlay_topology.get_shortest_paths_without_overlay()
+    else:
+      substrate_dist_matrix, substrate_predecessors = topology_manager.get_substrate_shortest_paths(overlay_topology.substrate_adj_matrix)
 
+    # オーバーレイネットワークの連結成分を物理ネットワークのノード番号で管理し，経路を追加するたびに併合する
+    substrate_adj_matrix = np.asarray(overlay_topology.substrate_adj_matrix)
+    node_components = UnionFind(len(substrate_adj_matrix))
+    slice_nodes = overlay_topology.node_list_mapping_to_substrate
+    for index_i, index_j in zip(*np.nonzero(np.triu(np.asarray(overlay_topology.adj_matrix) == 1, 1))):
+      node_components.union(slice_nodes[index_i], slice_nodes[index_j])
+
+    is_extended = False
     while True:
-      slice_adj_csr_matrix = csr_matrix(overlay_topology.adj_matrix)
-      slice_dist_matrix = dijkstra(csgraph=slice_adj_csr_matrix, directed=False).astype(int)
+      slice_nodes = overlay_topology.node_list_mapping_to_substrate
+      component_labels = [node_components.find(node) for node in slice_nodes]
 
       # 全ノード間で接続性がある場合，ループ処理を抜ける
-      # nupmyのdist_matrixをint型に変換すると，接続性のないノード間には「-9223372036854775808」が入っている
-      if np.all(slice_dist_matrix >= 0):
+      if len(set(component_labels)) <= 1:
         break
-      connect_src, connect_dst = topology_manager.calculate_shotest_path_on_substrate(substrate_dist_matrix, overlay_topology.node_list_mapping_to_substrate, slice_dist_matrix)
-      
-      self._add_slice_node(overlay_topology, connect_src, connect_dst, substrate_dist_matrix, substrate_predecessors)
-      
+      connect_pair = topology_manager.calculate_shotest_path_on_substrate(substrate_dist_matrix, slice_nodes, component_labels)
+      if connect_pair is None:
+        raise SliceBuildFailed('overlay topology cannot be connected on the substrate')
+      connect_src, connect_dst = connect_pair
+
+      self._add_slice_node(overlay_topology, connect_src, connect_dst, substrate_predecessors)
+      is_extended = True
+
+      # 追加したノードと，それに隣接するオーバーレイネットワーク上のノードを併合する
+      slice_nodes_set = set(overlay_topology.node_list_mapping_to_substrate)
+      for node in slice_nodes_set.difference(slice_nodes):
+        for adj_node in np.flatnonzero(substrate_adj_matrix[node] == 1):
+          if adj_node in slice_nodes_set:
+            node_components.union(node, adj_node)
+
+    # 隣接行列とDFS木は接続し終えてから一度だけ更新する
+    if is_extended:
       slice_adj_matrix = topology_manager.extract_slice_from_substrate_topo(overlay_topology.substrate_adj_matrix, overlay_topology.node_list_mapping_to_substrate)
       overlay_topology.adj_matrix = slice_adj_matrix
 
@@ -119,11 +139,8 @@ class TopologyChanger(object):
 
       hop_num_list_from_child_to_parents = [None] * len(ancestor_nodes)
       
-      # 距離行列の作成
-      adj_csr_matrix = csr_matrix(overlay_topology.substrate_adj_matrix_without_overlay)
-
-      dist_matrix, predecessors = dijkstra(csgraph=adj_csr_matrix, directed=False, return_predecessors=True)
-      dist_matrix = dist_matrix.astype(int)
+      # 距離行列の取得（トポロジーが変わるまではキャッシュを使い回す）
+      dist_matrix, predecessors = overlay_topology.get_shortest_paths_without_overlay()
 
       # 全ての親ノードに対して，子ノードからの最短パスを求める
       for parent_node in range(len(ancestor_nodes)):
@@ -161,19 +178,27 @@ class TopologyChanger(object):
     '''
     指定したノード間の最短経路上のノードをオーバーレイトポロジーに追加する
 
+    '''
+    self._extend_overlay_topology_by_paths(overlay_topology, topology_manager, [(child, parent)])
+
+
+  def _extend_overlay_topology_by_paths(self, overlay_topology: OverlayTopology, topology_manager: TopologyManager, node_pairs: List[Tuple[int, int]]) -> None:
+    '''
+    指定した全てのノードの組について，最短経路上のノードをまとめてオーバーレイトポロジーに追加する
+
+    :params node_pairs: List[Tuple[int, int]] 経路の送信元と宛先の組（物理ネットワークのノード番号）
     '''
     add_node_list = []
-    # 物理ネットワーク上のオーバーレイトポロジーで使用されていない資源から距離行列を作成
-    adj_csr_matrix = csr_matrix(overlay_topology.substrate_adj_matrix_without_overlay)
-    dist_matrix, predecessors = dijkstra(csgraph=adj_csr_matrix, directed=False, return_predecessors=True)
-    dist_matrix = dist_matrix.astype(int)
+    # 物理ネットワーク上のオーバーレイトポロジーで使用されていない資源から作成した最短経路
+    _, predecessors = overlay_topology.get_shortest_paths_without_overlay()
 
-    # print("src = " + str(child_node_on_sub) + " , dst = " + str(parent) + " path is")
-    dst = parent
-    for i in range(dist_matrix[child][parent]):
-      # print(predecessors[child][dst])
-      add_node_list.append(predecessors[child][dst])
-      dst = predecessors[child][dst]     
+    src_nodes = [src for src, _ in node_pairs]
+    dst_nodes = [dst for _, dst in node_pairs]
+    offsets, path_nodes = extract_paths(predecessors, src_nodes, dst_nodes)
+    for i in range(len(node_pairs)):
+      # 宛先の一つ手前から送信元まで，宛先側から順に追加する（宛先はオーバーレイトポロジーのノード）
+      path = path_nodes[offsets[i]:offsets[i + 1]]
+      add_node_list.extend(path[-2::-1].tolist())
 
 
     ovrelay_nodes = overlay_topology.node_list_mapping_to_substrate
@@ -219,32 +244,121 @@ class TopologyChanger(object):
     return parent_child_pair
 
 
-  def create_biconnect_graph(self, overlay_topology: OverlayTopology, topology_manager: TopologyManager) -> None:
+  def _plan_augmenting_paths(self, overlay_topology: OverlayTopology, block_cut_tree: BlockCutTree) -> List[Tuple[int, int]]:
+    '''
+    ブロックカット木の葉ブロック同士を結ぶ経路をまとめて計画する
+
+    葉ブロックを i 番目と i + L/2 番目（L は葉の数）で組にし，それぞれの組について
+    関節点ではないノードの中から，物理ネットワーク上で最もホップ数の少ないノードの組を選ぶ
+    :params block_cut_tree BlockCutTree: オーバーレイトポロジーのブロックカット木
+    :return node_pairs: List[Tuple[int, int]] 結ぶノードの組（物理ネットワークのノード番号），経路が見つからない組は含まない
+    '''
+    dist_matrix, _ = overlay_topology.get_shortest_paths_without_overlay()
+
+    leaf_blocks = block_cut_tree.leaf_blocks()
+    leaf_num = len(leaf_blocks)
+
+    node_pairs = []
+    for i in range((leaf_num + 1) // 2):
+      j = i + leaf_num // 2
+      if i == j:
+        continue
+
+      src_nodes = [overlay_topology.node_list_mapping_to_substrate[node] for node in block_cut_tree.non_cut_nodes(leaf_blocks[i])]
+      dst_nodes = [overlay_topology.node_list_mapping_to_substrate[node] for node in block_cut_tree.non_cut_nodes(leaf_blocks[j])]
+
+      # 接続性のないノード間には負の値が入っているため除外する
+      hop_num_matrix = dist_matrix[np.ix_(src_nodes, dst_nodes)]
+      if not np.any(hop_num_matrix > 0):
+        continue
+      hop_num_matrix = np.where(hop_num_matrix > 0, hop_num_matrix, np.iinfo(hop_num_matrix.dtype).max)
+
+      src_index, dst_index = np.unravel_index(np.argmin(hop_num_matrix), hop_num_matrix.shape)
+      node_pairs.append((src_nodes[src_index], dst_nodes[dst_index]))
+
+    return node_pairs
+
+
+  def _plan_chord_path(self, overlay_topology: OverlayTopology) -> List[Tuple[int, int]]:
+    '''
+    全てのノードの次数が2（リング）のオーバーレイトポロジーに，弦となる経路を一つ計画する
+
+    :return node_pairs: List[Tuple[int, int]] 最もホップ数の少ないノードの組（物理ネットワークのノード番号），経路がなければ空のリスト
+    '''
+    dist_matrix, _ = overlay_topology.get_shortest_paths_without_overlay()
+
+    overlay_nodes = overlay_topology.node_list_mapping_to_substrate
+    hop_num_matrix = np.triu(dist_matrix[np.ix_(overlay_nodes, overlay_nodes)], 1)
+    if not np.any(hop_num_matrix > 0):
+      return []
+    hop_num_matrix = np.where(hop_num_matrix > 0, hop_num_matrix, np.iinfo(hop_num_matrix.dtype).max)
+
+    src_index, dst_index = np.unravel_index(np.argmin(hop_num_matrix), hop_num_matrix.shape)
+    return [(overlay_nodes[src_index], overlay_nodes[dst_index])]
+
+
+  def create_biconnect_graph(self, overlay_topology: OverlayTopology, topology_manager: TopologyManager, plan_with_block_cut_tree: bool = False,
+                             backup_conf_num: int = BACKUP_CONF_NUM, budget: SliceBudget = None) -> None:
     '''
     二重連結のオーバーレイトポロジーを作成する
     
+    :params backup_conf_num int: MRCのバックアップ構成数（ノード数がこれ以上のリングはMRCを実行できないため，さらに経路を追加する）
+    :params plan_with_block_cut_tree bool: Trueを指定した場合，ブロックカット木の葉ブロック同士を結ぶ経路をまとめて追加する
+    経路が一つも見つからない場合は，関節点を一つずつ取り除く方法で続ける
+    葉ブロックを結ぶとリングになりやすいため，リングには弦となる経路を追加する
+    :params budget SliceBudget: 指定した場合，ループごとに処理時間の上限を確認する
+    物理ネットワーク上にリングを広げる経路や関節点を取り除く経路がない場合は，SliceBuildFailed を送出する
     '''
 
     start_point = 0
     while True:
-      # 関節点の検出
-      articulation_points_list = topology_manager.find_articulation_points(overlay_topology)
+      if budget is not None:
+        budget.check_time()
+
+      # 関節点の検出（ブロックカット木を使う場合は，一度のDFSでブロックと関節点をまとめて求める）
+      if plan_with_block_cut_tree:
+        block_cut_tree = overlay_topology.get_block_cut_tree()
+        articulation_points_list = block_cut_tree.articulation_points
+      else:
+        articulation_points_list = topology_manager.find_articulation_points(overlay_topology)
       # print('articulation list', articulation_points_list)
 
       if len(articulation_points_list) == 0:
-        # 構成数4でMRCを実行する場合に不具合が発生するケースを除いてbreak（TODO 構成数の拡張性）
+        # ノード数が構成数以上のリングでMRCを実行すると不具合が発生するため，そのケースを除いてbreak
         # この時点でMRC対象のオーバーレイネットワークが完成
-        if len(overlay_topology.adj_matrix) < 4 or overlay_topology.is_degree_greater_than_2():
+        if len(overlay_topology.adj_matrix) < backup_conf_num or overlay_topology.is_degree_greater_than_2():
           break
         
         else:
+          if plan_with_block_cut_tree:
+            node_pairs = self._plan_chord_path(overlay_topology)
+            if len(node_pairs) > 0:
+              self._extend_overlay_topology_by_paths(overlay_topology, topology_manager, node_pairs)
+              continue
+
+          overlay_node_num = len(overlay_topology.adj_matrix)
           self.connect_overlay_topology(overlay_topology, topology_manager, reconnect=True)
           # overlay_topology.adj_list = overlay_topology.to_adj_list_from_matrix(overlay_topology.overlay_topology)
+          # ノードが増えなければ同じリングのまま再接続を繰り返すことになる
+          # ノード数が構成数と同じリングはMRCを実行できるため，そのまま完成とする
+          if len(overlay_topology.adj_matrix) == overlay_node_num:
+            if overlay_node_num <= backup_conf_num:
+              break
+            raise SliceBuildFailed('ring with ' + str(overlay_node_num) + ' nodes cannot be extended on the substrate')
+          continue
+
+      if plan_with_block_cut_tree:
+        node_pairs = self._plan_augmenting_paths(overlay_topology, block_cut_tree)
+        if len(node_pairs) > 0:
+          self._extend_overlay_topology_by_paths(overlay_topology, topology_manager, node_pairs)
           continue
 
       # DFSの始点を変更(関節点から探索を始めてしまうと，都合が悪いため)      
       while start_point in articulation_points_list:
         start_point += 1
+      # 全てのノードを始点にしても，関節点を取り除く経路が見つからなかった場合
+      if start_point >= len(overlay_topology.adj_matrix):
+        raise SliceBuildFailed('no path on the substrate removes an articulation point')
       # print('start point', start_point)
       # print('parent before search: ', overlay_topology.dfs_tree.parent)
       articulation_points_list = topology_manager.find_articulation_points(overlay_topology, start_point)
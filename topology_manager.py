@@ -1,64 +1,121 @@
 from typing import List, Tuple
-import copy
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.sparse.csgraph import dijkstra, connected_components
 
+from adjacency_matrix import AdjacencyMatrix, to_csr
+from shortest_paths import to_hop_matrix
+from substrate_distance_oracle import SubstrateDistanceOracle
 from topology import Topology
 from overlay_topology import OverlayTopology
 from multiple_routing_configurations import MultipleRoutingConfigurations
 from constants import DIRECTORY_NAME, BACKUP_CONF_NUM
+from slice_budget import SliceBudget, SliceBuildFailed
+import slice_profiler
 import path_strings_collection as path_str
 
 
+def _try_apply_mrc(mrc_subject_adj_matrix: List[int], start_point: int, backup_conf_num: int) -> bool:
+  '''
+  プロセスプールのワーカーで実行する関数
+
+  MRCのインスタンスはプロセス間で受け渡せないため，MRCが成功したかどうかだけを返す
+  '''
+  return bool(TopologyManager().apply_mrc(mrc_subject_adj_matrix, '', start_point, backup_conf_num))
+
+
+def _try_apply_mrc_with_growing_configurations(mrc_subject_adj_matrix: List[int], start_point: int, min_backup_conf_num: int,
+                                               max_backup_conf_num: int) -> int:
+  '''
+  プロセスプールのワーカーで実行する関数
+
+  構成を追加しながらMRCを実行し，成功した場合は構成数，失敗した場合は0を返す
+  '''
+  mrc = TopologyManager().apply_mrc_with_growing_configurations(mrc_subject_adj_matrix, '', start_point, min_backup_conf_num, max_backup_conf_num)
+  return len(mrc.backup_conf) if mrc else 0
+
+
+def _wait_for_mrc(executor: ProcessPoolExecutor, future, budget: SliceBudget):
+  '''
+  プロセスプールで実行しているMRCの結果を待つ
+
+  budget の処理時間の上限に達した場合は，実行中のワーカーを止めて SliceBuildFailed を送出する
+  '''
+  if budget is None:
+    return future.result()
+  try:
+    return budget.wait(future)
+  except SliceBuildFailed:
+    # shutdown(cancel_futures=True) は実行中の処理を止めないため，ワーカープロセスを終了させる
+    for process in list(executor._processes.values()):
+      process.terminate()
+    raise
+
+
 class TopologyManager(object):
-  def __init__(self) -> None:
-    pass
+  def __init__(self, substrate_distance_oracle: SubstrateDistanceOracle = None) -> None:
+    '''
+    :params substrate_distance_oracle SubstrateDistanceOracle: 計算済みの物理ネットワークの最短経路（省略した場合は必要になるたびに計算する）
+    '''
+    self.substrate_distance_oracle = substrate_distance_oracle
+
+
+  def get_substrate_shortest_paths(self, substrate_adj_matrix: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    物理ネットワークの全ノード間の最短経路を返す
 
-  def extract_slice_from_substrate_topo(self, substrate_adj_matrix: List[int], slice_nodes: List[int]) -> List[int]:
+    指定した隣接行列に対する計算結果を保持している場合はそれを使い回す
+    :return (dist_matrix, predecessors) Tuple[np.ndarray, np.ndarray]: ホップ数（int型，到達できない場合は -1）と最終ホップのノード番号
+    '''
+    if self.substrate_distance_oracle is not None and self.substrate_distance_oracle.is_for(substrate_adj_matrix):
+      return self.substrate_distance_oracle.dist_matrix, self.substrate_distance_oracle.predecessors
+
+    with slice_profiler.timed('dijkstra'):
+      dist_matrix, predecessors = dijkstra(csgraph=to_csr(substrate_adj_matrix), directed=False, return_predecessors=True)
+    dist_matrix = to_hop_matrix(dist_matrix)
+
+    return dist_matrix, predecessors
+
+
+  def extract_slice_from_substrate_topo(self, substrate_adj_matrix: List[int], slice_nodes: List[int]) -> AdjacencyMatrix:
     '''
     任意のスライスに対して，基盤ネットワークからグラフを抜き取る．
 
     :params substrate_adj_matrix List[int]: 物理ネットワークの隣接行列（２次元配列）
     :params silce_nodes List[int]: スライスに対応した物理ネットワーク上のノード番号
-    :return slice_adj_matrix List[int]: オーバーレイネットワークのノード番号．ノード番号は基盤ネットワークのノード番号が若い順になる．
+    :return slice_adj_matrix AdjacencyMatrix: オーバーレイネットワークのノード番号．ノード番号は基盤ネットワークのノード番号が若い順になる．
     '''
-    slice_adj_list = [[] for i in range(len(slice_nodes))]
-    for i in range(len(slice_nodes)):
-      for j in range(len(slice_nodes)):
-        if substrate_adj_matrix[slice_nodes[i]][slice_nodes[j]] == 1:
-          slice_adj_list[i].append(j)
-    
-    slice_adj_matrix = [[0 for i in range(len(slice_nodes))] for j in range(len(slice_nodes))]
-    for i, adj_nodes_list in enumerate(slice_adj_list):
-      for j in adj_nodes_list:
-        slice_adj_matrix[i][j] = 1
+    substrate_adj_matrix = np.asarray(substrate_adj_matrix)
+    slice_adj_matrix = AdjacencyMatrix(substrate_adj_matrix[np.ix_(slice_nodes, slice_nodes)] == 1)
 
     return slice_adj_matrix
   
 
-  def calculate_shotest_path_on_substrate(self, substrate_dist_matrix: List[int], slice_nodes: List[int], slice_dist_matrix: List[int]) -> Tuple[int, int]:
+  def calculate_shotest_path_on_substrate(self, substrate_dist_matrix: List[int], slice_nodes: List[int], component_labels: List[int]) -> Tuple[int, int]:
     '''
     物理ネットワーク上にスライスに対応するノード間で最短経路を見つける
 
+    オーバーレイネットワーク上で異なる連結成分に属するノードのペアのうち，物理ネットワーク上のホップ数が最小のペアを選ぶ
     :params substrate_dist_matrix List[int]: 物理ネットワークのホップ数が格納された隣接行列
     :params silce_nodes List[int]: スライスに対応した物理ネットワークのノード番号
-    :params slice_dist_matrix List[int]: オーバーレイネットワークのホップ数が格納された隣接行列
-    :return (connect_src, connect_dst) Tuple[int, int]: 最短経路を持つノード番号のペア（物理ネットワークのノード番号）
-    '''
-    # 初期値
-    shortest_path = 100
-    # 物理ネットワーク上で，オーバーレイネットワークに対応するノード間の最短経路を求める
-    slice_nodes_num = len(slice_nodes)
-    for i in range(slice_nodes_num):
-      src = slice_nodes[i]
-      for j in range(i + 1, slice_nodes_num):
-        dst = slice_nodes[j]
-        if slice_dist_matrix[i][j] < 0 and 1 <= substrate_dist_matrix[src][dst] <= shortest_path:
-          shortest_path = substrate_dist_matrix[src][dst]
-          connect_src = src
-          connect_dst = dst
-  
-    return connect_src, connect_dst
-  
+    :params component_labels List[int]: スライスのノードごとの，オーバーレイネットワーク上の連結成分の番号
+    :return (connect_src, connect_dst) Tuple[int, int]: 最短経路を持つノード番号のペア（物理ネットワークのノード番号），ペアが見つからない場合は None
+    '''
+    slice_nodes = np.asarray(slice_nodes)
+    component_labels = np.asarray(component_labels)
+    hop_num_matrix = np.asarray(substrate_dist_matrix)[np.ix_(slice_nodes, slice_nodes)]
 
+    # 上三角（i < j）のうち，別の連結成分に属していて，物理ネットワーク上で 1〜100 ホップで到達できるペアが候補
+    candidates = np.triu(component_labels[:, None] != component_labels[None, :], 1) & (hop_num_matrix >= 1) & (hop_num_matrix <= 100)
+    if not candidates.any():
+      return None
+
+    # ホップ数が同じペアが複数ある場合は，行優先の順番で最後のペアを選ぶ
+    shortest_path = hop_num_matrix[candidates].min()
+    index_i, index_j = np.unravel_index(np.flatnonzero(candidates & (hop_num_matrix == shortest_path))[-1], hop_num_matrix.shape)
+
+    return slice_nodes[index_i], slice_nodes[index_j]
+  
 
   def generate_overlay_network(self, substrate_adj_matrix: List[int], slice_nodes: List[int]) -> List[int]:
     '''
@@ -82,22 +139,21 @@ class TopologyManager(object):
 
     :params topology Topology: DFS対象のトポロジー
     '''
-    topology.dfs_tree.search_count = 0
-    topology.dfs_tree.isVisited = [False] * (len(topology.adj_matrix))
-    topology.dfs_tree.parent = [-1] * (len(topology.adj_matrix))
+    topology.dfs_tree.reset(len(topology.adj_matrix))
 
 
   def find_articulation_points(self, topology: Topology, start_point: int = 0) -> List[int]:
     '''
     :return articulation_points_list List[int] オーバーレイネットワークの関節点のノード番号（物理ネットワークとは紐づいていない）
     '''
-    self._update_dfs_tree(topology)
-    topology.dfs_tree.depth_first_search(start_point, topology.adj_list)
+    with slice_profiler.timed('dfs'):
+      self._update_dfs_tree(topology)
+      topology.dfs_tree.depth_first_search(start_point, topology.adj_list)
 
-    node_num = len(topology.adj_matrix)
-    for i in range(node_num):
-      if topology.dfs_tree.isVisited[i] == False:
-        topology.dfs_tree.depth_first_search(i, topology.adj_list)
+      node_num = len(topology.adj_matrix)
+      for i in range(node_num):
+        if topology.dfs_tree.isVisited[i] == False:
+          topology.dfs_tree.depth_first_search(i, topology.adj_list)
     
     articulation_points_list = []
     for index, value in enumerate(topology.dfs_tree.isArticulation_point):
@@ -107,18 +163,95 @@ class TopologyManager(object):
     return articulation_points_list
   
 
-  def apply_mrc(self, mrc_subject_adj_matrix: List[int], output_file_name: str, start_point: int =0) -> MultipleRoutingConfigurations:
+  def check_mrc_preconditions(self, topology: Topology, backup_conf_num: int = BACKUP_CONF_NUM, check_articulation_points: bool = True) -> str:
+    '''
+    MRCを実行する前に，MRCが成功するための必要条件を確認する
+
+    全てのノードを分離するには，ノードが3つ以上の二重連結なトポロジーと2つ以上のバックアップ構成が必要になる
+    リング（全てのノードの次数が2）では一つの構成で一つのノードしか分離できないため，ノード数以上の構成が必要になる
+    :params topology Topology: MRCの対象のトポロジー
+    :params backup_conf_num int: バックアップ構成数
+    :params check_articulation_points bool: Falseの場合，関節点を求めるDFSを省略する（関節点がないことを確認済みのトポロジー向け）
+    :return reason str: 満たしていない条件，全て満たしている場合は None を返す
+    '''
+    node_num = len(topology.adj_matrix)
+    if backup_conf_num < 2:
+      return 'at least 2 backup configurations are required, got ' + str(backup_conf_num)
+    if node_num < 3:
+      return 'topology with ' + str(node_num) + ' nodes cannot be biconnected'
 
-    mrc = MultipleRoutingConfigurations(mrc_subject_adj_matrix)
-    
+    component_num, _ = connected_components(to_csr(topology.adj_matrix), directed=False)
+    if component_num > 1 or (check_articulation_points and len(self.find_articulation_points(topology)) > 0):
+      return 'topology is not biconnected'
+
+    if all(len(topology.adj_list[node]) == 2 for node in range(node_num)) and node_num > backup_conf_num:
+      return 'ring with ' + str(node_num) + ' nodes needs at least ' + str(node_num) + ' backup configurations'
+
+    return None
+
+
+  def apply_mrc(self, mrc_subject_adj_matrix: List[int], output_file_name: str, start_point: int =0, backup_conf_num: int = BACKUP_CONF_NUM) -> MultipleRoutingConfigurations:
+    '''
+    指定した数のバックアップ構成でMRCを実行する
+
+    :params start_point int: 最初に分離するノードの番号
+    :params backup_conf_num int: バックアップ構成数
+    :return mrc MultipleRoutingConfigurations: MRCの実行結果，分離できないノードがあった場合は False を返す
+    '''
+    with slice_profiler.timed('apply_mrc'):
+      mrc = MultipleRoutingConfigurations(mrc_subject_adj_matrix, backup_conf_num)
+      if not self._isolate_all_nodes(mrc, start_point, backup_conf_num):
+        return False
+
+    # mrc.export_adj_matrix(output_file_name)
+
+    # TODO Create and read a list of sets insted of reading from a file
+    # for conf_i in range(len(mrc.backup_conf)):
+    #   with open(path_str.isolate_nodes_set_file + str(conf_i) + ".txt", 'w') as f:
+    #     f.write(",".join(map(str, list(mrc.backup_conf[conf_i].isolated_nodes_set))))
+            
+    return mrc
+
+
+  def apply_mrc_with_growing_configurations(self, mrc_subject_adj_matrix: List[int], output_file_name: str, start_point: int = 0,
+                                            min_backup_conf_num: int = 2, max_backup_conf_num: int = None) -> MultipleRoutingConfigurations:
+    '''
+    少ないバックアップ構成数からMRCを始め，どの構成でも分離できないノードが見つかった時だけ構成を追加する
+
+    構成を追加しても，それまでに分離したノードとリンクはそのまま使い回し，分離できなかったノードから続ける
+    :params min_backup_conf_num int: 最初に用意するバックアップ構成数
+    :params max_backup_conf_num int: バックアップ構成数の上限（省略した場合はノード数）
+    :return mrc MultipleRoutingConfigurations: MRCの実行結果，上限まで構成を追加しても分離できないノードがあった場合は False を返す
+    '''
+    if max_backup_conf_num is None:
+      max_backup_conf_num = len(mrc_subject_adj_matrix)
+    if max_backup_conf_num < min_backup_conf_num:
+      return False
+
+    with slice_profiler.timed('apply_mrc'):
+      mrc = MultipleRoutingConfigurations(mrc_subject_adj_matrix, min_backup_conf_num)
+      if not self._isolate_all_nodes(mrc, start_point, max_backup_conf_num, rollback_on_failure=True):
+        return False
+
+    return mrc
+
+
+  def _isolate_all_nodes(self, mrc: MultipleRoutingConfigurations, start_point: int, max_backup_conf_num: int,
+                         rollback_on_failure: bool = False) -> bool:
+    '''
+    start_pointから順番に，全てのノードをいずれかのバックアップ構成で分離する
+
+    分離する構成は順番に切り替え，どの構成でも分離できないノードがあれば，構成数が max_backup_conf_num に達するまで構成を追加する
+    :params rollback_on_failure bool: Trueの場合，分離できなかった構成を分離を試みる前の状態に戻す（構成を追加しながら分離する場合に使う）
+    :return bool: 全てのノードを分離できたか
+    '''
     mrc.node_queue.put(start_point)
 
-    for i in range(len(mrc_subject_adj_matrix)):
+    for i in range(len(mrc.normal_conf.adj_matrix)):
       if i != start_point:
         mrc.node_queue.put(i)
     
     conf_isolating = 0
-    node_num = len(mrc_subject_adj_matrix)
 
     while not mrc.node_queue.empty():
       # キューから順番に取り出して分離していく
@@ -126,54 +259,182 @@ class TopologyManager(object):
 
       conf_to_start_search = conf_isolating
       while True:
-        # 通常ノードのみで構成されたグラフをコピー
-        copy_normal_nodes_matrix = copy.deepcopy(mrc.backup_conf[conf_isolating].normal_nodes_matrix)
-        
-        # 隣接ノード間のリンクを切断
-        for i in range(node_num):
-          copy_normal_nodes_matrix[node_try_to_isolate][i] = 0
-          copy_normal_nodes_matrix[i][node_try_to_isolate] = 0
-
-        if mrc.backup_conf[conf_isolating].can_isolate_a_node(copy_normal_nodes_matrix, node_try_to_isolate):
+        if mrc.backup_conf[conf_isolating].can_isolate_a_node(node_try_to_isolate):
           # TODO 修正必要          
-          was_able_to_isolate = mrc.isolate_a_node(conf_isolating, node_try_to_isolate)
+          was_able_to_isolate = mrc.isolate_a_node(conf_isolating, node_try_to_isolate, rollback_on_failure)
           if was_able_to_isolate == True:
             
-            mrc.backup_conf[conf_isolating].isolated_nodes_set.add(node_try_to_isolate)
-            
-            # 通常ノードのみで構成するグラフの要素から分離ノードに隣接する要素を削除
-            for i in range(node_num):
-              mrc.backup_conf[conf_isolating].normal_nodes_matrix[node_try_to_isolate][i] = 0
-              mrc.backup_conf[conf_isolating].normal_nodes_matrix[i][node_try_to_isolate] = 0
+            # 分離ノードとして登録し，通常ノードのみで構成するグラフから取り除く
+            mrc.backup_conf[conf_isolating].isolate_node(node_try_to_isolate)
             
-            conf_isolating = (conf_isolating +1) % BACKUP_CONF_NUM
+            conf_isolating = (conf_isolating +1) % len(mrc.backup_conf)
             # TODO 何してるのか思い出す
             mrc.get_link_queue_for_sorting(conf_isolating)
             break
 
         # print('Node' + str(node_try_to_isolate) + 'can\'t isolate in conf' + str(conf_isolating))
-        conf_isolating = (conf_isolating +1) % BACKUP_CONF_NUM
+        slice_profiler.count('isolate_rejection')
+        conf_isolating = (conf_isolating +1) % len(mrc.backup_conf)
 
         if conf_to_start_search == conf_isolating:
           break
       
       #ノードがどの構成で分離されているかの確認
-      for i in range(BACKUP_CONF_NUM):
-        if node_try_to_isolate in set(mrc.backup_conf[i].isolated_nodes_set):
-          # print("Node" + str(node_try_to_isolate) +"is isolated in configuration" + str(i) + "\n")
-          break
-      else:
+      if mrc.isolated_configuration[node_try_to_isolate] == -1:
         # print("Failed to isolate node" + str(node_try_to_isolate) + "\n")
         
         # 円状のトポロジーに対応するために加えた
         # TODO いるか確かめてから修正
+        if len(mrc.backup_conf) >= max_backup_conf_num:
+          return False
+
+        # 構成を追加し，分離できなかったノードを追加した構成から分離し直す
+        # 既に分離されている隣接ノードとのリンクは，他のリンクより先に処理する
+        conf_isolating = mrc.add_backup_configuration()
+        for adj_node in np.flatnonzero(mrc.normal_conf.adj_matrix[node_try_to_isolate] == 1).tolist():
+          if mrc.isolated_configuration[adj_node] != -1:
+            mrc.backup_conf[conf_isolating].links_queue_for_sorting.append([node_try_to_isolate, adj_node])
+        mrc.node_queue.move_to_front(node_try_to_isolate)
+
+    return True
+
+
+  def search_mrc_start_point(self, mrc_subject_adj_matrix: List[int], output_file_name: str, process_num: int = 1,
+                             backup_conf_num: int = BACKUP_CONF_NUM, budget: SliceBudget = None) -> MultipleRoutingConfigurations:
+    '''
+    MRCが成功するまで，分離を始めるノードを 0, 1, 2, ... と順番に変えてMRCを実行する
+
+    process_numに2以上を指定した場合は，始点の候補をプロセスプールに分散して実行する
+    始点の番号が最も小さい成功例を採用するため，結果は逐次実行の場合と同じになる
+    :params process_num int: MRCを並列に実行するプロセス数
+    :params backup_conf_num int: バックアップ構成数
+    :params budget SliceBudget: 指定した場合，逐次実行では始点ごとに処理時間の上限を確認し，並列実行では結果を待つ時間を残りの時間までに制限する
+    :return mrc MultipleRoutingConfigurations: MRCの実行結果，全ての始点で失敗した場合は False を返す
+    '''
+    node_num = len(mrc_subject_adj_matrix)
+
+    if process_num <= 1:
+      for start_point in range(node_num):
+        if budget is not None:
+          budget.check_time()
+        slice_profiler.count('mrc_start_point')
+        mrc = self.apply_mrc(mrc_subject_adj_matrix, output_file_name, start_point, backup_conf_num)
+        if mrc:
+          return mrc
+      return False
+
+    executor = ProcessPoolExecutor(max_workers=process_num)
+    try:
+      futures = [executor.submit(_try_apply_mrc, mrc_subject_adj_matrix, start_point, backup_conf_num) for start_point in range(node_num)]
+
+      # 始点の番号順に結果を確認し，最初に成功した始点が見つかった時点で残りの処理は取り消す
+      for start_point, future in enumerate(futures):
+        slice_profiler.count('mrc_start_point')
+        if _wait_for_mrc(executor, future, budget):
+          break
+      else:
         return False
+    finally:
+      executor.shutdown(wait=False, cancel_futures=True)
 
-    # mrc.export_adj_matrix(output_file_name)
+    # 成功した始点について，このプロセスでMRCのインスタンスを作り直す
+    return self.apply_mrc(mrc_subject_adj_matrix, output_file_name, start_point, backup_conf_num)
 
-    # TODO Create and read a list of sets insted of reading from a file
-    # for conf_i in range(len(mrc.backup_conf)):
-    #   with open(path_str.isolate_nodes_set_file + str(conf_i) + ".txt", 'w') as f:
-    #     f.write(",".join(map(str, list(mrc.backup_conf[conf_i].isolated_nodes_set))))
-            
-    return mrc
+
+  def search_minimum_backup_configurations(self, mrc_subject_adj_matrix: List[int], output_file_name: str,
+                                           min_backup_conf_num: int = 2, max_backup_conf_num: int = None,
+                                           budget: SliceBudget = None, confirm_minimum: bool = False,
+                                           process_num: int = 1) -> MultipleRoutingConfigurations:
+    '''
+    できるだけ少ないバックアップ構成数でMRCを実行する
+
+    始点ごとに apply_mrc_with_growing_configurations で min_backup_conf_num から構成を追加しながら分離し，
+    構成数が最も少ない結果を採用する（構成を追加する時は，それまでの分離の状態を使い回す）
+    それまでの最小より多くの構成が必要になった始点は，その時点で打ち切る
+    構成を追加しながら求めた構成数は，固定の構成数で apply_mrc を実行した場合の最小とは限らないため，
+    confirm_minimum がTrueの場合だけ，一つ少ない構成数で全ての始点を試し，成功する間は構成数を減らす
+    （apply_mrc は分離するノードの順番を貪欲に決めるため，グラフに対して理論上の最小値であるとは限らない）
+    :params min_backup_conf_num int: バックアップ構成数の下限
+    :params max_backup_conf_num int: バックアップ構成数の上限（省略した場合はノード数）
+    :params budget SliceBudget: 指定した場合，始点ごとに処理時間の上限を確認する
+    :params confirm_minimum bool: Trueの場合，一つ少ない構成数ではどの始点からもMRCに失敗することを確認する
+    :params process_num int: 2以上の場合，始点の候補をプロセスプールに分散して実行する（結果は逐次実行の場合と同じ）
+    :return mrc MultipleRoutingConfigurations: MRCの実行結果，上限まで構成を追加しても全ての始点で失敗した場合は False を返す
+    '''
+    if max_backup_conf_num is None:
+      max_backup_conf_num = len(mrc_subject_adj_matrix)
+
+    if process_num <= 1:
+      minimum_mrc = self._search_growing_configurations(mrc_subject_adj_matrix, output_file_name, min_backup_conf_num, max_backup_conf_num,
+                                                        budget)
+    else:
+      minimum_mrc = self._search_growing_configurations_in_parallel(mrc_subject_adj_matrix, output_file_name, min_backup_conf_num,
+                                                                    max_backup_conf_num, process_num, budget)
+
+    if not minimum_mrc or not confirm_minimum:
+      return minimum_mrc
+
+    while len(minimum_mrc.backup_conf) > min_backup_conf_num:
+      mrc = self.search_mrc_start_point(mrc_subject_adj_matrix, output_file_name, process_num, len(minimum_mrc.backup_conf) - 1, budget)
+      if not mrc:
+        break
+      minimum_mrc = mrc
+
+    return minimum_mrc
+
+
+  def _search_growing_configurations(self, mrc_subject_adj_matrix: List[int], output_file_name: str, min_backup_conf_num: int,
+                                     max_backup_conf_num: int, budget: SliceBudget) -> MultipleRoutingConfigurations:
+    '''
+    始点を 0, 1, 2, ... と順番に変えて構成を追加しながらMRCを実行し，構成数が最も少ない（同じ場合は始点の番号が小さい）結果を返す
+    '''
+    minimum_mrc = False
+    for start_point in range(len(mrc_subject_adj_matrix)):
+      if budget is not None:
+        budget.check_time()
+      slice_profiler.count('mrc_start_point')
+      mrc = self.apply_mrc_with_growing_configurations(mrc_subject_adj_matrix, output_file_name, start_point, min_backup_conf_num,
+                                                       max_backup_conf_num)
+      if not mrc:
+        continue
+
+      minimum_mrc = mrc
+      if len(mrc.backup_conf) == min_backup_conf_num:
+        break
+      # 構成の追加は上限に達するまで同じ順番で進むため，上限を下げても，より少ない構成数で済む始点の結果は変わらない
+      max_backup_conf_num = len(mrc.backup_conf) - 1
+
+    return minimum_mrc
+
+
+  def _search_growing_configurations_in_parallel(self, mrc_subject_adj_matrix: List[int], output_file_name: str, min_backup_conf_num: int,
+                                                 max_backup_conf_num: int, process_num: int, budget: SliceBudget) -> MultipleRoutingConfigurations:
+    '''
+    _search_growing_configurations の始点の候補をプロセスプールに分散して実行する
+    '''
+    executor = ProcessPoolExecutor(max_workers=process_num)
+    try:
+      futures = [executor.submit(_try_apply_mrc_with_growing_configurations, mrc_subject_adj_matrix, start_point, min_backup_conf_num,
+                                 max_backup_conf_num)
+                 for start_point in range(len(mrc_subject_adj_matrix))]
+
+      # 始点の番号順に結果を確認し，構成数が最も少ない最初の始点を選ぶ（下限に達した時点で残りの処理は取り消す）
+      minimum_start_point = None
+      minimum_backup_conf_num = max_backup_conf_num + 1
+      for start_point, future in enumerate(futures):
+        slice_profiler.count('mrc_start_point')
+        backup_conf_num = _wait_for_mrc(executor, future, budget)
+        if 0 < backup_conf_num < minimum_backup_conf_num:
+          minimum_start_point = start_point
+          minimum_backup_conf_num = backup_conf_num
+          if backup_conf_num == min_backup_conf_num:
+            break
+    finally:
+      executor.shutdown(wait=False, cancel_futures=True)
+
+    if minimum_start_point is None:
+      return False
+
+    # 選んだ始点について，このプロセスでMRCのインスタンスを作り直す
+    return self.apply_mrc_with_growing_configurations(mrc_subject_adj_matrix, output_file_name, minimum_start_point, min_backup_conf_num,
+                                                      minimum_backup_conf_num)
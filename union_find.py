@@ -0,0 +1,42 @@
+from typing import List
+
+
+class UnionFind(object):
+  '''
+  ノードの連結成分を管理する素集合データ構造
+
+  経路圧縮（path halving）とサイズによる併合で，find / union はほぼ定数時間で終わる
+  '''
+
+  def __init__(self, node_num: int) -> None:
+    self.parent: List[int] = list(range(node_num))
+    self.size: List[int] = [1] * node_num
+
+  def find(self, node: int) -> int:
+    '''
+    :return int: ノードが属する連結成分の代表ノード
+    '''
+    parent = self.parent
+    while parent[node] != node:
+      parent[node] = parent[parent[node]]
+      node = parent[node]
+
+    return node
+
+  def union(self, node_u: int, node_v: int) -> bool:
+    '''
+    2つのノードが属する連結成分を併合する
+
+    :return bool: 別々の連結成分を併合した場合は True
+    '''
+    root_u = self.find(node_u)
+    root_v = self.find(node_v)
+    if root_u == root_v:
+      return False
+
+    if self.size[root_u] < self.size[root_v]:
+      root_u, root_v = root_v, root_u
+    self.parent[root_v] = root_u
+    self.size[root_u] += self.size[root_v]
+
+    return True